@@ -0,0 +1,234 @@
+"""
+Local stand-ins for everything the voice agent talks to, served from one FastAPI app:
+
+- OpenAI chat completions (/v1/chat/completions), streaming with configurable token latency,
+  answering with a function/tool call when the caller asks about insurance or appointments
+- Twilio REST (/2010-04-01/.../Recordings.json)
+- The postgresql data service (/get_insurance_status, /insurance_providers, /check_appt_slots, /appt_slots_summary),
+  backed by seeded in-memory data
+
+Latencies are read from the environment so the harness can sweep them:
+FAKE_FIRST_TOKEN_MS, FAKE_TOKEN_MS, FAKE_REPLY_TOKENS, FAKE_DB_MS, FAKE_TWILIO_MS
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+
+FIRST_TOKEN_MS = float(os.getenv("FAKE_FIRST_TOKEN_MS", "300"))
+TOKEN_MS = float(os.getenv("FAKE_TOKEN_MS", "15"))
+REPLY_TOKENS = int(os.getenv("FAKE_REPLY_TOKENS", "40"))
+DB_MS = float(os.getenv("FAKE_DB_MS", "5"))
+TWILIO_MS = float(os.getenv("FAKE_TWILIO_MS", "150"))
+
+INSURANCES = {
+    "BlueCross BlueShield": True,
+    "UnitedHealthcare": True,
+    "Aetna": True,
+    "Cigna": False,
+    "Humana": True,
+    "Kaiser Permanente": False,
+}
+
+REPLY_WORDS = (
+    "Sure, I can help with that. Our office is open Monday to Saturday from nine to five, "
+    "and we are closed on Sundays. Is there anything else I can do for you today?"
+).split()
+
+app = FastAPI()
+
+
+def _seed_slots(days: int = 21):
+    """Half-hour slots from 8:00 to 16:30 UTC, skipping Sundays, about half of them open."""
+    rng = random.Random(42)
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    slots = []
+    for day in range(days + 1):
+        date = today + timedelta(days=day)
+        if date.weekday() == 6:
+            continue
+        for half_hour in range(18):
+            if rng.random() < 0.5:
+                slots.append({"id": len(slots) + 1, "start_time": date + timedelta(hours=8, minutes=30 * half_hour)})
+    return slots
+
+
+SLOTS = _seed_slots()
+
+
+### OpenAI ###
+
+def _plan_reply(body: dict):
+    """Decide what the fake model does: (function name, arguments) or None for a plain text reply."""
+    last = body["messages"][-1]
+    if last["role"] != "user" or not (body.get("functions") or body.get("tools")):
+        return None
+    text = (last.get("content") or "").lower()
+    for name in INSURANCES:
+        if name.lower().split()[0] in text:
+            return "fetch_insurance_status", {"name": name}
+    if "insurance" in text:
+        return "fetch_insurance_status", {"name": "Aetna"}
+    if any(word in text for word in ("appointment", "available", "open", "slot", "schedule")):
+        start = (datetime.now(timezone.utc) + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        return "check_appt_slots", {
+            "start_time": start.strftime("%Y-%m-%dT%H:%M:%S"),
+            "end_time": (start + timedelta(hours=8)).strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    return None
+
+
+def _chunk(body: dict, delta: dict, finish_reason=None) -> str:
+    event = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(event)}\n\n"
+
+
+async def _stream(body: dict):
+    await asyncio.sleep(FIRST_TOKEN_MS / 1000)
+    plan = _plan_reply(body)
+
+    if plan is not None:
+        name, arguments = plan
+        arguments = json.dumps(arguments)
+        if body.get("tools"):
+            call = {"index": 0, "id": f"call_{random.getrandbits(32):x}", "type": "function",
+                    "function": {"name": name, "arguments": ""}}
+            yield _chunk(body, {"role": "assistant", "tool_calls": [call]})
+            for i in range(0, len(arguments), 8):
+                await asyncio.sleep(TOKEN_MS / 1000)
+                yield _chunk(body, {"tool_calls": [{"index": 0, "function": {"arguments": arguments[i:i + 8]}}]})
+            yield _chunk(body, {}, "tool_calls")
+        else:
+            yield _chunk(body, {"role": "assistant", "function_call": {"name": name, "arguments": ""}})
+            for i in range(0, len(arguments), 8):
+                await asyncio.sleep(TOKEN_MS / 1000)
+                yield _chunk(body, {"function_call": {"arguments": arguments[i:i + 8]}})
+            yield _chunk(body, {}, "function_call")
+    else:
+        yield _chunk(body, {"role": "assistant", "content": ""})
+        for i in range(REPLY_TOKENS):
+            if i:
+                await asyncio.sleep(TOKEN_MS / 1000)
+            word = REPLY_WORDS[i % len(REPLY_WORDS)]
+            yield _chunk(body, {"content": word if i == 0 else " " + word})
+        yield _chunk(body, {}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if body.get("stream"):
+        return StreamingResponse(_stream(body), media_type="text/event-stream")
+
+    # Non-streaming requests (warm-up, summaries) get a short plain reply
+    await asyncio.sleep(FIRST_TOKEN_MS / 1000)
+    content = " ".join(REPLY_WORDS[:REPLY_TOKENS])
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": REPLY_TOKENS, "total_tokens": REPLY_TOKENS},
+    }
+
+
+@app.get("/v1/models/{model}")
+async def get_model(model: str):
+    return {"id": model, "object": "model", "created": 0, "owned_by": "fake"}
+
+
+### Twilio ###
+
+@app.post("/2010-04-01/Accounts/{account_sid}/Calls/{call_sid}/Recordings.json")
+async def start_recording(account_sid: str, call_sid: str):
+    await asyncio.sleep(TWILIO_MS / 1000)
+    return Response(
+        content=json.dumps({"sid": f"RE{random.getrandbits(64):016x}", "call_sid": call_sid, "status": "in-progress"}),
+        status_code=201,
+        media_type="application/json",
+    )
+
+
+### Data service ###
+
+@app.get("/get_insurance_status")
+async def get_insurance_status(name: str):
+    await asyncio.sleep(DB_MS / 1000)
+    for known, accepted in INSURANCES.items():
+        if known.lower() == name.lower():
+            return {"name": known, "accepted": accepted}
+    return Response(content=json.dumps({"detail": "Insurance provider not found"}), status_code=404,
+                    media_type="application/json")
+
+
+@app.get("/insurance_providers")
+async def insurance_providers():
+    return {"providers": list(INSURANCES)}
+
+
+def _window(start_time: datetime, end_time: datetime) -> list:
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=timezone.utc)
+    if end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+    return [slot for slot in SLOTS if start_time <= slot["start_time"] <= end_time]
+
+
+def _slot(slot: dict) -> dict:
+    return {"id": slot["id"], "start_time": slot["start_time"].isoformat()}
+
+
+@app.get("/check_appt_slots")
+async def check_appt_slots(start_time: datetime, end_time: datetime, limit: int = 100, offset: int = 0):
+    await asyncio.sleep(DB_MS / 1000)
+    slots = _window(start_time, end_time)
+    page = slots[offset:offset + limit]
+    return {"slots": [_slot(slot) for slot in page],
+            "next_offset": offset + limit if len(slots) > offset + limit else None}
+
+
+@app.get("/appt_slots_summary")
+async def appt_slots_summary(start_time: datetime, end_time: datetime, first_n: int = 3):
+    await asyncio.sleep(DB_MS / 1000)
+    slots = _window(start_time, end_time)
+    days = {}
+    for slot in slots:
+        day = days.setdefault(slot["start_time"].date().isoformat(), {"morning": 0, "afternoon": 0})
+        day["morning" if slot["start_time"].hour < 12 else "afternoon"] += 1
+    return {"total": len(slots),
+            "days": [{"date": date, **counts} for date, counts in days.items()],
+            "openings": [_slot(slot) for slot in slots[:first_n]]}
+
+
+# A few silent-frame stand-ins for the typing clips, so filler decisions show up in the results
+FILLER_CLIPS = [f"{index:032x}" for index in range(1, 4)]
+
+
+@app.get("/filler")
+async def filler():
+    return {"families": {"keyboard-typing": [{"path": f"/filler/{etag}.mp3", "duration_ms": 1500}
+                                             for etag in FILLER_CLIPS]}}
+
+
+@app.get("/filler/{etag}.mp3")
+async def filler_clip(etag: str):
+    if etag not in FILLER_CLIPS:
+        return Response(status_code=404)
+    return Response(content=b"\xff\xfb\x90\x00" * 16, media_type="audio/mpeg")
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
@@ -0,0 +1,84 @@
+"""
+Simulated Twilio ConversationRelay client: opens a /twilio-ws session and replays a scripted call
+(setup, then prompts, some of them interrupted), timing every turn.
+"""
+import asyncio
+import json
+import time
+import uuid
+import websockets
+
+# One scripted call. interrupt_after_tokens barges in once that many text frames have arrived.
+DEFAULT_SCRIPT = [
+    {"prompt": "Hi, what are your office hours?"},
+    {"prompt": "Do you take Aetna insurance?"},
+    {"prompt": "What appointments are available tomorrow?", "interrupt_after_tokens": 2},
+    {"prompt": "Sorry, go ahead. Anything open tomorrow afternoon?"},
+    {"prompt": "Great, thank you. Bye!"},
+]
+
+
+async def _drain(ws, timeout: float = 0.01):
+    """Discard frames left over from an interrupted turn."""
+    while True:
+        try:
+            await asyncio.wait_for(ws.recv(), timeout)
+        except asyncio.TimeoutError:
+            return
+
+
+async def run_call(url: str, script: list = DEFAULT_SCRIPT, think_time: float = 0.2, turn_timeout: float = 30.0) -> list:
+    """Run one call; returns a result dict per turn."""
+    call_sid = f"CA{uuid.uuid4().hex}"
+    results = []
+    async with websockets.connect(url) as ws:
+        await ws.send(json.dumps({
+            "type": "setup",
+            "sessionId": f"VX{uuid.uuid4().hex}",
+            "callSid": call_sid,
+            "from": "+15550000000",
+            "to": "+15551111111",
+            "direction": "inbound",
+        }))
+
+        for step in script:
+            await asyncio.sleep(think_time)
+            await _drain(ws)
+
+            result = {"callSid": call_sid, "prompt": step["prompt"], "first_token_s": None, "total_s": None,
+                      "filler_audio": 0, "interrupted": False, "error": None}
+            heard, frames = "", 0
+            sent = time.perf_counter()
+            await ws.send(json.dumps({"type": "prompt", "voicePrompt": step["prompt"], "lang": "en-US", "last": True}))
+            try:
+                while True:
+                    message = json.loads(await asyncio.wait_for(ws.recv(), turn_timeout))
+                    if message["type"] in ("play", "play_audio"):
+                        result["filler_audio"] += 1
+                        continue
+                    if message["type"] != "text":
+                        continue
+                    if message["token"]:
+                        if result["first_token_s"] is None:
+                            result["first_token_s"] = time.perf_counter() - sent
+                        heard += message["token"]
+                        frames += 1
+                    if message.get("last"):
+                        break
+                    if step.get("interrupt_after_tokens") and frames >= step["interrupt_after_tokens"]:
+                        await ws.send(json.dumps({
+                            "type": "interrupt",
+                            "utteranceUntilInterrupt": heard,
+                            "durationUntilInterruptMs": int((time.perf_counter() - sent) * 1000),
+                        }))
+                        result["interrupted"] = True
+                        break
+                result["total_s"] = time.perf_counter() - sent
+            except asyncio.TimeoutError:
+                result["error"] = "timeout"
+            except websockets.ConnectionClosed as e:
+                result["error"] = f"connection closed: {e}"
+                results.append(result)
+                break
+            results.append(result)
+    return results
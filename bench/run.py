@@ -0,0 +1,175 @@
+"""
+Offline load test for the voice agent.
+
+Starts the fakes (OpenAI, Twilio, data service) and the voice agent locally, then runs waves of
+concurrent scripted calls through /twilio-ws and reports turn-latency percentiles per concurrency level.
+No network access is needed.
+
+    python bench/run.py --concurrency 1,10,25,50 --workers 1 --output bench_results.json
+
+Point --data-service at a running postgresql/app.py (seeded with scripts/populate_tables.sql and
+generate_slots.py) to include the real query layer instead of the in-memory double.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import httpx
+from relay_client import DEFAULT_SCRIPT, run_call
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+VOICE_AGENT_DIR = os.path.join(os.path.dirname(BENCH_DIR), "voice_agent")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app: str, port: int, cwd: str, env: dict, workers: int = 1, log_path: str = None,
+                 factory: bool = False):
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"] + (["--factory"] if factory else []),
+        cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+def agent_env(fakes_url: str, data_service: str = None) -> dict:
+    """Environment for a voice agent that talks only to the fakes (and optionally a real data service)."""
+    return {
+        **os.environ,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{fakes_url}/v1",
+        "TWILIO_API_BASE_URL": fakes_url,
+        "TWILIO_ACCOUNT_SID": "ACbench",
+        "TWILIO_AUTH_TOKEN": "bench",
+        "POSTGRESQL_BASE_URL": data_service or fakes_url,
+        "DATA_BACKEND": "http",
+        "SESSION_STORE": "memory",
+        "TRACE_LOG_PATH": "",
+        "CALL_LOG_PATH": "",
+    }
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> float:
+    """Poll until the URL answers 200; returns how long that took."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def percentiles(values: list) -> dict:
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def pick(p):
+        return round(values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] * 1000, 1)
+
+    return {"count": len(values), "p50_ms": pick(50), "p90_ms": pick(90), "p95_ms": pick(95),
+            "p99_ms": pick(99), "max_ms": round(values[-1] * 1000, 1)}
+
+
+async def run_level(url: str, concurrency: int, calls_per_caller: int, think_time: float) -> dict:
+    async def caller():
+        turns = []
+        for _ in range(calls_per_caller):
+            try:
+                turns.extend(await run_call(url, DEFAULT_SCRIPT, think_time))
+            except Exception as e:
+                turns.append({"error": f"{type(e).__name__}: {e}"})
+        return turns
+
+    start = time.perf_counter()
+    turns = [turn for turns in await asyncio.gather(*(caller() for _ in range(concurrency))) for turn in turns]
+    elapsed = time.perf_counter() - start
+
+    ok = [turn for turn in turns if not turn.get("error")]
+    return {
+        "concurrency": concurrency,
+        "calls": concurrency * calls_per_caller,
+        "turns": len(turns),
+        "errors": len(turns) - len(ok),
+        "elapsed_s": round(elapsed, 2),
+        "turns_per_s": round(len(ok) / elapsed, 2) if elapsed else None,
+        "first_token": percentiles([turn["first_token_s"] for turn in ok if turn["first_token_s"] is not None]),
+        "turn_total": percentiles([turn["total_s"] for turn in ok if not turn["interrupted"]]),
+        "filler_audio_per_turn": round(sum(turn["filler_audio"] for turn in ok) / len(ok), 3) if ok else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,5,10,25,50", help="Comma-separated concurrent-call levels")
+    parser.add_argument("--calls-per-caller", type=int, default=2)
+    parser.add_argument("--think-time", type=float, default=0.2, help="Seconds between caller turns")
+    parser.add_argument("--workers", type=int, default=1, help="Voice agent uvicorn workers")
+    parser.add_argument("--slo-ms", type=float, default=1000.0, help="p95 time-to-first-token a level must meet to count as sustainable")
+    parser.add_argument("--data-service", help="Base URL of a running postgresql/app.py (default: in-memory double)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--agent-log", help="Write the voice agent's output to this file")
+    args = parser.parse_args()
+
+    fakes_port, agent_port = free_port(), free_port()
+    fakes_url = f"http://127.0.0.1:{fakes_port}"
+    env = agent_env(fakes_url, args.data_service)
+
+    processes = [start_server("fakes:app", fakes_port, BENCH_DIR, env)]
+    try:
+        wait_until_ready(f"{fakes_url}/health")
+        processes.append(start_server("main:create_app", agent_port, VOICE_AGENT_DIR, env, args.workers, args.agent_log,
+                                      factory=True))
+        # Calls start once the agent has warmed up, as they would behind a readiness probe
+        startup_s = wait_until_ready(f"http://127.0.0.1:{agent_port}/ready")
+
+        url = f"ws://127.0.0.1:{agent_port}/twilio-ws"
+        levels = []
+        for concurrency in (int(level) for level in args.concurrency.split(",")):
+            result = asyncio.run(run_level(url, concurrency, args.calls_per_caller, args.think_time))
+            levels.append(result)
+            first = result["first_token"]
+            print(f"concurrency={concurrency:>4}  turns={result['turns']:>5}  errors={result['errors']:>3}  "
+                  f"first token p50={first.get('p50_ms')}ms p95={first.get('p95_ms')}ms p99={first.get('p99_ms')}ms  "
+                  f"turn p95={result['turn_total'].get('p95_ms')}ms")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    sustainable = [
+        level["concurrency"] for level in levels
+        if not level["errors"] and level["first_token"].get("p95_ms", float("inf")) <= args.slo_ms
+    ]
+    results = {
+        "timestamp": time.time(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": vars(args),
+        "agent_startup_s": round(startup_s, 3),
+        "levels": levels,
+        "sustainable_concurrent_calls": max(sustainable, default=0),
+        "sustainable_calls_per_worker": round(max(sustainable, default=0) / args.workers, 1),
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Sustainable concurrent calls (p95 first token <= {args.slo_ms}ms): "
+          f"{results['sustainable_concurrent_calls']} ({results['sustainable_calls_per_worker']} per worker)")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
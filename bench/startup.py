@@ -0,0 +1,104 @@
+"""
+Startup measurement for the voice agent: how long a new worker takes to import and to pass /ready.
+
+Each round runs, against the local fakes (no network access needed):
+  - `python -X importtime -c "import main"` in voice_agent/, for the total import time
+    and the slowest top-level imports;
+  - a fresh worker (uvicorn main:create_app --factory), timed from spawn to /ready passing,
+    with the per-phase timings the worker reports there.
+
+    python bench/startup.py --rounds 5 --output startup_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+from run import BENCH_DIR, VOICE_AGENT_DIR, agent_env, free_port, start_server, wait_until_ready
+
+# "import time: self [us] | cumulative | imported package", nested imports indented under their importer
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure_imports(env: dict) -> dict:
+    """Total import time of the app module and its slowest top-level imports, in ms."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=VOICE_AGENT_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    top_level = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # One space separates the column from a top-level name; deeper imports are indented further
+        if match and len(match[3]) == 1:
+            top_level[match[4]] = int(match[2]) / 1000
+    slowest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:10]
+    return {"total_ms": round(top_level.get("main", 0.0), 1), "slowest_ms": {name: round(ms, 1) for name, ms in slowest}}
+
+
+def measure_startup(env: dict) -> dict:
+    """Spawn-to-ready time of one fresh worker, plus the phase timings it reports."""
+    port = free_port()
+    started = time.perf_counter()
+    process = start_server("main:create_app", port, VOICE_AGENT_DIR, env, factory=True)
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}/ready")
+        ready_s = time.perf_counter() - started
+        phases = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1.0).json()["startup_seconds"]
+    finally:
+        process.terminate()
+        process.wait()
+    return {"ready_s": round(ready_s, 3), "phases_s": phases}
+
+
+def summarize(values: list) -> dict:
+    return {"median": round(statistics.median(values), 3), "max": round(max(values), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--budget-s", type=float, default=5.0, help="Spawn-to-ready time every round must meet")
+    parser.add_argument("--output", default="startup_results.json")
+    args = parser.parse_args()
+
+    fakes_port = free_port()
+    fakes_url = f"http://127.0.0.1:{fakes_port}"
+    env = agent_env(fakes_url)
+    fakes = start_server("fakes:app", fakes_port, BENCH_DIR, env)
+    rounds = []
+    try:
+        wait_until_ready(f"{fakes_url}/health")
+        for number in range(1, args.rounds + 1):
+            result = {"imports": measure_imports(env), **measure_startup(env)}
+            rounds.append(result)
+            print(f"round {number}: import {result['imports']['total_ms']}ms  ready {result['ready_s']}s  "
+                  f"phases {result['phases_s']}")
+    finally:
+        fakes.terminate()
+        fakes.wait()
+
+    ready = [result["ready_s"] for result in rounds]
+    results = {
+        "timestamp": time.time(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": vars(args),
+        "import_ms": summarize([result["imports"]["total_ms"] for result in rounds]),
+        "ready_s": summarize(ready),
+        "within_budget": max(ready) <= args.budget_s,
+        "rounds": rounds,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Import median {results['import_ms']['median']}ms; ready median {results['ready_s']['median']}s, "
+          f"max {results['ready_s']['max']}s (budget {args.budget_s}s: {'met' if results['within_budget'] else 'MISSED'})")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
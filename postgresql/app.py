@@ -1,17 +1,40 @@
-from fastapi import FastAPI, HTTPException, Request, Query
+from fastapi import FastAPI, HTTPException, Request, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 import traceback
+from contextlib import asynccontextmanager
 
-from server.queries.insurances import get_insurance_details
-from server.queries.appointments import get_available_time_slots
+from server.queries.insurances import find_insurance, list_insurance_providers
+from server.queries.appointments import (
+    get_available_time_slots, get_availability_summary, MAX_SLOTS_PER_REQUEST, MAX_SUMMARY_OPENINGS
+)
+from server.pool import get_pool, check_pool, close_pool
+from server.caches import start_caches, stop_caches
+from server.filler import filler_library, parse_range
+from server import metrics
 
 import os
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    metrics.configure_logs()
+    # Open the pool (min_size connections, statements prepared) before taking traffic
+    pool = await get_pool()
+    metrics.watch_pool(pool)
+    filler_library.load()
+    await start_caches(pool)
+    yield
+    await stop_caches()
+    # Uvicorn has stopped accepting requests by now; let in-flight queries finish
+    await close_pool()
+    metrics.close_logs()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS for frontend dev
 app.add_middleware(
@@ -22,12 +45,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histogram + per-request JSON trace
+app.middleware("http")(metrics.trace_request)
+
 # Root route
 @app.get("/")
 def read_root():
     return {"message": "GoBidRV backend is running 🚐💨"}
 
+# Health check: the database answers through the pool
+@app.get("/health")
+async def health():
+    try:
+        return {"status": "ok", "pool": await check_pool()}
+    except Exception as e:
+        print(f"Health check failed: {e}")
+        raise HTTPException(status_code=503, detail="Database unavailable")
+
+# Prometheus metrics
+@app.get("/metrics")
+def get_metrics():
+    content, content_type = metrics.render_metrics()
+    return Response(content=content, media_type=content_type)
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
+
+
+### Filler audio ###
+
+# GET endpoint listing the filler clips, by family (used by the agent to pick one)
+@app.get("/filler")
+def filler_manifest():
+    return {"families": filler_library.manifest()}
+
+
+# GET endpoint serving a filler clip from memory; clips are addressed by content, so they never change
+@app.get("/filler/{etag}.mp3")
+def filler_clip(etag: str, request: Request):
+    audio = filler_library.clips.get(etag)
+    if audio is None:
+        raise HTTPException(status_code=404, detail="Clip not found")
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if request.headers.get("if-none-match") == f'"{etag}"':
+        return Response(status_code=304, headers=headers)
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = parse_range(range_header, len(audio))
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(audio)}"})
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(audio)}"
+        return Response(content=audio[start:end + 1], status_code=206, media_type="audio/mpeg", headers=headers)
+    return Response(content=audio, media_type="audio/mpeg", headers=headers)
     
     
 ### Insurance ###
@@ -37,10 +110,23 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 async def get_insurance_status(name: str):
     try:
         print(f"Fetching insurance status for: {name}")
-        accepted = await get_insurance_details(name)
-        if accepted is None:
+        insurance = await find_insurance(name)
+        if insurance is None:
             raise HTTPException(status_code=404, detail="Insurance provider not found")
-        return {"name": name, "accepted": accepted}
+        # name is the canonical provider name, which may differ from what was asked for
+        return insurance
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# GET endpoint to list the known insurance providers (used for the agent's function schema)
+@app.get("/insurance_providers")
+async def insurance_providers():
+    try:
+        return {"providers": await list_insurance_providers()}
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -48,16 +134,42 @@ async def get_insurance_status(name: str):
 
 ### Appointments ###
 
-# GET endpoint to fetch available appointment slots between start and end times
+# GET endpoint to fetch available appointment slots between start and end times, one page at a time
 @app.get("/check_appt_slots")
 async def check_appt_slots(
     start_time: datetime = Query(..., description="Start of the time window (ISO 8601 format)"),
-    end_time: datetime = Query(..., description="End of the time window (ISO 8601 format)")
+    end_time: datetime = Query(..., description="End of the time window (ISO 8601 format)"),
+    limit: int = Query(MAX_SLOTS_PER_REQUEST, ge=1, description=f"Page size (at most {MAX_SLOTS_PER_REQUEST})"),
+    offset: int = Query(0, ge=0, description="Number of slots to skip"),
+    provider_id: Optional[int] = Query(None, description="Only this provider's slots"),
+    location_id: Optional[int] = Query(None, description="Only slots at this location")
 ):
     try:
         print(f"Checking available slots from {start_time} to {end_time}")
-        slots = await get_available_time_slots(start_time, end_time)
-        return {"slots": slots}
+        limit = min(limit, MAX_SLOTS_PER_REQUEST)
+        # One extra row tells us whether there is another page
+        slots = await get_available_time_slots(start_time, end_time, limit + 1, offset, provider_id, location_id)
+        next_offset = offset + limit if len(slots) > limit else None
+        return {"slots": slots[:limit], "next_offset": next_offset}
+    except Exception as e:
+        print(f"Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# GET endpoint to summarize availability between start and end times (counts per day/half-day + first openings)
+@app.get("/appt_slots_summary")
+async def appt_slots_summary(
+    start_time: datetime = Query(..., description="Start of the time window (ISO 8601 format)"),
+    end_time: datetime = Query(..., description="End of the time window (ISO 8601 format)"),
+    first_n: int = Query(3, ge=0, description=f"Number of earliest openings to include (at most {MAX_SUMMARY_OPENINGS})"),
+    provider_id: Optional[int] = Query(None, description="Only this provider's slots"),
+    location_id: Optional[int] = Query(None, description="Only slots at this location")
+):
+    try:
+        print(f"Summarizing available slots from {start_time} to {end_time}")
+        return await get_availability_summary(
+            start_time, end_time, min(first_n, MAX_SUMMARY_OPENINGS), provider_id, location_id
+        )
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
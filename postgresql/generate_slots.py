@@ -0,0 +1,121 @@
+"""
+Generate appointment slots from each provider's weekly schedule (schedule_templates), extending every
+provider's calendar to a rolling horizon of --days from today.
+
+Slots are generated set-based inside Postgres (generate_series over days and over each template's slot
+times), one batch of days per transaction. Existing rows are never rewritten: each provider continues from
+the day after its latest slot, and (provider_id, start_time) conflicts are skipped, so it is safe to run
+daily from cron. Per-row change notifications are suppressed during the load; the availability index is
+told to reload once at the end instead.
+
+    python generate_slots.py [--days 90] [--from 2025-01-06] [--provider 3 ...] [--batch-days 31] [--booked-fraction 0]
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+import asyncpg
+from server.pool import DATABASE_URL
+from server.availability import CHANNEL
+
+# Each provider's last generated day, in the time zone of that slot's location (index scan per provider)
+LAST_DAYS = """
+    SELECT p.id AS provider_id, last.day
+    FROM providers p
+    LEFT JOIN LATERAL (
+        SELECT (s.start_time AT TIME ZONE l.timezone)::date AS day
+        FROM appt_slots s
+        JOIN locations l ON l.id = s.location_id
+        WHERE s.provider_id = p.id
+        ORDER BY s.start_time DESC
+        LIMIT 1
+    ) last ON TRUE
+    WHERE $1::int[] IS NULL OR p.id = ANY($1)
+"""
+
+# Template times are local to the location, so the timestamps are built there and converted to TIMESTAMPTZ
+GENERATE_SLOTS = """
+    INSERT INTO appt_slots (provider_id, location_id, start_time, duration_minutes, is_available)
+    SELECT t.provider_id, t.location_id, slot AT TIME ZONE l.timezone, t.slot_minutes, random() >= $5
+    FROM unnest($1::int[], $2::date[]) AS starts (provider_id, from_day)
+    JOIN schedule_templates t ON t.provider_id = starts.provider_id
+    JOIN locations l ON l.id = t.location_id
+    CROSS JOIN LATERAL generate_series(
+        GREATEST($3::date, starts.from_day)::timestamp, $4::date::timestamp, INTERVAL '1 day'
+    ) AS days (day)
+    CROSS JOIN LATERAL generate_series(
+        day + t.start_time,
+        day + t.end_time - make_interval(mins => t.slot_minutes),
+        make_interval(mins => t.slot_minutes)
+    ) AS slots (slot)
+    WHERE EXTRACT(DOW FROM day) = t.weekday
+    ON CONFLICT (provider_id, start_time) DO NOTHING
+"""
+
+
+async def is_partitioned(conn: asyncpg.Connection) -> bool:
+    return await conn.fetchval("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'appt_slots'::regclass)")
+
+
+async def generate(days: int, from_day: date = None, providers: list = None, batch_days: int = 31,
+                   booked_fraction: float = 0.0) -> int:
+    today = date.today()
+    horizon = today + timedelta(days=days)
+    conn = await asyncpg.connect(DATABASE_URL)
+    try:
+        starts = {}
+        for row in await conn.fetch(LAST_DAYS, providers):
+            first = from_day or today
+            if row["day"] is not None and not from_day:
+                first = max(first, row["day"] + timedelta(days=1))
+            if first <= horizon:
+                starts[row["provider_id"]] = first
+        if not starts:
+            print(f"Every provider is already generated through {horizon}")
+            return 0
+
+        partitioned = await is_partitioned(conn)
+        provider_ids, provider_starts = list(starts), list(starts.values())
+        batch_start, inserted = min(provider_starts), 0
+        while batch_start <= horizon:
+            batch_end = min(batch_start + timedelta(days=batch_days - 1), horizon)
+            started = time.perf_counter()
+            async with conn.transaction():
+                # Skip the per-row NOTIFY trigger for this transaction; one RESYNC is sent at the end
+                await conn.execute("SELECT set_config('confido.bulk_load', 'on', true)")
+                if partitioned:
+                    # A day of margin: local days map onto UTC instants on either side of midnight
+                    await conn.execute(
+                        "SELECT create_appt_slots_partitions($1, $2)",
+                        batch_start - timedelta(days=1), batch_end + timedelta(days=1)
+                    )
+                status = await conn.execute(
+                    GENERATE_SLOTS, provider_ids, provider_starts, batch_start, batch_end, booked_fraction
+                )
+            count = int(status.split()[-1])
+            inserted += count
+            print(f"📅 {batch_start} to {batch_end}: {count} slots in {time.perf_counter() - started:.2f}s")
+            batch_start = batch_end + timedelta(days=1)
+
+        if inserted:
+            await conn.execute("ANALYZE appt_slots")
+            await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, json.dumps({"op": "RESYNC"}))
+        print(f"✅ Generated {inserted} slots for {len(starts)} providers through {horizon}")
+        return inserted
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90, help="Horizon: generate through this many days from today")
+    parser.add_argument("--from", dest="from_day", type=date.fromisoformat, default=None,
+                        help="Start here instead of after each provider's latest slot (existing slots are kept)")
+    parser.add_argument("--provider", dest="providers", type=int, action="append", default=None,
+                        help="Only these provider ids (repeatable)")
+    parser.add_argument("--batch-days", type=int, default=31, help="Days generated per transaction")
+    parser.add_argument("--booked-fraction", type=float, default=0.0,
+                        help="Mark this fraction of new slots as booked (sample data)")
+    args = parser.parse_args()
+    asyncio.run(generate(args.days, args.from_day, args.providers, args.batch_days, args.booked_fraction))
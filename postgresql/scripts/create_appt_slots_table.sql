@@ -1,8 +1,13 @@
 -- Drop the table if it already exists
 DROP TABLE IF EXISTS appt_slots;
--- Create the appt_slots table
+-- Create the appt_slots table (after create_providers_tables.sql)
 CREATE TABLE appt_slots (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL PRIMARY KEY,
+    provider_id INTEGER NOT NULL REFERENCES providers (id),
+    location_id INTEGER NOT NULL REFERENCES locations (id),
     start_time TIMESTAMPTZ NOT NULL,
-    is_available BOOLEAN NOT NULL DEFAULT TRUE
-);
\ No newline at end of file
+    duration_minutes SMALLINT NOT NULL DEFAULT 30,
+    is_available BOOLEAN NOT NULL DEFAULT TRUE,
+    -- A provider has one slot at a time; also what lets generate_slots.py extend the horizon idempotently
+    CONSTRAINT appt_slots_provider_start_time_key UNIQUE (provider_id, start_time)
+);
@@ -0,0 +1,20 @@
+-- Call session state shared by the voice agent workers (SESSION_STORE=postgres)
+DROP TABLE IF EXISTS call_turns;
+DROP TABLE IF EXISTS call_sessions;
+-- One row per live call
+CREATE TABLE call_sessions (
+    call_sid TEXT PRIMARY KEY,
+    metadata JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+-- Used by TTL eviction of abandoned calls
+CREATE INDEX call_sessions_updated_at_idx ON call_sessions (updated_at);
+-- One row per conversation message, appended as turns complete
+CREATE TABLE call_turns (
+    call_sid TEXT NOT NULL REFERENCES call_sessions (call_sid) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    message JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (call_sid, seq)
+);
@@ -0,0 +1,9 @@
+-- Background jobs the voice agent couldn't run in-process (queue full or shutting down) (JOB_SPILL=postgres)
+DROP TABLE IF EXISTS job_spill;
+CREATE TABLE job_spill (
+    id BIGSERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    payload JSONB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
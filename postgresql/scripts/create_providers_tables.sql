@@ -0,0 +1,30 @@
+-- Drop the tables if they already exist (appt_slots' foreign keys to them go too)
+DROP TABLE IF EXISTS schedule_templates;
+DROP TABLE IF EXISTS providers CASCADE;
+DROP TABLE IF EXISTS locations CASCADE;
+-- Offices; slot templates are written in the location's local time
+CREATE TABLE locations (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    timezone TEXT NOT NULL DEFAULT 'America/New_York'
+);
+-- Doctors (or rooms, hygienists, ...) that appointments are booked with
+CREATE TABLE providers (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL
+);
+-- Weekly schedule per provider: slots of slot_minutes from start_time until end_time
+-- on every weekday (0 = Sunday, as EXTRACT(DOW)) at that location; read by generate_slots.py
+CREATE TABLE schedule_templates (
+    id SERIAL PRIMARY KEY,
+    provider_id INTEGER NOT NULL REFERENCES providers (id) ON DELETE CASCADE,
+    location_id INTEGER NOT NULL REFERENCES locations (id) ON DELETE CASCADE,
+    weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    slot_minutes SMALLINT NOT NULL DEFAULT 30 CHECK (slot_minutes > 0),
+    CHECK (start_time < end_time)
+);
+-- One template per provider, location, weekday and start time, so seeding it is idempotent (also serves lookups by provider)
+CREATE UNIQUE INDEX schedule_templates_provider_location_weekday_start_key
+    ON schedule_templates (provider_id, location_id, weekday, start_time);
@@ -0,0 +1,36 @@
+-- Partial index for the available-slot range query
+-- (used whenever the in-memory availability index is not loaded)
+CREATE INDEX IF NOT EXISTS appt_slots_available_start_time_idx
+    ON appt_slots (start_time)
+    WHERE is_available;
+
+-- Publish every appt_slots change on the appt_slots_changed channel
+-- so the availability index can be kept current incrementally
+CREATE OR REPLACE FUNCTION notify_appt_slots_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('appt_slots_changed', json_build_object('op', TG_OP)::text);
+        RETURN NULL;
+    END IF;
+
+    PERFORM pg_notify('appt_slots_changed', json_build_object(
+        'op', TG_OP,
+        'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+        'start_us', CASE WHEN TG_OP <> 'DELETE' THEN (EXTRACT(EPOCH FROM NEW.start_time) * 1000000)::BIGINT END,
+        'is_available', CASE WHEN TG_OP <> 'DELETE' THEN NEW.is_available END,
+        'old_start_us', CASE WHEN TG_OP <> 'INSERT' THEN (EXTRACT(EPOCH FROM OLD.start_time) * 1000000)::BIGINT END,
+        'old_is_available', CASE WHEN TG_OP <> 'INSERT' THEN OLD.is_available END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS appt_slots_changed ON appt_slots;
+CREATE TRIGGER appt_slots_changed
+    AFTER INSERT OR UPDATE OR DELETE ON appt_slots
+    FOR EACH ROW EXECUTE FUNCTION notify_appt_slots_changed();
+
+DROP TRIGGER IF EXISTS appt_slots_truncated ON appt_slots;
+CREATE TRIGGER appt_slots_truncated
+    AFTER TRUNCATE ON appt_slots
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_appt_slots_changed();
@@ -0,0 +1,123 @@
+-- Providers, locations and slot durations for appt_slots, so each provider has their own calendar.
+-- Safe to re-run. Run after migrate_appt_slots_availability.sql (it replaces that script's trigger function).
+CREATE TABLE IF NOT EXISTS locations (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    timezone TEXT NOT NULL DEFAULT 'America/New_York'
+);
+CREATE TABLE IF NOT EXISTS providers (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS schedule_templates (
+    id SERIAL PRIMARY KEY,
+    provider_id INTEGER NOT NULL REFERENCES providers (id) ON DELETE CASCADE,
+    location_id INTEGER NOT NULL REFERENCES locations (id) ON DELETE CASCADE,
+    weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    slot_minutes SMALLINT NOT NULL DEFAULT 30 CHECK (slot_minutes > 0),
+    CHECK (start_time < end_time)
+);
+CREATE INDEX IF NOT EXISTS schedule_templates_provider_id_idx ON schedule_templates (provider_id);
+-- One template per provider, location, weekday and start time, so seeding it is idempotent;
+-- duplicates left by earlier seeding are dropped first
+DELETE FROM schedule_templates dup
+USING schedule_templates kept
+WHERE dup.id > kept.id
+  AND (dup.provider_id, dup.location_id, dup.weekday, dup.start_time)
+    = (kept.provider_id, kept.location_id, kept.weekday, kept.start_time);
+CREATE UNIQUE INDEX IF NOT EXISTS schedule_templates_provider_location_weekday_start_key
+    ON schedule_templates (provider_id, location_id, weekday, start_time);
+
+-- Slots created before this migration belong to the original office's single calendar
+INSERT INTO locations (name)
+SELECT 'Main Office' WHERE NOT EXISTS (SELECT 1 FROM locations);
+INSERT INTO providers (name)
+SELECT 'Front Desk' WHERE NOT EXISTS (SELECT 1 FROM providers);
+
+ALTER TABLE appt_slots
+    ADD COLUMN IF NOT EXISTS provider_id INTEGER REFERENCES providers (id),
+    ADD COLUMN IF NOT EXISTS location_id INTEGER REFERENCES locations (id),
+    ADD COLUMN IF NOT EXISTS duration_minutes SMALLINT NOT NULL DEFAULT 30;
+
+UPDATE appt_slots SET provider_id = (SELECT min(id) FROM providers) WHERE provider_id IS NULL;
+UPDATE appt_slots SET location_id = (SELECT min(id) FROM locations) WHERE location_id IS NULL;
+ALTER TABLE appt_slots
+    ALTER COLUMN provider_id SET NOT NULL,
+    ALTER COLUMN location_id SET NOT NULL;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'appt_slots_provider_start_time_key') THEN
+        ALTER TABLE appt_slots
+            ADD CONSTRAINT appt_slots_provider_start_time_key UNIQUE (provider_id, start_time);
+    END IF;
+END $$;
+
+-- Partial indexes over open slots only (booked ones are never searched), one per filter,
+-- each ending in id so ORDER BY start_time, id paging is read straight off the index
+DROP INDEX IF EXISTS appt_slots_available_start_time_idx;
+CREATE INDEX IF NOT EXISTS appt_slots_available_idx
+    ON appt_slots (start_time, id)
+    WHERE is_available;
+CREATE INDEX IF NOT EXISTS appt_slots_available_provider_idx
+    ON appt_slots (provider_id, start_time, id)
+    WHERE is_available;
+CREATE INDEX IF NOT EXISTS appt_slots_available_location_idx
+    ON appt_slots (location_id, start_time, id)
+    WHERE is_available;
+
+-- Same notifications as before, now carrying each row's calendar (provider, location) and duration.
+-- Bulk loads set confido.bulk_load for their transaction to skip per-row notifications;
+-- generate_slots.py sends a single RESYNC instead once the load commits.
+CREATE OR REPLACE FUNCTION notify_appt_slots_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('appt_slots_changed', json_build_object('op', TG_OP)::text);
+        RETURN NULL;
+    END IF;
+
+    IF current_setting('confido.bulk_load', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    PERFORM pg_notify('appt_slots_changed', json_build_object(
+        'op', TG_OP,
+        'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+        'start_us', CASE WHEN TG_OP <> 'DELETE' THEN (EXTRACT(EPOCH FROM NEW.start_time) * 1000000)::BIGINT END,
+        'is_available', CASE WHEN TG_OP <> 'DELETE' THEN NEW.is_available END,
+        'provider_id', CASE WHEN TG_OP <> 'DELETE' THEN NEW.provider_id END,
+        'location_id', CASE WHEN TG_OP <> 'DELETE' THEN NEW.location_id END,
+        'duration_minutes', CASE WHEN TG_OP <> 'DELETE' THEN NEW.duration_minutes END,
+        'old_start_us', CASE WHEN TG_OP <> 'INSERT' THEN (EXTRACT(EPOCH FROM OLD.start_time) * 1000000)::BIGINT END,
+        'old_is_available', CASE WHEN TG_OP <> 'INSERT' THEN OLD.is_available END,
+        'old_provider_id', CASE WHEN TG_OP <> 'INSERT' THEN OLD.provider_id END,
+        'old_location_id', CASE WHEN TG_OP <> 'INSERT' THEN OLD.location_id END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Monthly partitions covering [from_date, to_date], for when appt_slots is partitioned
+-- (see partition_appt_slots.sql); generate_slots.py calls it before loading a new stretch of the horizon
+CREATE OR REPLACE FUNCTION create_appt_slots_partitions(from_date DATE, to_date DATE) RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date);
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= to_date LOOP
+        partition_name := format('appt_slots_%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF appt_slots FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, (month_start + INTERVAL '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,22 @@
+-- Alternate spellings and common mishearings for each provider,
+-- matched by the in-memory insurance catalog
+ALTER TABLE insurance_details
+    ADD COLUMN IF NOT EXISTS aliases TEXT[] NOT NULL DEFAULT '{}';
+
+UPDATE insurance_details SET aliases = ARRAY['Blue Cross', 'Blue Shield', 'BCBS'] WHERE name = 'BlueCross BlueShield';
+UPDATE insurance_details SET aliases = ARRAY['United', 'United Health', 'UHC'] WHERE name = 'UnitedHealthcare';
+UPDATE insurance_details SET aliases = ARRAY['Sigma'] WHERE name = 'Cigna';
+UPDATE insurance_details SET aliases = ARRAY['Kaiser'] WHERE name = 'Kaiser Permanente';
+
+-- Tell the insurance catalog to reload whenever the table changes
+CREATE OR REPLACE FUNCTION notify_insurance_details_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('insurance_details_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS insurance_details_changed ON insurance_details;
+CREATE TRIGGER insurance_details_changed
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON insurance_details
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_insurance_details_changed();
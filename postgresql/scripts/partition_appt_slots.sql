@@ -0,0 +1,63 @@
+-- Optional, for clinics with months of inventory: rebuild appt_slots as a table partitioned by month of start_time,
+-- so range queries only touch the months they cover and old months can be detached or dropped whole.
+-- Run after migrate_appt_slots_providers.sql; takes an exclusive lock on appt_slots while it copies.
+BEGIN;
+
+ALTER TABLE appt_slots RENAME TO appt_slots_unpartitioned;
+-- Free up the index names (constraints included) for the new table
+ALTER TABLE appt_slots_unpartitioned RENAME CONSTRAINT appt_slots_pkey TO appt_slots_unpartitioned_pkey;
+ALTER TABLE appt_slots_unpartitioned RENAME CONSTRAINT appt_slots_provider_start_time_key TO appt_slots_unpartitioned_provider_start_time_key;
+ALTER INDEX appt_slots_available_idx RENAME TO appt_slots_unpartitioned_available_idx;
+ALTER INDEX appt_slots_available_provider_idx RENAME TO appt_slots_unpartitioned_available_provider_idx;
+ALTER INDEX appt_slots_available_location_idx RENAME TO appt_slots_unpartitioned_available_location_idx;
+-- Keep handing out the same ids
+ALTER SEQUENCE appt_slots_id_seq OWNED BY NONE;
+ALTER SEQUENCE appt_slots_id_seq AS BIGINT;
+
+-- The partition key has to be part of every unique constraint, hence (id, start_time)
+CREATE TABLE appt_slots (
+    id BIGINT NOT NULL DEFAULT nextval('appt_slots_id_seq'),
+    provider_id INTEGER NOT NULL REFERENCES providers (id),
+    location_id INTEGER NOT NULL REFERENCES locations (id),
+    start_time TIMESTAMPTZ NOT NULL,
+    duration_minutes SMALLINT NOT NULL DEFAULT 30,
+    is_available BOOLEAN NOT NULL DEFAULT TRUE,
+    PRIMARY KEY (id, start_time),
+    CONSTRAINT appt_slots_provider_start_time_key UNIQUE (provider_id, start_time)
+) PARTITION BY RANGE (start_time);
+ALTER SEQUENCE appt_slots_id_seq OWNED BY appt_slots.id;
+
+-- Rows outside every monthly partition land here instead of failing
+CREATE TABLE appt_slots_default PARTITION OF appt_slots DEFAULT;
+SELECT create_appt_slots_partitions(
+    COALESCE((SELECT min(start_time)::date FROM appt_slots_unpartitioned), CURRENT_DATE),
+    COALESCE((SELECT max(start_time)::date FROM appt_slots_unpartitioned), CURRENT_DATE)
+);
+
+-- No triggers yet, so the copy doesn't notify row by row (the availability index already has these rows)
+INSERT INTO appt_slots (id, provider_id, location_id, start_time, duration_minutes, is_available)
+SELECT id, provider_id, location_id, start_time, duration_minutes, is_available
+FROM appt_slots_unpartitioned;
+DROP TABLE appt_slots_unpartitioned;
+
+CREATE INDEX appt_slots_available_idx
+    ON appt_slots (start_time, id)
+    WHERE is_available;
+CREATE INDEX appt_slots_available_provider_idx
+    ON appt_slots (provider_id, start_time, id)
+    WHERE is_available;
+CREATE INDEX appt_slots_available_location_idx
+    ON appt_slots (location_id, start_time, id)
+    WHERE is_available;
+
+-- Triggers went with the old table
+CREATE TRIGGER appt_slots_changed
+    AFTER INSERT OR UPDATE OR DELETE ON appt_slots
+    FOR EACH ROW EXECUTE FUNCTION notify_appt_slots_changed();
+CREATE TRIGGER appt_slots_truncated
+    AFTER TRUNCATE ON appt_slots
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_appt_slots_changed();
+
+COMMIT;
+
+ANALYZE appt_slots;
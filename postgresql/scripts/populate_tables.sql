@@ -1,25 +1,18 @@
-DO $$
-DECLARE current_date DATE := CURRENT_DATE;
-end_date DATE := CURRENT_DATE + INTERVAL '21 days';
-slot_time TIME;
-day DATE;
-BEGIN FOR day IN
-SELECT generate_series(current_date, end_date, '1 day')::date LOOP -- Skip Sundays (DOW = 0)
-    IF EXTRACT(
-        DOW
-        FROM day
-    ) != 0 THEN slot_time := TIME '08:00';
-WHILE slot_time <= TIME '16:30' LOOP
-INSERT INTO appt_slots (start_time, is_available)
-VALUES (
-        (day + slot_time)::timestamptz,
-        (random() < 0.5)
-    );
-slot_time := slot_time + INTERVAL '30 minutes';
-END LOOP;
-END IF;
-END LOOP;
-END $$;
+-- Sample office: one location and provider, open Monday to Saturday with 30-minute slots from 8 AM
+-- (last slot at 4:30 PM). Slots are generated from these templates by generate_slots.py:
+--     python generate_slots.py --days 21 --booked-fraction 0.5
+-- (skipping whatever migrate_appt_slots_providers.sql already created)
+INSERT INTO locations (name, timezone)
+SELECT 'Main Office', 'America/New_York'
+WHERE NOT EXISTS (SELECT 1 FROM locations WHERE name = 'Main Office');
+INSERT INTO providers (name)
+SELECT 'Front Desk'
+WHERE NOT EXISTS (SELECT 1 FROM providers WHERE name = 'Front Desk');
+INSERT INTO schedule_templates (provider_id, location_id, weekday, start_time, end_time, slot_minutes)
+SELECT providers.id, locations.id, weekday, TIME '08:00', TIME '17:00', 30
+FROM providers, locations, generate_series(1, 6) AS weekday
+WHERE providers.name = 'Front Desk' AND locations.name = 'Main Office'
+ON CONFLICT (provider_id, location_id, weekday, start_time) DO NOTHING;
 -- -- Populate insurance_details with sample values
 -- INSERT INTO insurance_details (name, accepted)
 -- VALUES ('BlueCross BlueShield', TRUE),
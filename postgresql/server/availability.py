@@ -0,0 +1,256 @@
+import asyncio
+import heapq
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from server.notifications import listener
+
+AVAILABILITY_INDEX_ENABLED = os.getenv("AVAILABILITY_INDEX", "true").lower() == "true"
+AVAILABILITY_RESYNC_SECONDS = float(os.getenv("AVAILABILITY_RESYNC_SECONDS", "300"))
+# Rows fetched per round trip while loading a snapshot
+SNAPSHOT_BATCH_SIZE = int(os.getenv("AVAILABILITY_SNAPSHOT_BATCH_SIZE", "50000"))
+# Availability summaries bucket slots by day and half-day in the office's local time
+OFFICE_TIMEZONE = os.getenv("OFFICE_TIMEZONE", "America/New_York")
+
+# Channel and trigger created by scripts/migrate_appt_slots_availability.sql
+# (payload extended with provider, location and duration by scripts/migrate_appt_slots_providers.sql)
+CHANNEL = "appt_slots_changed"
+TRIGGER = "appt_slots_changed"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_US = timedelta(microseconds=1)
+
+
+def to_us(dt: datetime) -> int:
+    # Naive datetimes are read as local time, the same way asyncpg encodes them for TIMESTAMPTZ
+    if dt.tzinfo is None:
+        dt = dt.astimezone(timezone.utc)
+    return (dt - EPOCH) // ONE_US
+
+
+def from_us(us: int) -> datetime:
+    return EPOCH + us * ONE_US
+
+
+class ProviderCalendar:
+    """
+    Open slots of one provider at one location.
+    Parallel arrays of 64-bit ints (start time in epoch microseconds, slot id) plus slot durations, sorted by (start, id),
+    so a time-window query is two binary searches plus a slice.
+    """
+
+    def __init__(self, provider_id: int, location_id: int):
+        self.provider_id = provider_id
+        self.location_id = location_id
+        self.starts = array("q")
+        self.ids = array("q")
+        self.durations = array("h")
+
+    def __len__(self):
+        return len(self.starts)
+
+    def window(self, start_us: int, end_us: int, inclusive: bool = True) -> range:
+        """Positions of the slots starting in [start_us, end_us] ([start_us, end_us) if not inclusive)."""
+        end = bisect_right(self.starts, end_us) if inclusive else bisect_left(self.starts, end_us)
+        return range(bisect_left(self.starts, start_us), end)
+
+    def entries(self, start_us: int, end_us: int):
+        """(start, id, calendar, position) for each slot in [start_us, end_us], in order; what range() merges on."""
+        for i in self.window(start_us, end_us):
+            yield self.starts[i], self.ids[i], self, i
+
+    def slot(self, i: int) -> dict:
+        return {
+            "id": self.ids[i],
+            "start_time": from_us(self.starts[i]),
+            "provider_id": self.provider_id,
+            "location_id": self.location_id,
+            "duration_minutes": self.durations[i],
+        }
+
+    def append(self, start_us: int, slot_id: int, duration: int):
+        """Add a slot known to sort after every slot already here (snapshot loading)."""
+        self.starts.append(start_us)
+        self.ids.append(slot_id)
+        self.durations.append(duration)
+
+    def insert(self, start_us: int, slot_id: int, duration: int):
+        i, found = self._find(start_us, slot_id)
+        if not found:
+            self.starts.insert(i, start_us)
+            self.ids.insert(i, slot_id)
+            self.durations.insert(i, duration)
+
+    def remove(self, start_us: int, slot_id: int):
+        i, found = self._find(start_us, slot_id)
+        if found:
+            del self.starts[i]
+            del self.ids[i]
+            del self.durations[i]
+
+    def _find(self, start_us: int, slot_id: int):
+        i = bisect_left(self.starts, start_us)
+        while i < len(self.starts) and self.starts[i] == start_us:
+            if self.ids[i] == slot_id:
+                return i, True
+            if self.ids[i] > slot_id:
+                break
+            i += 1
+        return i, False
+
+
+class AvailabilityIndex:
+    """
+    In-memory index of available appointment slots: one ProviderCalendar per (provider, location).
+    Filtered queries only touch the matching calendars; unfiltered ones merge them in (start, id) order.
+    """
+
+    def __init__(self):
+        self.calendars = {}  # (provider_id, location_id) -> ProviderCalendar
+        self.ready = False
+        self.resync_requested = asyncio.Event()
+        # Changes seen while a snapshot is loading, replayed on top of it
+        self._pending = None
+
+    def __len__(self):
+        return sum(len(calendar) for calendar in self.calendars.values())
+
+    async def load(self, pool):
+        """Replace the index with a fresh snapshot of the available slots."""
+        self._pending = []
+        try:
+            calendars = {}
+            async with pool.acquire() as conn:
+                # Streamed in batches (a cursor needs a transaction) so millions of slots don't sit in memory as records
+                async with conn.transaction(readonly=True):
+                    cursor = conn.cursor(
+                        """
+                        SELECT id, start_time, provider_id, location_id, duration_minutes
+                        FROM appt_slots
+                        WHERE is_available = TRUE
+                        ORDER BY provider_id ASC, location_id ASC, start_time ASC, id ASC
+                        """,
+                        prefetch=SNAPSHOT_BATCH_SIZE
+                    )
+                    async for row in cursor:
+                        key = (row["provider_id"], row["location_id"])
+                        if key not in calendars:
+                            calendars[key] = ProviderCalendar(*key)
+                        calendars[key].append(to_us(row["start_time"]), row["id"], row["duration_minutes"])
+            self.calendars = calendars
+            for change in self._pending:
+                self.apply(change)
+            self.ready = True
+        finally:
+            self._pending = None
+
+    def on_notify(self, payload: str):
+        change = json.loads(payload)
+        if change["op"] == "TRUNCATE":
+            self.calendars = {}
+            self.resync_requested.set()
+            return
+        if change["op"] == "RESYNC":
+            # Sent after a bulk load that bypassed the row trigger: serve from the database until reloaded
+            self.ready = False
+            self.resync_requested.set()
+            return
+        if self._pending is not None:
+            self._pending.append(change)
+        self.apply(change)
+
+    def on_disconnect(self):
+        # We may have missed changes; serve from the database until a resync succeeds
+        self.ready = False
+        self.resync_requested.set()
+
+    def apply(self, change: dict):
+        """Apply one row change from the trigger. Idempotent, so replaying over a snapshot is safe."""
+        if change.get("old_is_available"):
+            calendar = self.calendars.get((change["old_provider_id"], change["old_location_id"]))
+            if calendar is not None:
+                calendar.remove(change["old_start_us"], change["id"])
+        if change.get("is_available"):
+            key = (change["provider_id"], change["location_id"])
+            if key not in self.calendars:
+                self.calendars[key] = ProviderCalendar(*key)
+            self.calendars[key].insert(change["start_us"], change["id"], change["duration_minutes"])
+
+    def range(self, start_time: datetime, end_time: datetime, limit: int = None, offset: int = 0,
+              provider_id: int = None, location_id: int = None) -> list:
+        start_us, end_us = to_us(start_time), to_us(end_time)
+        calendars = self._matching(provider_id, location_id)
+        if len(calendars) == 1:
+            calendar = calendars[0]
+            positions = calendar.window(start_us, end_us)
+            stop = None if limit is None else offset + limit
+            return [calendar.slot(i) for i in positions[offset:stop]]
+
+        # Lazily merge the calendars' windows; only the first offset + limit slots are ever compared
+        merged = heapq.merge(*(calendar.entries(start_us, end_us) for calendar in calendars))
+        stop = None if limit is None else offset + limit
+        return [calendar.slot(i) for _, _, calendar, i in islice(merged, offset, stop)]
+
+    def count(self, start_time: datetime, end_time: datetime, provider_id: int = None, location_id: int = None) -> int:
+        """Number of open slots in [start_time, end_time)."""
+        start_us, end_us = to_us(start_time), to_us(end_time)
+        return sum(
+            len(calendar.window(start_us, end_us, inclusive=False))
+            for calendar in self._matching(provider_id, location_id)
+        )
+
+    def _matching(self, provider_id: int = None, location_id: int = None) -> list:
+        return [
+            calendar for (provider, location), calendar in self.calendars.items()
+            if (provider_id is None or provider == provider_id) and (location_id is None or location == location_id)
+        ]
+
+
+availability_index = AvailabilityIndex()
+_resync_task: asyncio.Task = None
+
+
+async def start_availability_index(pool):
+    """Load the index, subscribe to appt_slots changes and start the periodic resync."""
+    global _resync_task
+    async with pool.acquire() as conn:
+        has_trigger = await conn.fetchval("SELECT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = $1)", TRIGGER)
+    if not has_trigger:
+        print(f"Trigger '{TRIGGER}' not found; run scripts/migrate_appt_slots_availability.sql. Availability index disabled.")
+        return
+
+    # Listen before taking the snapshot so no change falls in between
+    await listener.subscribe(CHANNEL, availability_index.on_notify)
+    listener.on_disconnect(availability_index.on_disconnect)
+    await listener.start()
+    await availability_index.load(pool)
+    print(f"Availability index loaded with {len(availability_index)} open slots")
+    _resync_task = asyncio.create_task(_resync_loop(pool))
+
+
+async def stop_availability_index():
+    global _resync_task
+    availability_index.ready = False
+    if _resync_task is not None:
+        _resync_task.cancel()
+        _resync_task = None
+
+
+async def _resync_loop(pool):
+    """Full reload every AVAILABILITY_RESYNC_SECONDS, or sooner when a change can't be applied incrementally."""
+    while True:
+        try:
+            await asyncio.wait_for(availability_index.resync_requested.wait(), AVAILABILITY_RESYNC_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        availability_index.resync_requested.clear()
+        try:
+            await listener.start()
+            await availability_index.load(pool)
+        except Exception as e:
+            print(f"Availability index resync failed: {e}")
+            await asyncio.sleep(1)
+            availability_index.resync_requested.set()
@@ -0,0 +1,17 @@
+from server.notifications import listener
+from server.availability import AVAILABILITY_INDEX_ENABLED, start_availability_index, stop_availability_index
+from server.insurance_catalog import start_insurance_catalog, stop_insurance_catalog
+
+
+async def start_caches(pool):
+    """Load the in-memory caches and start listening for changes to their tables."""
+    await start_insurance_catalog(pool)
+    if AVAILABILITY_INDEX_ENABLED:
+        await start_availability_index(pool)
+    await listener.start()
+
+
+async def stop_caches():
+    await stop_insurance_catalog()
+    await stop_availability_index()
+    await listener.stop()
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+import re
+
+FILLER_DIR = os.getenv("FILLER_DIR", "static")
+# Written by split_typing_audio.py; without it, clips are discovered by their "<family>-<n>.mp3" names
+MANIFEST_FILE = "filler_manifest.json"
+CLIP_NAME = re.compile(r"^(?P<family>.+)-(?P<index>\d+)\.mp3$")
+
+
+class FillerLibrary:
+    """
+    Filler clips (keyboard typing, ...) held in memory and addressed by content hash,
+    so they can be served with ETags and cached by clients forever.
+    """
+
+    def __init__(self, directory: str = FILLER_DIR):
+        self.directory = directory
+        self.clips = {}     # etag -> bytes
+        self.families = {}  # family -> [{"etag", "duration_ms"}], in clip order
+
+    def load(self):
+        manifest = self._read_manifest()
+        clips, families = {}, {}
+        for family, entries in manifest.items():
+            for entry in entries:
+                with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+                    audio = f.read()
+                etag = hashlib.sha256(audio).hexdigest()[:32]
+                clips[etag] = audio
+                families.setdefault(family, []).append({"etag": etag, "duration_ms": entry.get("duration_ms")})
+        self.clips, self.families = clips, families
+        print(f"Filler library loaded: {', '.join(f'{name} ({len(entries)})' for name, entries in families.items()) or 'empty'}")
+
+    def manifest(self) -> dict:
+        """What the agent needs to pick a clip: per family, each clip's URL path and duration."""
+        return {
+            family: [{"path": f"/filler/{clip['etag']}.mp3", "duration_ms": clip["duration_ms"]} for clip in entries]
+            for family, entries in self.families.items()
+        }
+
+    def _read_manifest(self) -> dict:
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)["clips"]
+        found = {}
+        for name in os.listdir(self.directory):
+            match = CLIP_NAME.match(name)
+            if match:
+                found.setdefault(match["family"], []).append((int(match["index"]), name))
+        return {
+            family: [{"file": name, "duration_ms": None} for _, name in sorted(entries)]
+            for family, entries in found.items()
+        }
+
+
+def parse_range(header: str, size: int):
+    """(start, end) inclusive for a single "bytes=" range, or None if it can't be satisfied."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+    if not match or match[1] == match[2] == "":
+        return None
+    if match[1] == "":
+        start, end = max(size - int(match[2]), 0), size - 1
+    else:
+        start = int(match[1])
+        end = min(int(match[2]), size - 1) if match[2] else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+filler_library = FillerLibrary()
@@ -0,0 +1,173 @@
+import asyncio
+import re
+from typing import Optional
+import asyncpg
+from server.notifications import listener
+
+# Channel and trigger created by scripts/migrate_insurance_catalog.sql
+CHANNEL = "insurance_details_changed"
+
+# Words callers add around a provider name that don't help identify it
+FILLER_WORDS = {"insurance", "insurer", "the", "plan", "plans", "coverage", "company", "my", "i", "have", "do", "you", "take", "accept"}
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and filler words, and squash spaces ("Blue Cross" == "BlueCross")."""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return "".join(word for word in words if word not in FILLER_WORDS)
+
+
+def phonetic_key(text: str) -> str:
+    """
+    Soundex-style key that survives ASR mix-ups between similar-sounding names.
+    The leading letter is spelled out phonetically first, so "Sigma" and "Cigna" share a key.
+    """
+    word = normalize(text)
+    if not word:
+        return ""
+    word = re.sub(r"^ph", "f", word)
+    word = re.sub(r"^[kg]n", "n", word)
+    word = re.sub(r"^wr", "r", word)
+    word = re.sub(r"^c(?=[eiy])", "s", word)
+    word = re.sub(r"^[cq]", "k", word)
+
+    key = word[0]
+    last = SOUNDEX_CODES.get(word[0], "")
+    for ch in word[1:]:
+        code = SOUNDEX_CODES.get(ch, "")
+        if code and code != last:
+            key += code
+        if ch not in "hw":
+            last = code
+    return key[:8]
+
+
+def edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class InsuranceCatalog:
+    """
+    In-memory copy of insurance_details with forgiving name lookup.
+    Matches, in order: exact name or alias, a known name inside a longer phrase,
+    small edit distance, then a shared phonetic key.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.by_key = {}
+        self.by_phonetic = {}
+        self.ready = False
+        self.reconnect_requested = asyncio.Event()
+
+    @property
+    def names(self) -> list:
+        return [entry["name"] for entry in self.entries]
+
+    async def load(self, pool):
+        async with pool.acquire() as conn:
+            try:
+                rows = await conn.fetch("SELECT name, accepted, aliases FROM insurance_details ORDER BY id ASC")
+            except asyncpg.UndefinedColumnError:
+                print("insurance_details has no aliases column; run scripts/migrate_insurance_catalog.sql. Matching on names only.")
+                rows = await conn.fetch("SELECT name, accepted, '{}'::text[] AS aliases FROM insurance_details ORDER BY id ASC")
+        entries = [{"name": row["name"], "accepted": row["accepted"], "aliases": list(row["aliases"])} for row in rows]
+
+        by_key, by_phonetic = {}, {}
+        for entry in entries:
+            for spelling in [entry["name"], *entry["aliases"]]:
+                by_key.setdefault(normalize(spelling), entry)
+                by_phonetic.setdefault(phonetic_key(spelling), []).append(entry)
+
+        self.entries, self.by_key, self.by_phonetic = entries, by_key, by_phonetic
+        self.ready = True
+
+    def on_disconnect(self):
+        # Changes made while the listener was down were missed; reconnect and reload everything
+        self.reconnect_requested.set()
+
+    def lookup(self, name: str) -> Optional[dict]:
+        key = normalize(name)
+        if not key:
+            return None
+        if key in self.by_key:
+            return self.by_key[key]
+
+        # "aetna ppo", "blue cross of illinois"
+        contained = [entry for known, entry in self.by_key.items() if len(known) >= 4 and known in key]
+        if len({entry["name"] for entry in contained}) == 1:
+            return contained[0]
+
+        best, best_distance = None, None
+        for known, entry in self.by_key.items():
+            distance = edit_distance(key, known)
+            if distance <= max(1, len(known) // 4) and (best_distance is None or distance < best_distance):
+                best, best_distance = entry, distance
+        if best is not None:
+            return best
+
+        candidates = self.by_phonetic.get(phonetic_key(name), [])
+        if len({entry["name"] for entry in candidates}) == 1:
+            return candidates[0]
+        return None
+
+
+insurance_catalog = InsuranceCatalog()
+_reconnect_task: asyncio.Task = None
+
+
+async def start_insurance_catalog(pool):
+    """Load the catalog, reload it whenever insurance_details changes and reconnect if the listener drops."""
+    global _reconnect_task
+
+    def reload(payload):
+        task = asyncio.create_task(insurance_catalog.load(pool))
+        task.add_done_callback(_log_reload_error)
+
+    await insurance_catalog.load(pool)
+    await listener.subscribe(CHANNEL, reload)
+    listener.on_disconnect(insurance_catalog.on_disconnect)
+    print(f"Insurance catalog loaded with {len(insurance_catalog.entries)} providers")
+    _reconnect_task = asyncio.create_task(_reconnect_loop(pool))
+
+
+async def stop_insurance_catalog():
+    global _reconnect_task
+    if _reconnect_task is not None:
+        _reconnect_task.cancel()
+        _reconnect_task = None
+
+
+async def _reconnect_loop(pool):
+    """After the listener connection drops, reconnect it and reload the full catalog, retrying until both succeed."""
+    while True:
+        await insurance_catalog.reconnect_requested.wait()
+        insurance_catalog.reconnect_requested.clear()
+        try:
+            await listener.start()
+            await insurance_catalog.load(pool)
+            print(f"Insurance catalog reloaded after reconnect with {len(insurance_catalog.entries)} providers")
+        except Exception as e:
+            print(f"Insurance catalog reconnect failed: {e}")
+            await asyncio.sleep(1)
+            insurance_catalog.reconnect_requested.set()
+
+
+def _log_reload_error(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        print(f"Insurance catalog reload failed: {task.exception()}")
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from server.pool import DB_ACQUIRE_TIMEOUT
+
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "traces.jsonl")
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "data_service_request_seconds", "HTTP request latency", ["path", "status"], buckets=LATENCY_BUCKETS
+)
+DB_ACQUIRE_SECONDS = Histogram(
+    "db_pool_acquire_seconds", "Time waiting for a pool connection", ["query"], buckets=LATENCY_BUCKETS
+)
+DB_ACQUIRE_TIMEOUTS = Counter(
+    "db_pool_acquire_timeouts_total", "Requests that gave up waiting for a pool connection", ["query"]
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pool connections by state", ["state"]
+)
+DB_EXECUTE_SECONDS = Histogram(
+    "db_execute_seconds", "Time executing a query on an acquired connection", ["query"], buckets=LATENCY_BUCKETS
+)
+QUERY_SOURCE = Counter(
+    "data_service_query_source_total", "Where lookups were answered from (memory or database)", ["query", "source"]
+)
+
+# Spans of the request being handled, written to the trace log by the request middleware
+current_spans: ContextVar = ContextVar("current_spans", default=None)
+
+trace_logger = logging.getLogger("data_service.trace")
+trace_logger.propagate = False
+
+
+def configure_logs(trace_log_path: str = TRACE_LOG_PATH):
+    """Open the JSON-lines trace log (called from the app lifespan, so importing this module writes nothing)."""
+    if trace_log_path and not trace_logger.handlers:
+        handler = logging.FileHandler(trace_log_path)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_logger.addHandler(handler)
+        trace_logger.setLevel(logging.INFO)
+
+
+def close_logs():
+    for handler in list(trace_logger.handlers):
+        trace_logger.removeHandler(handler)
+        handler.close()
+
+
+def _record(histogram: Histogram, span: str, query: str, seconds: float):
+    histogram.labels(query).observe(seconds)
+    spans = current_spans.get()
+    if spans is not None:
+        spans.append({"span": span, "name": query, "duration_ms": round(seconds * 1000, 3)})
+
+
+@asynccontextmanager
+async def acquire(pool, query: str):
+    """pool.acquire() that records how long we waited for the connection, giving up after DB_ACQUIRE_TIMEOUT."""
+    start = time.perf_counter()
+    try:
+        conn = await pool.acquire(timeout=DB_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        DB_ACQUIRE_TIMEOUTS.labels(query).inc()
+        _record(DB_ACQUIRE_SECONDS, "db_acquire", query, time.perf_counter() - start)
+        raise
+    _record(DB_ACQUIRE_SECONDS, "db_acquire", query, time.perf_counter() - start)
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+
+def watch_pool(pool):
+    """Report the pool's open and idle connection counts on every scrape."""
+    DB_POOL_CONNECTIONS.labels("idle").set_function(pool.get_idle_size)
+    DB_POOL_CONNECTIONS.labels("in_use").set_function(lambda: pool.get_size() - pool.get_idle_size())
+
+
+@contextmanager
+def execute(query: str):
+    """Time a query's execution on an already acquired connection."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(DB_EXECUTE_SECONDS, "db_execute", query, time.perf_counter() - start)
+
+
+def answered_from(query: str, source: str):
+    QUERY_SOURCE.labels(query, source).inc()
+
+
+async def trace_request(request, call_next):
+    """HTTP middleware: request latency histogram plus one JSON trace line per request, tagged with the caller's callSid."""
+    spans = []
+    token = current_spans.set(spans)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        seconds = time.perf_counter() - start
+        current_spans.reset(token)
+        # Label by route template ("/slots/{id}"), never the raw path, so the label set stays bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(route.path if route is not None else "unmatched", str(status)).observe(seconds)
+        trace_logger.info(json.dumps({
+            "callSid": request.headers.get("x-call-sid"),
+            "path": request.url.path,
+            "status": status,
+            "total_ms": round(seconds * 1000, 3),
+            "spans": spans,
+        }))
+
+
+def render_metrics():
+    """Prometheus text exposition of every metric in this process."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,63 @@
+import asyncio
+import asyncpg
+from server.pool import DATABASE_URL
+
+
+class NotificationListener:
+    """
+    Holds one dedicated connection (outside the pool) for Postgres LISTEN/NOTIFY
+    and dispatches each channel's payloads to its subscribed handler.
+    """
+
+    def __init__(self):
+        self.conn: asyncpg.Connection = None
+        self.handlers = {}
+        self.disconnect_handlers = []
+        # Several caches may try to reconnect after the same drop; only one connection is opened
+        self.starting = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self.conn is not None and not self.conn.is_closed()
+
+    async def subscribe(self, channel: str, handler):
+        self.handlers[channel] = handler
+        if self.connected:
+            await self.conn.add_listener(channel, self._dispatch)
+
+    def on_disconnect(self, handler):
+        if handler not in self.disconnect_handlers:
+            self.disconnect_handlers.append(handler)
+
+    async def start(self):
+        async with self.starting:
+            if self.connected:
+                return
+            conn = await asyncpg.connect(DATABASE_URL)
+            conn.add_termination_listener(self._terminated)
+            for channel in list(self.handlers):
+                await conn.add_listener(channel, self._dispatch)
+            self.conn = conn
+
+    async def stop(self):
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            await conn.close()
+
+    def _dispatch(self, conn, pid, channel, payload):
+        try:
+            self.handlers[channel](payload)
+        except Exception as e:
+            print(f"Error handling notification on {channel}: {e}")
+
+    def _terminated(self, conn):
+        # Only an unexpected drop counts; stop() clears self.conn before closing
+        if conn is not self.conn:
+            return
+        print("Notification listener connection lost")
+        self.conn = None
+        for handler in self.disconnect_handlers:
+            handler()
+
+
+listener = NotificationListener()
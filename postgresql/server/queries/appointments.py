@@ -1,21 +1,125 @@
+import os
+from itertools import product
 from typing import List
-from datetime import datetime
-from server.pool import get_pool
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from server.pool import get_pool, prepare
+from server.availability import availability_index, OFFICE_TIMEZONE, ONE_US
+from server import metrics
 
-# 🔍 Get available appointment slots within a time range
-async def get_available_time_slots(start_time: datetime, end_time: datetime) -> List[dict]:
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT id, start_time
-            FROM appt_slots
-            WHERE is_available = TRUE
-              AND start_time >= $1
-              AND start_time <= $2
-            ORDER BY start_time ASC
-            """,
-            start_time,
-            end_time
+# Result caps for the appointment endpoints (callers page through anything longer)
+MAX_SLOTS_PER_REQUEST = int(os.getenv("MAX_SLOTS_PER_REQUEST", "100"))
+MAX_SUMMARY_OPENINGS = int(os.getenv("MAX_SUMMARY_OPENINGS", "10"))
+
+FILTERS = ("provider_id", "location_id")
+
+
+def _prepare_filtered(name: str, sql: str, first_param: int) -> dict:
+    """
+    Prepare one variant of a slot query per combination of FILTERS, so each gets a plan on its own partial index
+    (a generic plan for "$n IS NULL OR provider_id = $n" can't use one). sql's {filters} takes the extra conditions,
+    numbered from first_param. Returns {filters used: statement name}.
+    """
+    variants = {}
+    for used in product((False, True), repeat=len(FILTERS)):
+        columns = tuple(column for column, on in zip(FILTERS, used) if on)
+        conditions = "".join(
+            f"\n      AND {column} = ${first_param + i}" for i, column in enumerate(columns)
         )
+        suffix = "".join(f"_by_{column[:-3]}" for column in columns)
+        variants[columns] = prepare(f"{name}{suffix}", sql.format(filters=conditions))
+    return variants
+
+
+def _filtered(variants: dict, provider_id: int = None, location_id: int = None):
+    """The statement for the filters given, and the filter values to append to its arguments."""
+    given = {"provider_id": provider_id, "location_id": location_id}
+    columns = tuple(column for column in FILTERS if given[column] is not None)
+    return variants[columns], [given[column] for column in columns]
+
+
+# Prepared on every pool connection
+SLOTS_IN_RANGE = _prepare_filtered("slots_in_range", """
+    SELECT id, start_time, provider_id, location_id, duration_minutes
+    FROM appt_slots
+    WHERE is_available = TRUE
+      AND start_time >= $1
+      AND start_time <= $2{filters}
+    ORDER BY start_time ASC, id ASC
+    LIMIT $3 OFFSET $4
+""", first_param=5)
+SLOT_COUNTS_BY_DAY = _prepare_filtered("slot_counts_by_day", """
+    SELECT (start_time AT TIME ZONE $3)::date AS day,
+           count(*) FILTER (WHERE (start_time AT TIME ZONE $3)::time < '12:00') AS morning,
+           count(*) FILTER (WHERE (start_time AT TIME ZONE $3)::time >= '12:00') AS afternoon
+    FROM appt_slots
+    WHERE is_available = TRUE
+      AND start_time >= $1
+      AND start_time <= $2{filters}
+    GROUP BY day
+    ORDER BY day ASC
+""", first_param=4)
+
+# 🔍 Get available appointment slots within a time range (one page of them when limit is given),
+# optionally for one provider and/or location
+async def get_available_time_slots(start_time: datetime, end_time: datetime, limit: int = None, offset: int = 0,
+                                   provider_id: int = None, location_id: int = None) -> List[dict]:
+    # Served from memory when the availability index is loaded and current
+    if availability_index.ready:
+        metrics.answered_from("get_available_time_slots", "memory")
+        return availability_index.range(start_time, end_time, limit, offset, provider_id, location_id)
+
+    metrics.answered_from("get_available_time_slots", "database")
+    statement, filters = _filtered(SLOTS_IN_RANGE, provider_id, location_id)
+    pool = await get_pool()
+    async with metrics.acquire(pool, "get_available_time_slots") as conn:
+        with metrics.execute("get_available_time_slots"):
+            rows = await conn.statements[statement].fetch(start_time, end_time, limit, offset, *filters)
         return [dict(row) for row in rows]
+
+# 📊 Summarize availability within a time range: open slots per day and half-day, plus the first few openings
+async def get_availability_summary(start_time: datetime, end_time: datetime, first_n: int = 3,
+                                   provider_id: int = None, location_id: int = None) -> dict:
+    if availability_index.ready:
+        metrics.answered_from("get_availability_summary", "memory")
+        days = []
+        for day, midnight, noon, next_midnight in _half_days(start_time, end_time):
+            morning = availability_index.count(midnight, noon, provider_id, location_id)
+            afternoon = availability_index.count(noon, next_midnight, provider_id, location_id)
+            if morning or afternoon:
+                days.append({"date": day.isoformat(), "morning": morning, "afternoon": afternoon})
+        openings = availability_index.range(start_time, end_time, first_n, 0, provider_id, location_id)
+        return _summary(days, openings)
+
+    metrics.answered_from("get_availability_summary", "database")
+    counts, filters = _filtered(SLOT_COUNTS_BY_DAY, provider_id, location_id)
+    first, _ = _filtered(SLOTS_IN_RANGE, provider_id, location_id)
+    pool = await get_pool()
+    async with metrics.acquire(pool, "get_availability_summary") as conn:
+        with metrics.execute("get_availability_summary"):
+            rows = await conn.statements[counts].fetch(start_time, end_time, OFFICE_TIMEZONE, *filters)
+            openings = await conn.statements[first].fetch(start_time, end_time, first_n, 0, *filters)
+        days = [{"date": row["day"].isoformat(), "morning": row["morning"], "afternoon": row["afternoon"]} for row in rows]
+        return _summary(days, [dict(row) for row in openings])
+
+
+def _summary(days: list, openings: list) -> dict:
+    return {
+        "total": sum(day["morning"] + day["afternoon"] for day in days),
+        "days": days,
+        "openings": openings
+    }
+
+
+def _half_days(start_time: datetime, end_time: datetime):
+    """Yield (date, midnight, noon, next midnight) for each office-local day in the window, clipped to it."""
+    tz = ZoneInfo(OFFICE_TIMEZONE)
+    start = start_time.astimezone(tz)
+    # Buckets are half-open; the window's end is inclusive
+    end = end_time.astimezone(tz) + ONE_US
+    day = start.date()
+    while datetime.combine(day, time(), tz) < end:
+        bounds = [datetime.combine(day, time(), tz), datetime.combine(day, time(12), tz),
+                  datetime.combine(day + timedelta(days=1), time(), tz)]
+        yield (day, *(min(max(bound, start), end) for bound in bounds))
+        day += timedelta(days=1)
@@ -1,12 +1,38 @@
-from typing import Optional
-from server.pool import get_pool
+from typing import List, Optional
+from server.pool import get_pool, prepare
+from server.insurance_catalog import insurance_catalog
+from server import metrics
+
+# Prepared on every pool connection
+INSURANCE_BY_NAME = prepare("insurance_by_name", "SELECT name, accepted FROM insurance_details WHERE name = $1 LIMIT 1")
+INSURANCE_NAMES = prepare("insurance_names", "SELECT name FROM insurance_details ORDER BY id ASC")
+
+# 🔍 Find an insurance provider by (possibly misheard) name
+async def find_insurance(name: str) -> Optional[dict]:
+    if insurance_catalog.ready:
+        metrics.answered_from("find_insurance", "memory")
+        entry = insurance_catalog.lookup(name)
+        return {"name": entry["name"], "accepted": entry["accepted"]} if entry else None
+
+    metrics.answered_from("find_insurance", "database")
+    pool = await get_pool()
+    async with metrics.acquire(pool, "find_insurance") as conn:
+        with metrics.execute("find_insurance"):
+            row = await conn.statements[INSURANCE_BY_NAME].fetchrow(name)
+        return dict(row) if row else None
 
 # 🔍 Get insurance acceptance status by name
 async def get_insurance_details(name: str) -> Optional[bool]:
+    insurance = await find_insurance(name)
+    return insurance["accepted"] if insurance else None
+
+# 📋 List the names of all known insurance providers
+async def list_insurance_providers() -> List[str]:
+    if insurance_catalog.ready:
+        return insurance_catalog.names
+
     pool = await get_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            'SELECT accepted FROM insurance_details WHERE name = $1 LIMIT 1',
-            name
-        )
-        return row["accepted"] if row else None
+    async with metrics.acquire(pool, "list_insurance_providers") as conn:
+        with metrics.execute("list_insurance_providers"):
+            rows = await conn.statements[INSURANCE_NAMES].fetch()
+        return [row["name"] for row in rows]
@@ -1,26 +1,91 @@
-from pydub import AudioSegment
-import math
+"""
+Build step for the filler-audio clips served by /filler: splits each source recording into fixed-length
+chunks ("static/keyboard-typing.mp3" -> "static/keyboard-typing-1.mp3", ...) and writes the manifest
+the service loads at startup.
+
+Sources are split in parallel. A source whose content and chunk length haven't changed since the last
+build is skipped, and chunk files are only rewritten when their bytes differ, so re-running is cheap and
+leaves unchanged clips (and their ETags) alone.
+
+    python split_typing_audio.py [static/keyboard-typing.mp3 ...] [--chunk-ms 1500] [--out static]
+"""
+import argparse
+import hashlib
+import io
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from server.filler import MANIFEST_FILE
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def split_source(source: str, chunk_ms: int, out_dir: str) -> list:
+    """Export the source's full chunks, writing only files whose content changed. Returns the clip entries."""
+    # Imported here so the manifest-only path (nothing changed) doesn't need pydub/ffmpeg
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_mp3(source)
+    family = os.path.splitext(os.path.basename(source))[0]
+    clips = []
+    # Total number of full chunks
+    for i in range(len(audio) // chunk_ms):
+        start = i * chunk_ms
+        buffer = io.BytesIO()
+        audio[start:start + chunk_ms].export(buffer, format="mp3")
+        data = buffer.getvalue()
+        name = f"{family}-{i + 1}.mp3"
+        path = os.path.join(out_dir, name)
+        if not os.path.exists(path) or file_hash(path) != hashlib.sha256(data).hexdigest():
+            with open(path, "wb") as f:
+                f.write(data)
+            print(f"Exported {path}")
+        clips.append({"file": name, "duration_ms": chunk_ms})
+    return clips
+
 
-# Load the original MP3
-audio = AudioSegment.from_mp3("static/keyboard-typing.mp3")
+def build(sources: list, chunk_ms: int, out_dir: str, jobs: int = None):
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    manifest = {"sources": {}, "clips": {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
 
-# Chunk size in milliseconds (1.5 seconds)
-chunk_duration_ms = 1500
+    todo = {}
+    for source in sources:
+        family = os.path.splitext(os.path.basename(source))[0]
+        spec = {"sha256": file_hash(source), "chunk_ms": chunk_ms}
+        previous = manifest["clips"].get(family, [])
+        unchanged = manifest["sources"].get(family) == spec and previous and all(
+            os.path.exists(os.path.join(out_dir, clip["file"])) for clip in previous
+        )
+        if unchanged:
+            print(f"Skipping {source} (unchanged)")
+        else:
+            todo[family] = (source, spec)
 
-# Total number of full chunks
-num_chunks = len(audio) // chunk_duration_ms
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {family: pool.submit(split_source, source, chunk_ms, out_dir) for family, (source, _) in todo.items()}
+        for family, future in futures.items():
+            manifest["clips"][family] = future.result()
+            manifest["sources"][family] = todo[family][1]
+            print(f"✅ {family}: {len(manifest['clips'][family])} chunks of {chunk_ms / 1000:g} seconds each.")
 
-# Create output directory
-os.makedirs("chunks", exist_ok=True)
+    if todo:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        print(f"Wrote {manifest_path}")
 
-# Split and export chunks
-for i in range(num_chunks):
-    start = i * chunk_duration_ms
-    end = start + chunk_duration_ms
-    chunk = audio[start:end]
-    out_path = f"static/keyboard-typing-{i+1}.mp3"
-    chunk.export(out_path, format="mp3")
-    print(f"Exported {out_path}")
 
-print(f"✅ Done. Exported {num_chunks} full chunks of 1.5 seconds each.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", default=["static/keyboard-typing.mp3"])
+    # Chunk size in milliseconds (1.5 seconds)
+    parser.add_argument("--chunk-ms", type=int, default=1500)
+    parser.add_argument("--out", default="static")
+    parser.add_argument("--jobs", type=int, default=None, help="Parallel workers (default: one per CPU)")
+    args = parser.parse_args()
+    build(args.sources, args.chunk_ms, args.out, args.jobs)
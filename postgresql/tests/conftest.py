@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The data service runs from postgresql/ and imports its modules as the server package ("from server.pool import ...")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
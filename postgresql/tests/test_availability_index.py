@@ -0,0 +1,227 @@
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta, timezone
+import pytest
+from zoneinfo import ZoneInfo
+from server.availability import AvailabilityIndex, OFFICE_TIMEZONE, to_us, from_us
+from server.queries import appointments
+
+DAY = datetime(2030, 3, 4, 8, tzinfo=timezone.utc)
+PROVIDERS = [1, 2, 3]
+LOCATIONS = [10, 20]
+
+
+def change(op: str, slot_id: int, new: dict = None, old: dict = None) -> dict:
+    """A notification payload as the appt_slots trigger builds it."""
+    payload = {"op": op, "id": slot_id}
+    if new is not None:
+        payload.update(
+            start_us=to_us(new["start_time"]), is_available=new["is_available"],
+            provider_id=new["provider_id"], location_id=new["location_id"], duration_minutes=new["duration_minutes"]
+        )
+    if old is not None:
+        payload.update(
+            old_start_us=to_us(old["start_time"]), old_is_available=old["is_available"],
+            old_provider_id=old["provider_id"], old_location_id=old["location_id"]
+        )
+    return payload
+
+
+class Table:
+    """A brute-force appt_slots table: every write produces the change the trigger would send."""
+
+    def __init__(self, index: AvailabilityIndex):
+        self.index = index
+        self.rows = {}
+
+    def write(self, slot_id: int, **row):
+        old = self.rows.get(slot_id)
+        new = dict(old or {}, **row)
+        self.rows[slot_id] = new
+        self.index.on_notify(json.dumps(change("UPDATE" if old else "INSERT", slot_id, new, old)))
+
+    def delete(self, slot_id: int):
+        old = self.rows.pop(slot_id)
+        self.index.on_notify(json.dumps(change("DELETE", slot_id, old=old)))
+
+    def range(self, start, end, limit=None, offset=0, provider_id=None, location_id=None, inclusive=True) -> list:
+        matching = sorted(
+            (row["start_time"], slot_id) for slot_id, row in self.rows.items()
+            if row["is_available"]
+            and start <= row["start_time"] and (row["start_time"] <= end if inclusive else row["start_time"] < end)
+            and provider_id in (None, row["provider_id"]) and location_id in (None, row["location_id"])
+        )
+        stop = None if limit is None else offset + limit
+        return [slot_id for _, slot_id in matching[offset:stop]]
+
+
+def random_row(rng: random.Random) -> dict:
+    return {
+        # Quarter-hour starts over a few days, so many slots share a start time
+        "start_time": DAY + timedelta(minutes=15 * rng.randrange(4 * 24 * 3)),
+        "is_available": rng.random() < 0.8,
+        "provider_id": rng.choice(PROVIDERS),
+        "location_id": rng.choice(LOCATIONS),
+        "duration_minutes": rng.choice([15, 30, 60]),
+    }
+
+
+@pytest.fixture
+def table():
+    rng = random.Random(7)
+    table = Table(AvailabilityIndex())
+    for slot_id in range(1, 601):
+        table.write(slot_id, **random_row(rng))
+    # Book, cancel, move and delete slots the way the app and staff would
+    for _ in range(400):
+        slot_id = rng.choice(list(table.rows))
+        action = rng.random()
+        if action < 0.3:
+            table.write(slot_id, is_available=not table.rows[slot_id]["is_available"])
+        elif action < 0.6:
+            table.write(slot_id, start_time=random_row(rng)["start_time"])
+        elif action < 0.8:
+            table.write(slot_id, provider_id=rng.choice(PROVIDERS), location_id=rng.choice(LOCATIONS))
+        else:
+            table.delete(slot_id)
+    return table
+
+
+WINDOWS = [
+    (DAY, DAY + timedelta(days=3)),
+    (DAY + timedelta(hours=5), DAY + timedelta(hours=9)),
+    (DAY + timedelta(minutes=15), DAY + timedelta(minutes=15)),
+    (DAY - timedelta(days=1), DAY),
+    (DAY + timedelta(days=5), DAY + timedelta(days=6)),
+]
+
+
+@pytest.mark.parametrize("start, end", WINDOWS)
+@pytest.mark.parametrize("provider_id, location_id", [(None, None), (2, None), (None, 20), (3, 10), (4, None)])
+def test_range_matches_the_table(table, start, end, provider_id, location_id):
+    slots = table.index.range(start, end, provider_id=provider_id, location_id=location_id)
+    assert [slot["id"] for slot in slots] == table.range(start, end, provider_id=provider_id, location_id=location_id)
+    for slot in slots:
+        row = table.rows[slot["id"]]
+        assert (slot["start_time"], slot["provider_id"], slot["location_id"], slot["duration_minutes"]) == (
+            row["start_time"], row["provider_id"], row["location_id"], row["duration_minutes"]
+        )
+
+
+@pytest.mark.parametrize("provider_id", [None, 1])
+@pytest.mark.parametrize("limit, offset", [(8, 0), (8, 8), (5, 37), (8, 10_000), (None, 3)])
+def test_pages_match_the_table(table, provider_id, limit, offset):
+    start, end = WINDOWS[0]
+    slots = table.index.range(start, end, limit=limit, offset=offset, provider_id=provider_id)
+    assert [slot["id"] for slot in slots] == table.range(start, end, limit, offset, provider_id=provider_id)
+
+
+def test_pages_cover_the_window_once(table):
+    start, end = WINDOWS[0]
+    paged, offset = [], 0
+    while page := table.index.range(start, end, limit=8, offset=offset):
+        paged += [slot["id"] for slot in page]
+        offset += 8
+    assert paged == table.range(start, end)
+
+
+@pytest.mark.parametrize("start, end", WINDOWS)
+@pytest.mark.parametrize("provider_id, location_id", [(None, None), (2, None), (3, 10)])
+def test_count_excludes_the_end(table, start, end, provider_id, location_id):
+    expected = table.range(start, end, provider_id=provider_id, location_id=location_id, inclusive=False)
+    assert table.index.count(start, end, provider_id=provider_id, location_id=location_id) == len(expected)
+
+
+@pytest.mark.parametrize("start, end", WINDOWS + [(DAY + timedelta(hours=3, minutes=50), DAY + timedelta(days=1, hours=4))])
+@pytest.mark.parametrize("provider_id", [None, 2])
+def test_summary_matches_the_table(table, monkeypatch, start, end, provider_id):
+    table.index.ready = True
+    monkeypatch.setattr(appointments, "availability_index", table.index)
+    summary = asyncio.run(appointments.get_availability_summary(start, end, 3, provider_id))
+
+    days = {}
+    for slot_id in table.range(start, end, provider_id=provider_id):
+        local = table.rows[slot_id]["start_time"].astimezone(ZoneInfo(OFFICE_TIMEZONE))
+        day = days.setdefault(local.date().isoformat(), {"morning": 0, "afternoon": 0})
+        day["morning" if local.hour < 12 else "afternoon"] += 1
+    assert summary["days"] == [{"date": date, **counts} for date, counts in sorted(days.items())]
+    assert summary["total"] == len(table.range(start, end, provider_id=provider_id))
+    assert [slot["id"] for slot in summary["openings"]] == table.range(start, end, 3, provider_id=provider_id)
+
+
+def test_len_counts_open_slots(table):
+    assert len(table.index) == sum(row["is_available"] for row in table.rows.values())
+
+
+def test_changes_are_idempotent(table):
+    start, end = WINDOWS[0]
+    before = [slot["id"] for slot in table.index.range(start, end)]
+    slot_id = table.range(start, end)[0]
+    row = table.rows[slot_id]
+    table.index.apply(change("UPDATE", slot_id, row, row))
+    table.index.apply(change("INSERT", slot_id, row))
+    assert [slot["id"] for slot in table.index.range(start, end)] == before
+
+
+def test_round_trips_microseconds():
+    moment = datetime(2030, 3, 4, 9, 15, 0, 250, tzinfo=timezone.utc)
+    assert from_us(to_us(moment)) == moment
+
+
+class Cursor:
+    def __init__(self, rows, during):
+        self.rows, self.during = rows, during
+
+    async def __aiter__(self):
+        for i, row in enumerate(self.rows):
+            if i == 1:
+                self.during()
+            yield row
+
+
+class Pool:
+    """Just enough of an asyncpg pool to stream a snapshot, calling during() partway through it."""
+
+    def __init__(self, rows, during):
+        self.rows, self.during = rows, during
+
+    def acquire(self):
+        return self
+
+    def transaction(self, readonly=False):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def cursor(self, query, prefetch=None):
+        return Cursor(self.rows, self.during)
+
+
+def test_load_replays_changes_made_during_the_snapshot():
+    index = AvailabilityIndex()
+    rows = [
+        {"id": slot_id, "start_time": DAY + timedelta(hours=slot_id), "provider_id": 1, "location_id": 10, "duration_minutes": 30}
+        for slot_id in (1, 2, 3)
+    ]
+    booked = dict(rows[2], is_available=False)
+    added = dict(rows[0], start_time=DAY + timedelta(hours=4), is_available=True)
+
+    def during():
+        # While the snapshot is streaming (and still sees slot 3 open), slot 3 is booked and slot 4 is added
+        index.on_notify(json.dumps(change("UPDATE", 3, booked, dict(booked, is_available=True))))
+        index.on_notify(json.dumps(change("INSERT", 4, added)))
+
+    asyncio.run(index.load(Pool(rows, during)))
+    assert index.ready
+    assert [slot["id"] for slot in index.range(DAY, DAY + timedelta(days=1))] == [1, 2, 4]
+
+
+def test_truncate_clears_the_index(table):
+    table.index.on_notify(json.dumps({"op": "TRUNCATE"}))
+    assert len(table.index) == 0
+    assert table.index.resync_requested.is_set()
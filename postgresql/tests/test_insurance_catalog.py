@@ -0,0 +1,137 @@
+import asyncio
+import asyncpg
+import pytest
+from server.insurance_catalog import InsuranceCatalog, normalize, phonetic_key, edit_distance
+
+# The sample catalog from scripts/populate_tables.sql with the aliases from scripts/migrate_insurance_catalog.sql
+ROWS = [
+    {"name": "BlueCross BlueShield", "accepted": True, "aliases": ["Blue Cross", "Blue Shield", "BCBS"]},
+    {"name": "UnitedHealthcare", "accepted": True, "aliases": ["United", "United Health", "UHC"]},
+    {"name": "Aetna", "accepted": True, "aliases": []},
+    {"name": "Cigna", "accepted": False, "aliases": ["Sigma"]},
+    {"name": "Humana", "accepted": True, "aliases": []},
+    {"name": "Kaiser Permanente", "accepted": False, "aliases": ["Kaiser"]},
+]
+
+
+class Pool:
+    """Just enough of an asyncpg pool for load(): one connection answering the catalog query."""
+
+    def __init__(self, rows, has_aliases=True):
+        self.rows = rows
+        self.has_aliases = has_aliases
+        self.queries = []
+
+    def acquire(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def fetch(self, query):
+        self.queries.append(query)
+        if "SELECT name, accepted, aliases" in query and not self.has_aliases:
+            raise asyncpg.UndefinedColumnError("column \"aliases\" does not exist")
+        if self.has_aliases:
+            return self.rows
+        return [dict(row, aliases=[]) for row in self.rows]
+
+
+@pytest.fixture
+def catalog():
+    catalog = InsuranceCatalog()
+    asyncio.run(catalog.load(Pool(ROWS)))
+    return catalog
+
+
+def test_load(catalog):
+    assert catalog.ready
+    assert catalog.names == [row["name"] for row in ROWS]
+
+
+@pytest.mark.parametrize("spoken, name", [
+    # Exact names and aliases, however they are spaced, cased or padded
+    ("Aetna", "Aetna"),
+    ("blue cross blue shield", "BlueCross BlueShield"),
+    ("BCBS", "BlueCross BlueShield"),
+    ("Blue Shield", "BlueCross BlueShield"),
+    ("UHC", "UnitedHealthcare"),
+    ("United Health Care", "UnitedHealthcare"),
+    ("kaiser", "Kaiser Permanente"),
+    ("I have Humana insurance", "Humana"),
+    ("do you take cigna?", "Cigna"),
+    # A known name inside a longer phrase
+    ("Aetna PPO", "Aetna"),
+    ("Blue Cross of Illinois", "BlueCross BlueShield"),
+    ("Kaiser Permanente Northern California", "Kaiser Permanente"),
+    # Small misspellings
+    ("Aetma", "Aetna"),
+    ("Humanna", "Humana"),
+    ("UnitedHelthcare", "UnitedHealthcare"),
+    # Names that only sound alike (ASR mix-ups)
+    ("Sigma", "Cigna"),
+    ("Signa", "Cigna"),
+    ("Etna", "Aetna"),
+])
+def test_lookup_finds_the_provider(catalog, spoken, name):
+    entry = catalog.lookup(spoken)
+    assert entry is not None and entry["name"] == name
+
+
+@pytest.mark.parametrize("spoken", ["", "insurance", "the plan", "Medicare", "Tricare", "Oscar Health"])
+def test_lookup_misses(catalog, spoken):
+    assert catalog.lookup(spoken) is None
+
+
+def test_lookup_returns_acceptance(catalog):
+    assert catalog.lookup("sigma")["accepted"] is False
+    assert catalog.lookup("BCBS")["accepted"] is True
+
+
+def test_ambiguous_phrase_is_not_guessed(catalog):
+    # Mentions two known providers; picking either would be a guess
+    assert catalog.lookup("aetna or humana") is None
+
+
+def test_loads_without_the_aliases_column():
+    catalog = InsuranceCatalog()
+    pool = Pool(ROWS, has_aliases=False)
+    asyncio.run(catalog.load(pool))
+    assert len(pool.queries) == 2
+    assert catalog.lookup("Humana")["name"] == "Humana"
+    assert catalog.lookup("BCBS") is None
+
+
+def test_reload_replaces_the_catalog(catalog):
+    asyncio.run(catalog.load(Pool([dict(ROWS[2], accepted=False)])))
+    assert catalog.names == ["Aetna"]
+    assert catalog.lookup("aetna")["accepted"] is False
+    assert catalog.lookup("humana") is None
+
+
+@pytest.mark.parametrize("text, normalized", [
+    ("Blue Cross", "bluecross"),
+    ("BlueCross", "bluecross"),
+    ("  the Aetna plan! ", "aetna"),
+    ("Kaiser-Permanente", "kaiserpermanente"),
+])
+def test_normalize(text, normalized):
+    assert normalize(text) == normalized
+
+
+@pytest.mark.parametrize("a, b", [("Cigna", "Sigma"), ("Cigna", "Signa"), ("Phoenix", "Fenix"), ("Knight", "Night")])
+def test_phonetic_key_matches_similar_sounds(a, b):
+    assert phonetic_key(a) == phonetic_key(b)
+
+
+def test_phonetic_key_separates_different_names():
+    keys = {phonetic_key(row["name"]) for row in ROWS}
+    assert len(keys) == len(ROWS)
+
+
+@pytest.mark.parametrize("a, b, distance", [("aetna", "aetna", 0), ("aetna", "aetma", 1), ("humana", "humanna", 1), ("", "uhc", 3)])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b) == distance
@@ -3,9 +3,18 @@ class FrontDeskAssistant:
     Front Desk Assistant for handling incoming calls and providing information.
     """
 
+    # Voice settings: which TTSStrategy speaks TwiML replies (see models/tts.py)
+    config = {
+        "tts_model": "11labs",
+    }
+
     # The greeting message that will be played to the user when they call in.
     greeting = "Hello! I am the amazing front desk voice assistant. How can I help you today?"
 
+    # Spoken when a reply is running late (holding_phrase) or can't be produced in time at all (degraded_reply)
+    holding_phrase = "One moment, please."
+    degraded_reply = "I'm sorry, I'm having trouble with that right now. Could you ask me again, or I can have someone from the office call you back."
+
     # Initialize the assistant with a system prompt and greeting.
     system_prompt = \
 """General Instructions:
@@ -21,5 +30,58 @@ Confirm important details like names, dates, and contact info when necessary. Al
 Additional instructions:
 - The office is located at 123 Main St, Springfield, IL. 
 - The office hours are Monday to Saturday, 9 AM to 5 PM. Closed on Sundays.
-- If the patient mentions Sigma insurance, they mean Cigna insurance.
-- """
\ No newline at end of file
+- """
+
+    # Common questions answered straight from the facts above, without calling the model (see faq_cache.py).
+    # Keep the answers in sync with system_prompt; editing either one invalidates the cache.
+    faqs = [
+        {
+            "intent": "address",
+            "examples": [
+                "where are you located",
+                "what is your address",
+                "where is the office",
+                "how do i get to your office",
+                "what's the address of the office",
+            ],
+            "answer": "We're located at 123 Main St, Springfield, Illinois.",
+        },
+        {
+            "intent": "hours",
+            "examples": [
+                "what are your hours",
+                "what are your office hours",
+                "when are you open",
+                "what time do you open",
+                "what time do you close",
+                "how late are you open",
+            ],
+            "answer": "We're open Monday to Saturday, 9 AM to 5 PM, and closed on Sundays.",
+        },
+        {
+            "intent": "sundays",
+            "examples": [
+                "are you open on sunday",
+                "are you open sundays",
+                "do you work on sundays",
+            ],
+            "answer": "We're closed on Sundays. We're open Monday to Saturday, 9 AM to 5 PM.",
+        },
+        {
+            "intent": "saturdays",
+            "examples": [
+                "are you open on saturday",
+                "are you open saturdays",
+                "do you work on saturdays",
+            ],
+            "answer": "Yes, we're open on Saturdays from 9 AM to 5 PM.",
+        },
+    ]
+
+    # Prompts mentioning any of these always go to the model: they need tools or the conversation's context
+    faq_bypass_words = [
+        "appointment", "book", "schedule", "reschedule", "cancel", "slot", "available", "availability",
+        "insurance", "accept", "covered", "message", "doctor", "prescription", "tomorrow", "next",
+        # Other contact details that read like the address or hours questions ("what is your email address")
+        "email", "mail", "phone", "number", "fax", "website", "online",
+    ]
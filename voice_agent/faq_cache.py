@@ -0,0 +1,158 @@
+import hashlib
+import json
+import math
+import re
+from collections import Counter, OrderedDict
+from typing import Optional
+from utils.config import FAQ_MATCH_THRESHOLD, FAQ_MATCH_MARGIN, FAQ_MAX_WORDS, FAQ_CACHE_SIZE
+from utils import metrics
+
+# Words that carry no intent in a spoken question ("um, hi, can you tell me ...")
+FILLER_WORDS = {
+    "um", "uh", "hi", "hello", "hey", "yes", "yeah", "ok", "okay", "so", "please", "thanks", "thank",
+    "can", "could", "would", "you", "tell", "me", "i", "want", "to", "know", "wanted", "just", "the", "a",
+}
+
+# Words that don't identify what is being asked; every other word of a prompt must appear in the matched
+# intent's examples ("what is your email address" has "email", which no address example has)
+FUNCTION_WORDS = {
+    "what", "whats", "is", "are", "your", "yours", "do", "does", "of", "on", "in", "at", "for", "it", "its",
+    "we", "our", "us", "be", "there", "again", "exactly", "guys", "office",
+}
+
+# Openers of an utterance that only makes sense after the previous turn ("and on saturday?")
+FOLLOW_UP_OPENERS = ("and", "also", "or", "but", "then", "what about", "how about")
+
+
+def normalize(text: str) -> str:
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    return " ".join(word.replace("'", "") for word in words if word not in FILLER_WORDS)
+
+
+def features(text: str) -> Counter:
+    """Word unigrams/bigrams plus character trigrams: robust to ASR spelling slips, still word-aware."""
+    words = text.split()
+    grams = Counter(words)
+    grams.update(" ".join(pair) for pair in zip(words, words[1:]))
+    padded = f" {text} "
+    grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    if not dot:
+        return 0.0
+    return dot / (math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values())))
+
+
+def stands_alone(history: list) -> bool:
+    """
+    Whether a new prompt can be answered without the conversation so far: it is the caller's first prompt,
+    or the exchange before it used no tools (no lookup or booking in progress whose context the prompt
+    might depend on).
+    """
+    last_exchange = []
+    for message in reversed(history):
+        if message["role"] == "user":
+            break
+        last_exchange.append(message)
+    else:
+        return True
+    return not any(message["role"] in ("tool", "function") or message.get("tool_calls") for message in last_exchange)
+
+
+def config_hash(assistant) -> str:
+    """Stable hash of everything the precomputed answers depend on."""
+    config = {"system_prompt": assistant.system_prompt, "faqs": assistant.faqs, "bypass": assistant.faq_bypass_words}
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+class FaqCache:
+    """
+    Answers common front-desk questions (address, hours, ...) from the assistant's precomputed FAQ replies,
+    without a model call. Prompts are matched against each intent's examples by n-gram similarity; only
+    confident, unambiguous matches whose every content word appears in the intent's examples are answered,
+    and only for prompts that stand on their own (not a follow-up, no tool flow in progress). Match results
+    are kept in an LRU keyed by normalized prompt, and everything is rebuilt when the assistant config changes.
+    """
+
+    def __init__(self, assistant, threshold: float = FAQ_MATCH_THRESHOLD, margin: float = FAQ_MATCH_MARGIN,
+                 max_words: int = FAQ_MAX_WORDS, cache_size: int = FAQ_CACHE_SIZE):
+        self.assistant = assistant
+        self.threshold = threshold
+        self.margin = margin
+        self.max_words = max_words
+        self.cache_size = cache_size
+        self.version = None
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild the index if the assistant's config has changed since it was built."""
+        version = config_hash(self.assistant)
+        if version == self.version:
+            return
+        self.version = version
+        self.answers = {faq["intent"]: faq["answer"] for faq in self.assistant.faqs}
+        self.examples = [
+            (faq["intent"], features(normalize(example)))
+            for faq in self.assistant.faqs
+            for example in faq["examples"]
+        ]
+        self.vocabulary = {
+            faq["intent"]: {word for example in faq["examples"] for word in normalize(example).split()}
+            for faq in self.assistant.faqs
+        }
+        self.bypass_words = {word.lower() for word in self.assistant.faq_bypass_words}
+        self.matches = OrderedDict()  # normalized prompt -> intent or None
+
+    def answer(self, prompt: str, history: list = None) -> Optional[str]:
+        """
+        The precomputed reply for this prompt, or None if it should go to the model.
+        history is the conversation before the prompt; a prompt that may depend on it is never answered here.
+        """
+        self.refresh()
+        if self._follow_up(prompt, history):
+            metrics.FAQ.labels("miss", "").inc()
+            return None
+        text = normalize(prompt)
+        if text in self.matches:
+            self.matches.move_to_end(text)
+            intent = self.matches[text]
+        else:
+            intent = self._classify(text)
+            self.matches[text] = intent
+            if len(self.matches) > self.cache_size:
+                self.matches.popitem(last=False)
+        metrics.FAQ.labels("hit" if intent else "miss", intent or "").inc()
+        return self.answers[intent] if intent else None
+
+    @staticmethod
+    def _follow_up(prompt: str, history: list = None) -> bool:
+        spoken = " ".join(re.findall(r"[a-z0-9']+", prompt.lower()))
+        if any(spoken == opener or spoken.startswith(f"{opener} ") for opener in FOLLOW_UP_OPENERS):
+            return True
+        return history is not None and not stands_alone(history)
+
+    def _classify(self, text: str) -> Optional[str]:
+        words = text.split()
+        # Long or action-oriented utterances carry more than a static question; leave them to the model
+        if not words or len(words) > self.max_words:
+            return None
+        if any(word.startswith(bypass) for word in words for bypass in self.bypass_words):
+            return None
+        prompt = features(text)
+        best = {}
+        for intent, example in self.examples:
+            best[intent] = max(best.get(intent, 0.0), cosine(prompt, example))
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < self.threshold:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < self.margin:
+            return None
+        intent = ranked[0][0]
+        # Similar wording isn't enough: the prompt must ask nothing the intent's examples don't cover
+        content = {word for word in words if word not in FUNCTION_WORDS}
+        if not content or not content <= self.vocabulary[intent]:
+            return None
+        return intent
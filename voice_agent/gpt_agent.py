@@ -1,219 +1,433 @@
+import asyncio
 import json
-from openai import OpenAI
-import os
 import random
+import time
 import httpx
-from datetime import datetime
-from zoneinfo import ZoneInfo
-from dotenv import load_dotenv
-load_dotenv()
+from assistants.front_desk_assistant import FrontDeskAssistant
+from tools import Tool, format_insurance_status, format_appt_slots
+from utils.config import (
+    MAX_TOOL_ROUNDS, APPT_SLOTS_PAGE_SIZE, FILLER_FAMILY, FILLER_THRESHOLD_SECONDS,
+    FIRST_TOKEN_BUDGET_SECONDS, SILENCE_BUDGET_SECONDS, FALLBACK_MODEL
+)
+from utils.data_processing import SpeechChunker
+from utils.conversation_memory import ConversationMemory
+from utils import metrics
+
+
+def _remaining(deadline: float) -> float:
+    return deadline - time.perf_counter()
+
+
+class Completion:
+    """
+    A streamed completion whose first delta is awaited in the background,
+    so the turn can hold the line, race it against another model, or abandon it.
+    """
+
+    def __init__(self, deltas):
+        self._deltas = deltas
+        self.first = asyncio.ensure_future(deltas.__anext__())
+
+    def ready(self) -> bool:
+        """The first delta arrived (the stream didn't fail or end before producing one)."""
+        return self.first.done() and not self.first.cancelled() and self.first.exception() is None
+
+    async def deltas(self, stall_timeout: float):
+        """
+        Yield every delta; raises asyncio.TimeoutError only if the stream stalls, with no delta for
+        stall_timeout seconds. A stream that keeps making progress is never cut off, however long it runs.
+        """
+        yield self.first.result()
+        while True:
+            try:
+                yield await asyncio.wait_for(self._deltas.__anext__(), stall_timeout)
+            except StopAsyncIteration:
+                return
+
+    async def cancel(self):
+        # Cancelling the pending read closes the stream, which aborts the upstream request
+        self.first.cancel()
+        await asyncio.gather(self.first, return_exceptions=True)
+        await self._deltas.aclose()
+
+
+async def _first_ready(attempts: list, timeout: float):
+    """The first completion to produce a delta within the timeout; the rest are cancelled. None if none do."""
+    winner = None
+    pending = {attempt.first: attempt for attempt in attempts}
+    deadline = time.perf_counter() + timeout
+    try:
+        while pending and winner is None:
+            done, _ = await asyncio.wait(pending, timeout=max(_remaining(deadline), 0), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                metrics.BUDGETS.labels("silence", "exceeded").inc()
+                break
+            for first in done:
+                attempt = pending.pop(first)
+                if not attempt.ready():
+                    print(f"Completion failed: {first.exception()!r}")
+                elif winner is None:
+                    winner = attempt
+                else:
+                    pending[first] = attempt
+    finally:
+        await asyncio.gather(*(attempt.cancel() for attempt in pending.values()))
+    return winner
 
-POSTGRESQL_BASE_URL = os.getenv("POSTGRESQL_BASE_URL")
 
 class GPTAgent:
-    def __init__(self, openai_client, model="gpt-4o-mini"):
+    def __init__(self, openai_client, data_backend, model="gpt-4o-mini"):
         self.client = openai_client
+        self.data_backend = data_backend
         self.model = model
+        self.memory = ConversationMemory(model)
 
-        now = datetime.now(ZoneInfo("America/New_York"))
-        formatted_time = now.strftime("%A, %B %-d, %Y, %-I:%M%p").lower().replace("pm", "pm").replace("am", "am")
-        formatted_time_nice = formatted_time[0].upper() + formatted_time[1:]
+        # Known insurance providers, loaded from the data service's catalog
+        self.insurance_providers = []
+        self.tools = self.build_tools()
+        self.tool_schemas = [tool.schema() for tool in self.tools.values()]
+        # URLs of the filler clips played while slow tools run
+        self.filler_clips = []
 
-        self.time_nice = formatted_time_nice
-        self.time = formatted_time
+    async def refresh_insurance_providers(self):
+        """Reload the provider list from the catalog and rebuild the tool schemas if it changed."""
+        providers = await self.data_backend.list_insurance_providers()
+        if providers != self.insurance_providers:
+            self.insurance_providers = providers
+            self.tools = self.build_tools()
+            self.tool_schemas = [tool.schema() for tool in self.tools.values()]
+            print(f"Loaded insurance providers: {providers}")
 
-    def get_available_functions(self):
-        available_functions = [
-            {
-                "name": "fetch_insurance_status",
-                "description": "IF the customer wants to know if a specific insurance provider is accepted AND there is no fetch_insurance_status function call in the conversation, THEN Run this function.",
-                "parameters": {
+    async def refresh_filler_clips(self):
+        self.filler_clips = await self.data_backend.list_filler_clips(FILLER_FAMILY)
+        print(f"Loaded {len(self.filler_clips)} filler clips")
+
+    def build_tools(self) -> dict:
+        """The tool registry: schema, handler and reply formatting for every tool, keyed by name."""
+        insurance_name = {
+            "type": "string",
+            "description": (
+                "The name of the insurance provider. "
+                "If the customer mentions an insurance provider and it closely matches a value in the ENUM, assume they meant the ENUM value and call fetch_insurance_status to check if it's accepted."
+            )
+        }
+        if self.insurance_providers:
+            insurance_name["enum"] = self.insurance_providers
+
+        tools = [
+            Tool(
+                name="fetch_insurance_status",
+                description="IF the customer wants to know if a specific insurance provider is accepted AND there is no fetch_insurance_status function call in the conversation, THEN Run this function.",
+                parameters={
                     "type": "object",
                     "properties": {
-                        "name": {
-                            "type": "string",
-                            "description": (
-                                "The name of the insurance provider. "
-                                "If the customer specified an insurance provider name, then reference the enum values to determine if you misheard them. "
-                                "Assume the customer asked about one of the insurance providers in the enum.\n"
-                                "If the customer mentions an insurance provider and it closely matches a value in the ENUM, assume they meant the ENUM value and call fetch_insurance_status to check if it's accepted."
-                            ),
-                            "enum": [
-                                "BlueCross BlueShield",
-                                "UnitedHealthcare",
-                                "Aetna",
-                                "Cigna",
-                                "Humana",
-                                "Kaiser Permanente"
-                            ]
-                        }
+                        "name": insurance_name
                     },
                     "required": ["name"]
-                }
-            },
-            {
-                "name": "check_appt_slots",
-                "description": (
+                },
+                handler=self.fetch_insurance_status,
+                formatter=format_insurance_status,
+                direct_reply=True
+            ),
+            Tool(
+                name="check_appt_slots",
+                description=(
                     "If the customer wants to know what appointment slots are available between two times, "
-                    "use this function to return available appointment times."
+                    "use this function to return available appointment times. "
+                    "For broad questions (a whole week, \"anything next week?\", several days) set summary to true to get "
+                    "counts per day and per morning/afternoon plus the earliest openings, then narrow down with the caller."
                 ),
-                "parameters": {
+                parameters={
                     "type": "object",
                     "properties": {
                         "start_time": {
                             "type": "string",
                             "format": "date-time",
-                            "description": f"The start of the time window (ISO 8601 format, e.g., YYYY-MM-DDTHH:MM:SS) For reference, it is currently {self.time} | {self.time_nice}"
+                            "description": "The start of the time window (ISO 8601 format, e.g., YYYY-MM-DDTHH:MM:SS). Resolve relative dates against the call's start time given in the system message."
                         },
                         "end_time": {
                             "type": "string",
                             "format": "date-time",
-                            "description": f"The end of the time window (ISO 8601 format, e.g., YYYY-MM-DDTHH:MM:SS) For reference, it is currently {self.time} | {self.time_nice}"
+                            "description": "The end of the time window (ISO 8601 format, e.g., YYYY-MM-DDTHH:MM:SS). Resolve relative dates against the call's start time given in the system message."
+                        },
+                        "summary": {
+                            "type": "boolean",
+                            "description": "Return a summary (openings per day and half-day, plus the earliest few) instead of individual slots."
+                        },
+                        "offset": {
+                            "type": "integer",
+                            "description": "Skip this many slots, to hear the next page when a previous result said more openings are available."
                         }
                     },
                     "required": ["start_time", "end_time"]
-                }
-            }
+                },
+                handler=self.check_appt_slots,
+                formatter=format_appt_slots
+            )
         ]
+        return {tool.name: tool for tool in tools}
 
-    def get_functions(self):
-        return {
-            "fetch_insurance_status": self.fetch_insurance_status,
-            "check_appt_slots": self.check_appt_slots
-        }
+    async def handle_response(self, websocket, conversation, prefetcher=None):
+        """
+        Stream the assistant's reply to the conversation.
+        Yields speakable chunks (cut at sentence/clause boundaries) as soon as the model produces them.
 
-    async def handle_response(self, websocket, conversation):
-        
-        messages = conversation.copy()
+        Every tool call the model makes in a round runs concurrently; the model then gets all the results
+        at once, for up to MAX_TOOL_ROUNDS rounds. Tool calls are answered from the call's prefetcher
+        when it already has the result.
+
+        The turn runs within latency budgets that measure silence, the time since the caller last heard
+        a token or a clip: a completion with no first token after FIRST_TOKEN_BUDGET_SECONDS gets the
+        holding phrase (and races FALLBACK_MODEL if one is set), tools are cut off at their own timeout
+        or when the silence budget runs out, and a turn that goes SILENCE_BUDGET_SECONDS with nothing to
+        say ends with the degraded reply. A stream that is still producing tokens is never cut off.
+        Phrases of our own go through the same chunker as streamed text, after whatever it buffered.
+        """
+        heard_at = time.perf_counter()
+
+        def silence_left() -> float:
+            return max(heard_at + SILENCE_BUDGET_SECONDS - time.perf_counter(), 0)
+
+        # Static system prompt + tool schemas form a stable prefix; the history after it is kept within budget
+        messages = self.memory.build(conversation)
+        chunker = SpeechChunker()
+        completion = None
+        spoke = degraded = False
+
+        try:
+            for round_number in range(MAX_TOOL_ROUNDS + 1):
+                # Tools stay in the request on the last round (same cached prefix) but can't be called
+                tool_choice = "auto" if round_number < MAX_TOOL_ROUNDS else "none"
+                stage = "initial" if round_number == 0 else "followup"
+                tool_calls = {}
+
+                completion = Completion(self._stream_deltas(self.model, messages, tool_choice, stage))
+                await asyncio.wait({completion.first}, timeout=min(FIRST_TOKEN_BUDGET_SECONDS, silence_left()))
+                if completion.ready():
+                    metrics.BUDGETS.labels("first_token", "ok").inc()
+                else:
+                    attempts = [completion]
+                    if completion.first.done():
+                        print(f"Completion failed: {completion.first.exception()!r}")
+                        metrics.BUDGETS.labels("first_token", "error").inc()
+                        attempts = []
+                    else:
+                        metrics.BUDGETS.labels("first_token", "exceeded").inc()
+                    if not spoke:
+                        metrics.FALLBACKS.labels("holding_phrase").inc()
+                        spoke = True
+                        for chunk in chunker.say(FrontDeskAssistant.holding_phrase):
+                            yield chunk
+                        heard_at = time.perf_counter()
+                    if FALLBACK_MODEL and FALLBACK_MODEL != self.model:
+                        metrics.FALLBACKS.labels("fallback_model").inc()
+                        attempts.append(Completion(self._stream_deltas(FALLBACK_MODEL, messages, tool_choice, stage)))
+                    completion = await _first_ready(attempts, silence_left())
+                    if completion is None:
+                        degraded = True
+                        break
 
-        ## PRUNE CONVERSATION HERE ##
-        # For example, Limit the number of messages to the system message + the last 8 messages
-        if len(messages) > 9:
-            messages = [messages[0]] + messages[-8:]
+                try:
+                    async for delta in completion.deltas(SILENCE_BUDGET_SECONDS):
+                        if delta.tool_calls:
+                            for call in delta.tool_calls:
+                                entry = tool_calls.setdefault(call.index, {"id": "", "name": "", "arguments": ""})
+                                entry["id"] = call.id or entry["id"]
+                                if call.function:
+                                    entry["name"] += call.function.name or ""
+                                    entry["arguments"] += call.function.arguments or ""
+                        elif delta.content:
+                            for chunk in chunker.feed(delta.content):
+                                spoke = True
+                                yield chunk
+                                heard_at = time.perf_counter()
+                except asyncio.TimeoutError:
+                    # The stream stalled: keep what was said, drop any half-streamed tool calls
+                    metrics.BUDGETS.labels("silence", "exceeded").inc()
+                    degraded = True
+                    break
+                except Exception as e:
+                    # The stream broke off (connection reset, API error): handled like a stall
+                    print(f"Completion failed mid-stream: {e!r}")
+                    degraded = True
+                    break
 
+                if not tool_calls:
+                    break
 
-        # Initial completion request
-        response = self.client.chat.completions.create(
+                calls = [tool_calls[index] for index in sorted(tool_calls)]
+                direct_reply = all(call["name"] in self.tools and self.tools[call["name"]].direct_reply for call in calls)
+                if not direct_reply and await self._send_filler(websocket, calls):
+                    heard_at = time.perf_counter()
+                deadline = time.perf_counter() + silence_left()
+                outcomes = await asyncio.gather(*(self._run_tool(call, prefetcher, deadline) for call in calls))
+                results = [result for result, _ in outcomes]
+
+                call_messages = [{
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+                        for call in calls
+                    ]
+                }]
+                call_messages += [
+                    {"role": "tool", "tool_call_id": call["id"], "content": result}
+                    for call, result in zip(calls, results)
+                ]
+                messages.extend(call_messages)
+                conversation.extend(call_messages)
+
+                if direct_reply and all(ok for _, ok in outcomes):
+                    # Skip the next completion; the formatted results are the reply. A failed call is left to the model
+                    for result in results:
+                        for chunk in chunker.say(result):
+                            spoke = True
+                            yield chunk
+                    break
+        finally:
+            # Abort whatever is still streaming if the turn ends early (interrupted, out of time)
+            if completion is not None:
+                await completion.cancel()
+
+        if degraded:
+            metrics.FALLBACKS.labels("degraded").inc()
+            for chunk in chunker.say(FrontDeskAssistant.degraded_reply):
+                yield chunk
+        else:
+            metrics.BUDGETS.labels("silence", "ok").inc()
+            rest = chunker.flush()
+            if rest:
+                yield rest
+
+    async def _send_filler(self, websocket, calls: list) -> bool:
+        """
+        Play a filler clip while the tools and the follow-up completion run, if that wait is expected to be noticeable.
+        Returns whether a clip was played.
+        """
+        # Stages we haven't timed yet count as slow
+        expected = max(
+            metrics.latency_estimates.expected("tool", call["name"], FILLER_THRESHOLD_SECONDS) for call in calls
+        ) + metrics.latency_estimates.expected("llm_first_token", "followup", 0.0)
+        if expected < FILLER_THRESHOLD_SECONDS or not self.filler_clips:
+            return False
+        url = random.choice(self.filler_clips)
+        print(f"Sending audio URL: {url} (expected wait {expected:.2f}s)")
+        await websocket.send_text(json.dumps({
+            "type": "play",
+            "source": url
+        }))
+        return True
+
+    async def summarize_call(self, messages: list) -> str:
+        """A short, staff-facing summary of a finished call (runs as a background job, not during the call)."""
+        transcript = "\n".join(
+            f"{message['role']}: {message['content']}"
+            for message in messages
+            if message["role"] in ("user", "assistant") and message.get("content")
+        )
+        if not transcript:
+            return ""
+        response = await self.client.chat.completions.create(
             model=self.model,
-            messages=messages,
-            functions=self.available_functions,
-            function_call="auto"
+            messages=[
+                {"role": "system", "content": "Summarize this front desk phone call for office staff in two or three sentences: what the caller wanted, what was answered or booked, and any follow-up needed."},
+                {"role": "user", "content": transcript}
+            ]
         )
+        return response.choices[0].message.content
 
-        choice = response.choices[0].message
-
-        if choice.function_call:
-            func_name = choice.function_call.name
-            func_args = json.loads(choice.function_call.arguments)
-            func = self.get_functions()[func_name]
-            func_result = await func(**func_args)
-            formatted_string = get_formatted_string(func_name, func_args, func_result)
-
-            messages.append({
-                "role": "assistant",
-                "function_call": dict(name=func_name, arguments=json.dumps(func_args))
-            })
-
-            messages.append({
-                "role": "function",
-                "name": func_name,
-                "content": formatted_string
-            })
-            conversation.append({
-                "role": "function",
-                "name": func_name,
-                "content": formatted_string
-            })
-
-            idx = random.randint(1, 10)  # inclusive
-            url = f"{POSTGRESQL_BASE_URL}/static/keyboard-typing-{idx}.mp3"
-            print(f"Sending audio URL: {url}")
-            await websocket.send_text(json.dumps({
-                "type": "play_audio",
-                "url": url
-            }))
-
-            # GPT continues after receiving function result
-            final_response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages
-            )
-            assistant_reply = final_response.choices[0].message.content
-            messages.append({"role": "assistant", "content": assistant_reply})
-            return assistant_reply
+    async def _run_tool(self, call: dict, prefetcher=None, deadline: float = None) -> tuple:
+        """
+        Run one tool call within its time limit (and what's left of the silence budget).
+        Returns the text for its tool message and whether the call succeeded; a failure never raises.
+        """
+        tool = self.tools.get(call["name"])
+        if tool is None:
+            return f"Unknown function: {call['name']}", False
+        try:
+            func_args = json.loads(call["arguments"] or "{}")
+        except json.JSONDecodeError:
+            return f"Invalid arguments for {tool.name}: {call['arguments']}", False
 
-        else:
-            messages.append({"role": "assistant", "content": choice.content})
-            return choice.content
+        async def run():
+            func_result = await prefetcher.get(tool.name, func_args) if prefetcher else None
+            if func_result is None:
+                func_result = await tool.handler(**func_args)
+            return func_result
+
+        timeout = tool.timeout if deadline is None else max(min(tool.timeout, _remaining(deadline)), 0)
+        with metrics.span("tool", tool.name):
+            try:
+                func_result = await asyncio.wait_for(run(), timeout)
+            except asyncio.TimeoutError:
+                print(f"{tool.name} timed out after {timeout:.1f}s")
+                metrics.BUDGETS.labels("tool", "exceeded").inc()
+                return tool.timeout_message, True
+            except Exception as e:
+                # e.g. a TypeError from arguments the handler doesn't take; the other calls in the round still run
+                print(f"Error running {tool.name}: {e}")
+                return f"Error running {tool.name}: {e}", False
+        metrics.BUDGETS.labels("tool", "ok").inc()
+        try:
+            return tool.formatter(func_args, func_result), True
+        except Exception as e:
+            print(f"Error formatting {tool.name} result: {e}")
+            return f"Error running {tool.name}: {e}", False
+
+    async def _stream_deltas(self, model: str, messages: list, tool_choice: str, stage: str):
+        """Yield the message deltas of a streamed chat completion, timing the first token and the whole stream."""
+        started = time.perf_counter()
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            tools=self.tool_schemas,
+            tool_choice=tool_choice,
+            stream=True
+        )
+        first = True
+        # Closing the stream aborts the upstream request if the turn is cancelled mid-reply
+        async with stream:
+            async for event in stream:
+                if event.choices:
+                    if first:
+                        metrics.record("llm_first_token", time.perf_counter() - started, stage)
+                        first = False
+                    yield event.choices[0].delta
+        metrics.record("llm_completion", time.perf_counter() - started, stage)
 
-    async def fetch_insurance_status(self, name: str) -> bool:
-        """Fetch whether an insurance is accepted based on its name."""
+    async def fetch_insurance_status(self, name: str) -> dict:
+        """Fetch whether an insurance is accepted based on its (possibly misheard) name."""
         print(f"Fetching insurance status for: {name}")
-        url = f"{POSTGRESQL_BASE_URL}/get_insurance_status"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params={"name": name})
-                response.raise_for_status()
-                data = response.json()
-                print(f"Insurance status for {name}: {data}")
-                return data["accepted"]
+            insurance = await self.data_backend.find_insurance(name)
+            print(f"Insurance status for {name}: {insurance}")
+            if insurance is None:
+                return {"name": name, "accepted": False}
+            return insurance
         except httpx.HTTPStatusError as e:
             print(f"HTTP error while fetching insurance status: {e}")
-            return False
+            return {"name": name, "accepted": False}
         except Exception as e:
             print(f"Unexpected error: {e}")
-            return False
+            return {"name": name, "accepted": False}
         
-    async def check_appt_slots(self, start_time: str, end_time: str) -> list:
-        """Fetch available appointment slots between two ISO8601 timestamps."""
+    async def check_appt_slots(self, start_time: str, end_time: str, summary: bool = False, offset: int = 0,
+                               limit: int = APPT_SLOTS_PAGE_SIZE) -> dict:
+        """
+        Fetch available appointment slots between two ISO8601 timestamps: one page of slots
+        ({"slots", "next_offset"}), or with summary=True the per-day counts and first openings.
+        """
         print(f"Checking appointment slots from {start_time} to {end_time}")
-        url = f"{POSTGRESQL_BASE_URL}/check_appt_slots"
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, params={"start_time": start_time, "end_time": end_time})
-                response.raise_for_status()
-                data = response.json()
-                print(f"Available slots: {data}")
-                return data["slots"]
+            if summary:
+                result = await self.data_backend.get_availability_summary(start_time, end_time)
+            else:
+                result = await self.data_backend.get_available_slots(start_time, end_time, limit, offset)
+            print(f"Available slots: {result}")
+            return result
         except httpx.HTTPStatusError as e:
             print(f"HTTP error while checking appointment slots: {e}")
-            return []
         except Exception as e:
             print(f"Unexpected error: {e}")
-            return []
-
-def get_formatted_string(func_name, func_args, func_result):
-    """
-    Function to get the formatted string for the function call.
-    """
-
-    if func_name == "fetch_insurance_status":
-        accepted = func_result
-        provider = func_args.get("name", "that provider")
-
-        formatted_string = ""
-        if accepted:
-            formatted_string = f"Good news, we do accept {provider} insurance."
-        else:
-            formatted_string = f"Unfortunately, we do not carry or accept {provider} insurance."
-
-        return formatted_string
-    
-    elif func_name == "check_appt_slots":
-        
-        slots = func_result
-        if not slots:
-            return "I'm sorry, there are no available appointment slots during that time range."
-
-        # Convert to TZ-4 (e.g., New York)
-        eastern = ZoneInfo("America/New_York")
-        formatted_times = []
-
-        for slot in slots:
-            # Parse ISO string, convert to local TZ, and format
-            dt = datetime.fromisoformat(slot["start_time"]).astimezone(eastern)
-            formatted = dt.strftime("%m-%d %I:%M%p").lstrip("0").replace(" 0", " ")
-            formatted_times.append(formatted)
-
-        times_list = ", ".join(formatted_times)
-        return f"Here are the corresponding available appointment times: [{times_list}]"
+        return {"total": 0, "days": [], "openings": []} if summary else {"slots": [], "next_offset": None}
@@ -1,39 +1,191 @@
+import time
+# Startup is measured from here (the app's own imports) until the worker reports ready
+IMPORT_STARTED = time.perf_counter()
+
 import asyncio
 import os
-import uuid
+import re
 import json
-import uvicorn
 import httpx
+from contextlib import asynccontextmanager
 from zoneinfo import ZoneInfo
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import Response
-from openai import OpenAI
-from dotenv import load_dotenv
+from fastapi import APIRouter, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, Response
 from starlette.responses import HTMLResponse
 from datetime import datetime, timezone
 from assistants.front_desk_assistant import FrontDeskAssistant
-from twilio.rest import Client
-
-# Initialize once at top level
-twilio_client = Client(
-    os.getenv("TWILIO_ACCOUNT_SID"),
-    os.getenv("TWILIO_AUTH_TOKEN")
+from gpt_agent import GPTAgent
+from prefetch import ToolPrefetcher
+from faq_cache import FaqCache
+from utils.config import (
+    TWILIO_API_BASE_URL, INSURANCE_PROVIDERS_REFRESH_SECONDS, PREFETCH_ENABLED, FAQ_CACHE_ENABLED, CALL_SUMMARY_ENABLED,
+    ELEVENLABS_VOICE_ID, OPENAI_API_KEY, HTTP_MAX_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY, STARTUP_WARMUP_TIMEOUT_SECONDS,
+    SERVER_HOST, SERVER_PORT, SERVER_RELOAD, SERVER_WORKERS
 )
+from utils.http_client import create_http_client
+from models.data_backend import create_data_backend
+from models.session_store import create_session_store
+from models.job_queue import create_job_queue
+from models.tts import create_audio_cache
+from utils import metrics
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+# Clients and services, all created in the app lifespan: the shared pooled HTTP client, the OpenAI client,
+# the tools' data backend, the agent, the call session store, the background job queue,
+# the synthesized audio cache and the precomputed answers to common front-desk questions
+http_client = None
+openai_client = None
+data_backend = None
+gpt_agent = None
+session_store = None
+job_queue = None
+audio_cache = None
+faq_cache = None
+
+# Set once the warm-up has run (see /ready); per-phase startup timings in seconds
+ready = False
+startup_timings = {}
+
+
+def create_openai_client():
+    """
+    The async OpenAI client (so completions don't block the event loop for other calls).
+    The SDK is imported here rather than at module level; its connections are kept alive
+    as long as our other pooled connections, so the warm-up's connection is still open for the first call.
+    """
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=DefaultAsyncHttpxClient(limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ))
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_client, openai_client, data_backend, gpt_agent, session_store, job_queue, audio_cache, faq_cache, ready
+    started = time.perf_counter()
+    record_startup("import", IMPORT_SECONDS)
+    metrics.configure_logs()
+    session_store = create_session_store()
+    await session_store.start()
+    http_client = create_http_client()
+    openai_client = create_openai_client()
+    audio_cache = create_audio_cache(http_client)
+    data_backend = create_data_backend(http_client)
+    await data_backend.start()
+    # Builds the tool registry and schemas once; warm_up() fills in the catalog-dependent parts
+    gpt_agent = GPTAgent(openai_client, data_backend)
+    faq_cache = FaqCache(FrontDeskAssistant) if FAQ_CACHE_ENABLED else None
+    job_queue = create_job_queue()
+    job_queue.register("start_recording", start_recording)
+    job_queue.register("log_call", log_call)
+    await job_queue.start()
+    record_startup("lifespan", time.perf_counter() - started)
+    warm_up_task = asyncio.create_task(warm_up())
+    refresh_task = asyncio.create_task(refresh_insurance_providers())
+    yield
+    ready = False
+    warm_up_task.cancel()
+    refresh_task.cancel()
+    await job_queue.close()
+    await data_backend.close()
+    await http_client.aclose()
+    await openai_client.close()
+    await session_store.close()
+    metrics.close_logs()
+
+
+async def warm_up():
+    """
+    Open the connections the first call will use (OpenAI, the data service) and load the agent's
+    catalog data, each step bounded by STARTUP_WARMUP_TIMEOUT_SECONDS, then report ready.
+    A failed step is logged but doesn't hold up readiness: the worker runs without what it would have
+    loaded (the insurance enum is retried by the periodic refresh) and connects on first use.
+    """
+    global ready
+    started = time.perf_counter()
+    steps = {
+        "openai": openai_client.models.retrieve(gpt_agent.model),
+        "insurance_providers": gpt_agent.refresh_insurance_providers(),
+        "filler_clips": gpt_agent.refresh_filler_clips(),
+    }
+    results = await asyncio.gather(
+        *(asyncio.wait_for(step, STARTUP_WARMUP_TIMEOUT_SECONDS) for step in steps.values()),
+        return_exceptions=True
+    )
+    for name, result in zip(steps, results):
+        if isinstance(result, Exception):
+            print(f"Warm-up step {name} failed: {result!r}")
+        metrics.STARTUP_STEPS.labels(name, "failed" if isinstance(result, Exception) else "ok").inc()
+    record_startup("warm_up", time.perf_counter() - started)
+    record_startup("total", time.perf_counter() - IMPORT_STARTED)
+    ready = True
+    print(f"Ready in {startup_timings['total']:.2f}s: {startup_timings}")
 
 
-from dotenv import load_dotenv
-load_dotenv()
+def record_startup(phase: str, seconds: float):
+    startup_timings[phase] = round(seconds, 3)
+    metrics.STARTUP_SECONDS.labels(phase).set(seconds)
 
-# Initialize OpenAI client
-openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# Store active sessions
-sessions = {}
+async def refresh_insurance_providers():
+    """Keep the agent's insurance enum in sync with the data service's catalog (first loaded by warm_up())."""
+    while True:
+        await asyncio.sleep(INSURANCE_PROVIDERS_REFRESH_SECONDS)
+        try:
+            await gpt_agent.refresh_insurance_providers()
+        except Exception as e:
+            print(f"Failed to refresh insurance providers: {e}")
 
-# Create FastAPI app
-app = FastAPI()
 
-@app.post("/incoming-call")
+router = APIRouter()
+
+
+def create_app() -> FastAPI:
+    """App factory (uvicorn main:create_app --factory); clients are created by the lifespan, not at import."""
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(router)
+    return app
+
+
+@router.get("/metrics")
+async def get_metrics():
+    content, content_type = metrics.render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+# Readiness probe: passes once the worker has warmed up, and fails again while it shuts down
+@router.get("/ready")
+async def get_ready():
+    if not ready:
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"status": "ready", "startup_seconds": startup_timings}
+
+
+# Synthesized speech, content-addressed: a key's audio never changes, so clients may cache it forever
+@router.get("/tts/{key}.mp3")
+async def get_tts_audio(key: str):
+    if not re.fullmatch(r"[0-9a-f]{64}", key):
+        raise HTTPException(status_code=404)
+    try:
+        path = await audio_cache.wait(key)
+    except Exception as e:
+        print(f"Failed to synthesize {key}: {e}")
+        raise HTTPException(status_code=502, detail="Speech synthesis failed")
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404)
+    return FileResponse(path, media_type="audio/mpeg", headers={
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{key}"'
+    })
+
+
+@router.post("/incoming-call")
 async def incoming_call():
     print("POST TwiML")
     service_url = os.environ.get("NGROK_URL")
@@ -42,21 +194,179 @@ async def incoming_call():
         from urllib.parse import urlparse
         service_url = urlparse(service_url).netloc
         print("service_url: ", service_url)
+    # A prerendered greeting is played before connecting; otherwise ConversationRelay speaks it
+    audio = audio_cache.cached(FrontDeskAssistant.greeting, ELEVENLABS_VOICE_ID, "elevenlabs")
+    play = f"<Play>{audio_cache.url(audio)}</Play>" if audio else ""
+    greeting = "" if audio else f'welcomeGreeting="{FrontDeskAssistant.greeting}" welcomeGreetingInterruptible="none" '
     tmpl = """<?xml version="1.0" encoding="UTF-8"?>
 <Response>
-  <Connect>
-    <ConversationRelay url="wss://{service_url}/twilio-ws" welcomeGreeting="{greeting}" welcomeGreetingInterruptible="none" ttsProvider="ElevenLabs" voice="{voice_id}" hints="cigna" transcriptionProvider="Deepgram" speechModel ="nova-2-general" preemptible="true"></ConversationRelay>
+  {play}<Connect>
+    <ConversationRelay url="wss://{service_url}/twilio-ws" {greeting}ttsProvider="ElevenLabs" voice="{voice_id}" hints="cigna" transcriptionProvider="Deepgram" speechModel ="nova-2-general" preemptible="true" partialPrompts="true"></ConversationRelay>
   </Connect>
 </Response>
     """
-    return HTMLResponse(content=tmpl.format(service_url=service_url, greeting=FrontDeskAssistant.greeting, voice_id=os.getenv("ELEVENLABS_VOICE_ID")), media_type="application/xml")
+    return HTMLResponse(content=tmpl.format(service_url=service_url, play=play, greeting=greeting, voice_id=os.getenv("ELEVENLABS_VOICE_ID")), media_type="application/xml")
+
+
+async def start_recording(call_sid: str):
+    """Ask Twilio to start recording the call (background job; raises on errors worth retrying)."""
+    account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+    auth = (account_sid, auth_token)
+    url = f"{TWILIO_API_BASE_URL}/2010-04-01/Accounts/{account_sid}/Calls/{call_sid}/Recordings.json"
+    response = await http_client.post(url, auth=auth)
+    if response.status_code == 201:
+        print("Recording started successfully!")
+        print(response.json())
+    elif response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+    else:
+        # e.g. the call already ended; retrying won't help
+        print("Failed to start recording:", response.text)
+
+
+async def log_call(call_sid: str, metadata: dict, messages: list):
+    """Write the finished call (and a post-call summary) to the call log (background job)."""
+    summary = await gpt_agent.summarize_call(messages) if CALL_SUMMARY_ENABLED else None
+    metrics.call_logger.info(json.dumps({
+        "callSid": call_sid,
+        "metadata": metadata,
+        "endedAt": datetime.now(timezone.utc).isoformat(),
+        "summary": summary,
+        "messages": messages,
+    }))
 
 
-@app.websocket("/twilio-ws")
+class Turn:
+    """
+    One in-flight assistant reply, run as a task so the caller can barge in.
+    Tracks what was sent so the conversation history matches what was actually spoken.
+    """
+
+    def __init__(self, call_sid: str):
+        self.call_sid = call_sid
+        self.task = None
+        self.sent = ""
+        self.heard = None
+        self.message = None
+        # Writing the turn's messages to the session store (see run_turn)
+        self.saved = None
+
+
+async def run_turn(websocket: WebSocket, conversation: list, turn: Turn, prefetcher: ToolPrefetcher = None):
+    """Stream the assistant's reply to ConversationRelay and record it in the conversation."""
+    # Everything from the caller's prompt onwards is persisted when the turn ends
+    turn_start = len(conversation) - 1
+    with metrics.turn_trace(turn.call_sid) as trace:
+        try:
+            with metrics.span("faq_lookup"):
+                answer = faq_cache.answer(conversation[-1]["content"], conversation[:-1]) if faq_cache else None
+            reply = static_reply(answer) if answer else gpt_agent.handle_response(websocket, conversation, prefetcher)
+            # Forward the reply to ConversationRelay as it streams in
+            async for chunk in reply:
+                if not turn.sent:
+                    trace.record("first_audio", trace.elapsed())
+                turn.sent += chunk
+                # Pre-rendered phrase (FAQ answer, insurance reply, holding line): play the cached file
+                # instead of waiting for ConversationRelay's TTS
+                audio = audio_cache.cached(chunk.strip(), ELEVENLABS_VOICE_ID, "elevenlabs") if chunk.strip() else None
+                with metrics.span("socket_send"):
+                    if audio:
+                        await websocket.send_text(json.dumps({
+                            "type": "play",
+                            "source": audio_cache.url(audio)
+                        }))
+                    else:
+                        await websocket.send_text(
+                            json.dumps({
+                                "type": "text",
+                                "token": chunk,
+                                "last": False
+                            })
+                        )
+            await end_reply(websocket)
+            print(f"Sent response: {turn.sent}")
+        except asyncio.CancelledError:
+            print(f"Turn cancelled after sending: {turn.sent}")
+            raise
+        except Exception as e:
+            print(f"Error while handling turn: {e}")
+            trace.outcome = "error"
+            try:
+                await end_reply(websocket)
+            except Exception as e:
+                print(f"Failed to close the reply: {e}")
+        finally:
+            spoken = turn.heard if turn.heard is not None else turn.sent
+            if spoken:
+                turn.message = {"role": "assistant", "content": spoken}
+                conversation.append(turn.message)
+            # Shielded: a newer prompt or a hang-up cancelling this turn mid-save must not lose its messages
+            turn.saved = asyncio.ensure_future(save_turn(turn.call_sid, conversation[turn_start:]))
+            await asyncio.shield(turn.saved)
+
+
+async def save_turn(call_sid: str, messages: list):
+    try:
+        await session_store.append(call_sid, messages)
+    except Exception as e:
+        print(f"Failed to save turn for {call_sid}: {e}")
+
+
+async def end_reply(websocket: WebSocket):
+    # Close the turn whatever happened, so ConversationRelay (and the caller's turn-taking) moves on
+    await websocket.send_text(
+        json.dumps({
+            "type": "text",
+            "token": "",
+            "last": True
+        })
+    )
+
+
+async def static_reply(text: str):
+    yield text
+
+
+async def cancel_turn(turn: Turn, heard: str = None):
+    """Cancel an in-flight turn (LLM stream and any pending tool request) and wait for it to wind down."""
+    if turn is None or turn.task is None:
+        return
+    if heard is not None:
+        turn.heard = heard
+    if turn.task.done():
+        # Everything was sent but TTS was still speaking: trim the recorded reply, once it has been saved
+        if heard is not None and turn.message is not None:
+            turn.message["content"] = heard
+            if turn.saved is not None:
+                await turn.saved
+            await session_store.amend_last(turn.call_sid, turn.message)
+        return
+    turn.task.cancel()
+    try:
+        await turn.task
+    except asyncio.CancelledError:
+        pass
+    # The turn's save outlives its cancellation; finish it before anything else is written for the call
+    if turn.saved is not None:
+        await turn.saved
+
+
+def create_prefetcher(call_start: datetime):
+    """Per-call speculative tool prefetcher (None when disabled)."""
+    if not PREFETCH_ENABLED:
+        return None
+    return ToolPrefetcher(data_backend, gpt_agent.insurance_providers, call_start)
+
+
+@router.websocket("/twilio-ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time communication"""
     await websocket.accept()
     call_sid = None
+    conversation = None
+    turn = None
+    prefetcher = None
     
     try:
         while True:
@@ -68,68 +378,77 @@ async def websocket_endpoint(websocket: WebSocket):
             if message["type"] == "setup":
                 call_sid = message["callSid"]
                 print(f"Setup for call: {call_sid}")
-                websocket.call_sid = call_sid
-
-                # Record call:
-                account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-                auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-                auth = (account_sid, auth_token)
-                url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Calls/{call_sid}/Recordings.json"
-                response = httpx.post(url, auth=auth)
-                if response.status_code == 201:
-                    print("Recording started successfully!")
-                    print(response.json())
-                else:
-                    print("Failed to start recording:", response.text)
-
-                # # 🟢 Start recording this call
-                # try:
-                #     twilio_client.calls(call_sid).update(record=True)
-                #     print(f"Recording started for call {call_sid}")
-                # except Exception as e:
-                #     print(f"Failed to start recording for {call_sid}: {e}")
-                
                 now = datetime.now(ZoneInfo("America/New_York"))
-                formatted_time = now.strftime("%A, %B %-d, %-I:%M%p").lower().replace("pm", "pm").replace("am", "am")
+
+                # A reconnect may land on any worker; pick up the call where it left off
+                session = await session_store.load(call_sid)
+                if session is not None:
+                    print(f"Resuming call {call_sid} with {len(session['messages'])} messages")
+                    conversation = session["messages"]
+                    started_at = session["metadata"].get("startedAt")
+                    prefetcher = create_prefetcher(datetime.fromisoformat(started_at) if started_at else now)
+                    continue
+
+                # Record call (as a background job, so Twilio latency or errors never hold up the first turn)
+                job_queue.submit("start_recording", call_sid=call_sid)
+
+                formatted_time = now.strftime("%A, %B %-d, %Y, %-I:%M%p").lower().replace("pm", "pm").replace("am", "am")
                 # Capitalize the first letter manually
                 formatted_time_nice = formatted_time[0].upper() + formatted_time[1:]
 
-                full_system_prompt = (
-                    FrontDeskAssistant.system_prompt +
-                    f"\nAt the beginning of this call, the time and date was: {formatted_time_nice} | {formatted_time}"
-                )
-                sessions[call_sid] = [{"role": "system", "content": full_system_prompt}]
+                # Keep the shared system prompt byte-identical across calls (prompt caching);
+                # per-call details go in a separate message after it
+                conversation = [
+                    {"role": "system", "content": FrontDeskAssistant.system_prompt},
+                    {"role": "system", "content": f"At the beginning of this call, the time and date was: {formatted_time_nice} | {formatted_time} (ISO date {now.date().isoformat()}, America/New_York)"}
+                ]
+                metadata = {key: value for key, value in message.items() if key != "type"}
+                metadata["startedAt"] = now.isoformat()
+                await session_store.create(call_sid, metadata, conversation)
+                prefetcher = create_prefetcher(now)
+
+            elif message["type"] == "prompt" and not message.get("last", True):
+                # Partial transcript: the caller is still talking, start any lookups it hints at
+                if prefetcher:
+                    prefetcher.observe(message["voicePrompt"])
 
             elif message["type"] == "prompt":
                 print(f"Processing prompt: {message['voicePrompt']}")
-                print(f"Current sessions:\n\n {sessions}")
-                conversation = sessions[websocket.call_sid]
+                if prefetcher:
+                    prefetcher.observe(message["voicePrompt"])
+                # A newer prompt supersedes whatever we were still saying; cancel first so the
+                # interrupted reply is recorded before this prompt
+                await cancel_turn(turn)
                 conversation.append({"role": "user", "content": message["voicePrompt"]})
-                
-                conversation, response = await gpt_agent.handle_response(websocket, conversation)
-                conversation.append({"role": "assistant", "content": response})
-                
-                await websocket.send_text(
-                    json.dumps({
-                        "type": "text",
-                        "token": response,
-                        "last": True
-                    })
-                )
-                print(f"Sent response: {response}")
-                
+                turn = Turn(call_sid)
+                turn.task = asyncio.create_task(run_turn(websocket, conversation, turn, prefetcher))
+
             elif message["type"] == "interrupt":
                 print("Handling interruption.")
+                # Stop generation/tool calls and keep only what the caller actually heard
+                await cancel_turn(turn, heard=message.get("utteranceUntilInterrupt", ""))
                 
             else:
                 print(f"Unknown message type received: {message['type']}")
                 
     except WebSocketDisconnect:
         print("WebSocket connection closed")
+    finally:
+        await cancel_turn(turn)
+        if prefetcher:
+            prefetcher.close()
         if call_sid:
-            sessions.pop(call_sid, None)
+            # The session is kept so a reconnect can resume the call; the TTL sweep evicts it once abandoned.
+            # A resumed call is logged again with its full transcript under the same callSid.
+            session = await session_store.load(call_sid)
+            if session is not None:
+                job_queue.submit("log_call", call_sid=call_sid, metadata=session["metadata"], messages=session["messages"])
+
 
+app = create_app()
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=5050, reload=True)
\ No newline at end of file
+    import uvicorn
+    uvicorn.run("main:create_app", factory=True, host=SERVER_HOST, port=SERVER_PORT, reload=SERVER_RELOAD,
+                workers=SERVER_WORKERS)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import os
+import sys
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+import httpx
+from utils.config import DATA_BACKEND, POSTGRESQL_BASE_URL, POSTGRESQL_SERVICE_DIR
+from utils.metrics import current_call_sid
+
+
+class DataBackend(ABC):
+    """Where GPTAgent's tools get their data from. Both implementations honour the postgresql service contract."""
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def find_insurance(self, name: str) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    async def list_insurance_providers(self) -> list:
+        pass
+
+    @abstractmethod
+    async def get_available_slots(self, start_time: str, end_time: str, limit: int = None, offset: int = 0) -> dict:
+        """One page of open slots: {"slots": [...], "next_offset": int or None}. limit=None means the service's cap."""
+        pass
+
+    @abstractmethod
+    async def list_filler_clips(self, family: str) -> list:
+        """Absolute URLs of the filler clips in a family (served by the data service's /filler)."""
+        pass
+
+    @abstractmethod
+    async def get_availability_summary(self, start_time: str, end_time: str, first_n: int = 3) -> dict:
+        """Open slot counts per day and half-day plus the first few openings."""
+        pass
+
+
+class HttpDataBackend(DataBackend):
+    """Calls the postgresql FastAPI service (postgresql/app.py) over the shared HTTP client."""
+
+    def __init__(self, http_client: httpx.AsyncClient, base_url: str = POSTGRESQL_BASE_URL):
+        self.http_client = http_client
+        self.base_url = base_url
+
+    def _headers(self) -> dict:
+        # Lets the data service tag its request traces with the call they belong to
+        call_sid = current_call_sid.get()
+        return {"X-Call-Sid": call_sid} if call_sid else {}
+
+    async def find_insurance(self, name: str) -> Optional[dict]:
+        response = await self.http_client.get(f"{self.base_url}/get_insurance_status", params={"name": name}, headers=self._headers())
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def list_insurance_providers(self) -> list:
+        response = await self.http_client.get(f"{self.base_url}/insurance_providers")
+        response.raise_for_status()
+        return response.json()["providers"]
+
+    async def get_available_slots(self, start_time: str, end_time: str, limit: int = None, offset: int = 0) -> dict:
+        params = {"start_time": start_time, "end_time": end_time, "offset": offset}
+        if limit is not None:
+            params["limit"] = limit
+        response = await self.http_client.get(f"{self.base_url}/check_appt_slots", params=params, headers=self._headers())
+        response.raise_for_status()
+        return response.json()
+
+    async def list_filler_clips(self, family: str) -> list:
+        response = await self.http_client.get(f"{self.base_url}/filler")
+        response.raise_for_status()
+        return [f"{self.base_url}{clip['path']}" for clip in response.json()["families"].get(family, [])]
+
+    async def get_availability_summary(self, start_time: str, end_time: str, first_n: int = 3) -> dict:
+        response = await self.http_client.get(
+            f"{self.base_url}/appt_slots_summary",
+            params={"start_time": start_time, "end_time": end_time, "first_n": first_n},
+            headers=self._headers()
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+class InProcessDataBackend(DataBackend):
+    """
+    Runs the postgresql service's query functions in this process, sharing its asyncpg pool.
+    Results are shaped exactly like the HTTP responses so callers can't tell the difference.
+    """
+
+    def __init__(self, service_dir: str = POSTGRESQL_SERVICE_DIR):
+        if service_dir not in sys.path:
+            sys.path.append(service_dir)
+        from server.pool import get_pool, close_pool
+        from server.caches import start_caches, stop_caches
+        from server.queries.insurances import find_insurance, list_insurance_providers
+        from server.queries.appointments import get_available_time_slots, get_availability_summary, MAX_SLOTS_PER_REQUEST
+        from server.filler import FillerLibrary, FILLER_DIR
+
+        self._get_pool = get_pool
+        self._close_pool = close_pool
+        self._start_caches = start_caches
+        self._stop_caches = stop_caches
+        self._find_insurance = find_insurance
+        self._list_insurance_providers = list_insurance_providers
+        self._get_available_time_slots = get_available_time_slots
+        self._get_availability_summary = get_availability_summary
+        self.max_slots = MAX_SLOTS_PER_REQUEST
+        # Clips are still fetched from the data service over HTTP; only the manifest is read locally
+        self.filler_library = FillerLibrary(os.path.join(service_dir, FILLER_DIR))
+
+    async def start(self):
+        await self._start_caches(await self._get_pool())
+
+    async def close(self):
+        await self._stop_caches()
+        await self._close_pool()
+
+    async def find_insurance(self, name: str) -> Optional[dict]:
+        return await self._find_insurance(name)
+
+    async def list_insurance_providers(self) -> list:
+        return await self._list_insurance_providers()
+
+    async def get_available_slots(self, start_time: str, end_time: str, limit: int = None, offset: int = 0) -> dict:
+        limit = min(limit or self.max_slots, self.max_slots)
+        rows = await self._get_available_time_slots(
+            datetime.fromisoformat(start_time),
+            datetime.fromisoformat(end_time),
+            limit + 1,
+            offset
+        )
+        return {
+            "slots": [_serialize(row) for row in rows[:limit]],
+            "next_offset": offset + limit if len(rows) > limit else None
+        }
+
+    async def list_filler_clips(self, family: str) -> list:
+        self.filler_library.load()
+        return [f"{POSTGRESQL_BASE_URL}{clip['path']}" for clip in self.filler_library.manifest().get(family, [])]
+
+    async def get_availability_summary(self, start_time: str, end_time: str, first_n: int = 3) -> dict:
+        summary = await self._get_availability_summary(
+            datetime.fromisoformat(start_time),
+            datetime.fromisoformat(end_time),
+            first_n
+        )
+        return {**summary, "openings": [_serialize(row) for row in summary["openings"]]}
+
+
+def _serialize(row: dict) -> dict:
+    return {**row, "start_time": row["start_time"].isoformat()}
+
+
+# Mapping for backend lookup
+BACKEND_MAP = {
+    'http': lambda http_client: HttpDataBackend(http_client),
+    'inprocess': lambda http_client: InProcessDataBackend(),
+}
+
+
+def create_data_backend(http_client: httpx.AsyncClient, backend: str = DATA_BACKEND) -> DataBackend:
+    if backend not in BACKEND_MAP:
+        raise ValueError(f"Unknown DATA_BACKEND '{backend}', expected one of {sorted(BACKEND_MAP)}")
+    return BACKEND_MAP[backend](http_client)
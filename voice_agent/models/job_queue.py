@@ -0,0 +1,231 @@
+import asyncio
+import json
+import random
+from abc import ABC, abstractmethod
+from utils.config import (
+    JOB_WORKERS, JOB_QUEUE_SIZE, JOB_MAX_ATTEMPTS, JOB_BACKOFF_SECONDS, JOB_BACKOFF_MAX_SECONDS,
+    JOB_TIMEOUT_SECONDS, JOB_SPILL, JOB_SPILL_POLL_SECONDS, JOB_DRAIN_SECONDS, DATABASE_URL
+)
+from utils import metrics
+
+
+class JobSpill(ABC):
+    """Durable overflow for jobs that can't be run in this process right now (queue full, shutting down)."""
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def save(self, jobs: list):
+        pass
+
+    @abstractmethod
+    async def claim(self, limit: int) -> list:
+        """Take up to `limit` spilled jobs out of the spill, oldest first."""
+        pass
+
+
+class NoJobSpill(JobSpill):
+    """No durable spill: jobs that don't fit are logged and dropped."""
+
+    async def save(self, jobs: list):
+        for job in jobs:
+            print(f"Dropping job {job['name']} (no spill configured): {job['payload']}")
+            metrics.JOBS.labels(job["name"], "dropped").inc()
+
+    async def claim(self, limit: int) -> list:
+        return []
+
+
+class PostgresJobSpill(JobSpill):
+    """Spilled jobs in Postgres (table from postgresql/scripts/create_job_spill_table.sql), claimable by any worker."""
+
+    def __init__(self, database_url: str = DATABASE_URL):
+        self.database_url = database_url
+        self.pool = None
+
+    async def start(self):
+        import asyncpg
+        self.pool = await asyncpg.create_pool(self.database_url, min_size=1, max_size=2)
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def save(self, jobs: list):
+        if not jobs:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.executemany(
+                "INSERT INTO job_spill (name, payload, attempts) VALUES ($1, $2::jsonb, $3)",
+                [(job["name"], json.dumps(job["payload"]), job["attempts"]) for job in jobs]
+            )
+        for job in jobs:
+            metrics.JOBS.labels(job["name"], "spilled").inc()
+
+    async def claim(self, limit: int) -> list:
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                DELETE FROM job_spill
+                WHERE id IN (
+                    SELECT id FROM job_spill ORDER BY id ASC LIMIT $1 FOR UPDATE SKIP LOCKED
+                )
+                RETURNING name, payload, attempts
+                """,
+                limit
+            )
+        return [{"name": row["name"], "payload": json.loads(row["payload"]), "attempts": row["attempts"]} for row in rows]
+
+
+class JobQueue:
+    """
+    In-process queue for side-effect work that must not hold up a call: starting recordings,
+    call logs, post-call summaries. Jobs are (name, JSON payload) pairs run by a fixed pool of
+    workers; failures are retried with exponential backoff and jitter. When the queue is full or
+    the process shuts down, pending jobs go to the spill and are picked up again later.
+    """
+
+    def __init__(self, spill: JobSpill, workers: int = JOB_WORKERS, max_size: int = JOB_QUEUE_SIZE,
+                 max_attempts: int = JOB_MAX_ATTEMPTS, timeout: float = JOB_TIMEOUT_SECONDS):
+        self.spill = spill
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.handlers = {}
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self._tasks = []
+        self._retries = {}  # backoff sleep task -> job waiting to be retried
+        self._spill_tasks = set()
+        self._interrupted = []  # jobs cut off mid-run by shutdown; run again later
+        self._closing = False
+
+    def register(self, name: str, handler):
+        """handler(**payload) is awaited for every job submitted under this name."""
+        self.handlers[name] = handler
+
+    def submit(self, name: str, **payload):
+        """Queue a job without waiting. Raises KeyError for unregistered job names."""
+        if name not in self.handlers:
+            raise KeyError(f"No handler registered for job '{name}'")
+        self._enqueue({"name": name, "payload": payload, "attempts": 0})
+
+    async def start(self):
+        await self.spill.start()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._poll_spill()))
+        metrics.JOB_QUEUE_DEPTH.set_function(self.queue.qsize)
+
+    async def close(self, drain_seconds: float = JOB_DRAIN_SECONDS):
+        """Give queued jobs a short while to finish, then spill whatever is left."""
+        self._closing = True
+        try:
+            await asyncio.wait_for(self.queue.join(), drain_seconds)
+        except asyncio.TimeoutError:
+            pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        leftover = self._interrupted
+        while not self.queue.empty():
+            leftover.append(self.queue.get_nowait())
+        for task, job in self._retries.items():
+            task.cancel()
+            leftover.append(job)
+        self._retries.clear()
+        if self._spill_tasks:
+            await asyncio.gather(*self._spill_tasks, return_exceptions=True)
+        try:
+            await self.spill.save(leftover)
+        except Exception as e:
+            print(f"Failed to spill {len(leftover)} jobs on shutdown: {e}")
+        await self.spill.close()
+
+    def _enqueue(self, job: dict):
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._spill_later([job])
+
+    def _spill_later(self, jobs: list):
+        task = asyncio.create_task(self._spill(jobs))
+        self._spill_tasks.add(task)
+        task.add_done_callback(self._spill_tasks.discard)
+
+    async def _spill(self, jobs: list):
+        try:
+            await self.spill.save(jobs)
+        except Exception as e:
+            for job in jobs:
+                print(f"Failed to spill job {job['name']}: {e}")
+                metrics.JOBS.labels(job["name"], "dropped").inc()
+
+    async def _work(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                self._interrupted.append(job)
+                raise
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: dict):
+        name = job["name"]
+        job["attempts"] += 1
+        try:
+            with metrics.span("job", name):
+                await asyncio.wait_for(self.handlers[name](**job["payload"]), self.timeout)
+            metrics.JOBS.labels(name, "done").inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if job["attempts"] >= self.max_attempts:
+                print(f"Job {name} failed after {job['attempts']} attempts: {e!r}")
+                metrics.JOBS.labels(name, "failed").inc()
+                return
+            delay = min(JOB_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1), JOB_BACKOFF_MAX_SECONDS)
+            delay *= random.uniform(0.5, 1.0)
+            print(f"Job {name} failed (attempt {job['attempts']}), retrying in {delay:.1f}s: {e!r}")
+            metrics.JOBS.labels(name, "retried").inc()
+            backoff = asyncio.create_task(asyncio.sleep(delay))
+            self._retries[backoff] = job
+            backoff.add_done_callback(self._retry)
+
+    def _retry(self, backoff: asyncio.Task):
+        job = self._retries.pop(backoff, None)
+        if job is not None and not backoff.cancelled():
+            self._enqueue(job)
+
+    async def _poll_spill(self):
+        """Pull spilled jobs back in whenever the queue has room."""
+        while True:
+            free = self.queue.maxsize - self.queue.qsize()
+            if not self._closing and free > self.queue.maxsize // 2:
+                try:
+                    for job in await self.spill.claim(free - self.queue.maxsize // 2):
+                        if job["name"] in self.handlers:
+                            self._enqueue(job)
+                        else:
+                            print(f"Dropping spilled job with unknown name: {job['name']}")
+                except Exception as e:
+                    print(f"Failed to claim spilled jobs: {e}")
+            await asyncio.sleep(JOB_SPILL_POLL_SECONDS)
+
+
+# Mapping for spill lookup
+SPILL_MAP = {
+    'none': NoJobSpill,
+    'postgres': PostgresJobSpill,
+}
+
+
+def create_job_queue(spill: str = JOB_SPILL) -> JobQueue:
+    if spill not in SPILL_MAP:
+        raise ValueError(f"Unknown JOB_SPILL '{spill}', expected one of {sorted(SPILL_MAP)}")
+    return JobQueue(SPILL_MAP[spill]())
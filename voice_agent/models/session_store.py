@@ -0,0 +1,222 @@
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+from utils.config import SESSION_STORE, SESSION_TTL_SECONDS, SESSION_SWEEP_SECONDS, DATABASE_URL
+
+
+class SessionStore(ABC):
+    """
+    Per-call state: call metadata, the message history and timestamps.
+    Messages are written append-only as turns complete; only the last one can be amended
+    (to trim a reply the caller interrupted). Calls idle for longer than the TTL are evicted.
+    """
+
+    def __init__(self, ttl_seconds: float = SESSION_TTL_SECONDS, sweep_seconds: float = SESSION_SWEEP_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_seconds = sweep_seconds
+        self._sweeper = None
+
+    async def start(self):
+        self._sweeper = asyncio.create_task(self._sweep())
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    @abstractmethod
+    async def create(self, call_sid: str, metadata: dict, messages: list):
+        pass
+
+    @abstractmethod
+    async def load(self, call_sid: str) -> Optional[dict]:
+        """Return {"call_sid", "metadata", "messages", "created_at", "updated_at"} or None."""
+        pass
+
+    @abstractmethod
+    async def append(self, call_sid: str, messages: list):
+        pass
+
+    @abstractmethod
+    async def amend_last(self, call_sid: str, message: dict):
+        pass
+
+    @abstractmethod
+    async def delete(self, call_sid: str):
+        pass
+
+    @abstractmethod
+    async def evict_expired(self) -> int:
+        pass
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            try:
+                evicted = await self.evict_expired()
+                if evicted:
+                    print(f"Evicted {evicted} abandoned call sessions")
+            except Exception as e:
+                print(f"Session eviction failed: {e}")
+
+
+class InMemorySessionStore(SessionStore):
+    """Sessions in this process only. Fine for a single worker; lost on restart."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sessions = {}
+
+    async def create(self, call_sid: str, metadata: dict, messages: list):
+        now = time.time()
+        self.sessions[call_sid] = {
+            "call_sid": call_sid,
+            "metadata": metadata,
+            "messages": list(messages),
+            "created_at": now,
+            "updated_at": now,
+        }
+
+    async def load(self, call_sid: str) -> Optional[dict]:
+        session = self.sessions.get(call_sid)
+        if session is None:
+            return None
+        return {**session, "messages": list(session["messages"])}
+
+    async def append(self, call_sid: str, messages: list):
+        session = self.sessions.get(call_sid)
+        if session is not None:
+            session["messages"].extend(messages)
+            session["updated_at"] = time.time()
+
+    async def amend_last(self, call_sid: str, message: dict):
+        session = self.sessions.get(call_sid)
+        if session is not None and session["messages"]:
+            session["messages"][-1] = message
+            session["updated_at"] = time.time()
+
+    async def delete(self, call_sid: str):
+        self.sessions.pop(call_sid, None)
+
+    async def evict_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [sid for sid, session in self.sessions.items() if session["updated_at"] < cutoff]
+        for call_sid in expired:
+            del self.sessions[call_sid]
+        return len(expired)
+
+
+class PostgresSessionStore(SessionStore):
+    """
+    Sessions shared by every worker through Postgres (tables from postgresql/scripts/create_call_sessions_tables.sql).
+    One row per call plus one row per message, so a turn is a small insert rather than a rewrite of the history.
+    """
+
+    def __init__(self, database_url: str = DATABASE_URL, **kwargs):
+        super().__init__(**kwargs)
+        self.database_url = database_url
+        self.pool = None
+
+    async def start(self):
+        import asyncpg
+        self.pool = await asyncpg.create_pool(self.database_url, min_size=1, max_size=5)
+        await super().start()
+
+    async def close(self):
+        await super().close()
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def create(self, call_sid: str, metadata: dict, messages: list):
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    INSERT INTO call_sessions (call_sid, metadata)
+                    VALUES ($1, $2::jsonb)
+                    ON CONFLICT (call_sid) DO UPDATE SET metadata = EXCLUDED.metadata, updated_at = now()
+                    """,
+                    call_sid,
+                    json.dumps(metadata)
+                )
+                await conn.execute("DELETE FROM call_turns WHERE call_sid = $1", call_sid)
+                await self._insert_messages(conn, call_sid, messages)
+
+    async def load(self, call_sid: str) -> Optional[dict]:
+        async with self.pool.acquire() as conn:
+            session = await conn.fetchrow(
+                "SELECT call_sid, metadata, created_at, updated_at FROM call_sessions WHERE call_sid = $1",
+                call_sid
+            )
+            if session is None:
+                return None
+            rows = await conn.fetch(
+                "SELECT message FROM call_turns WHERE call_sid = $1 ORDER BY seq ASC",
+                call_sid
+            )
+        return {
+            "call_sid": session["call_sid"],
+            "metadata": json.loads(session["metadata"]),
+            "messages": [json.loads(row["message"]) for row in rows],
+            "created_at": session["created_at"].timestamp(),
+            "updated_at": session["updated_at"].timestamp(),
+        }
+
+    async def append(self, call_sid: str, messages: list):
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await self._insert_messages(conn, call_sid, messages)
+                await conn.execute("UPDATE call_sessions SET updated_at = now() WHERE call_sid = $1", call_sid)
+
+    async def amend_last(self, call_sid: str, message: dict):
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE call_turns SET message = $2::jsonb
+                WHERE call_sid = $1
+                  AND seq = (SELECT MAX(seq) FROM call_turns WHERE call_sid = $1)
+                """,
+                call_sid,
+                json.dumps(message)
+            )
+
+    async def delete(self, call_sid: str):
+        async with self.pool.acquire() as conn:
+            await conn.execute("DELETE FROM call_sessions WHERE call_sid = $1", call_sid)
+
+    async def evict_expired(self) -> int:
+        async with self.pool.acquire() as conn:
+            result = await conn.execute(
+                "DELETE FROM call_sessions WHERE updated_at < now() - make_interval(secs => $1)",
+                self.ttl_seconds
+            )
+        return int(result.split()[-1])
+
+    async def _insert_messages(self, conn, call_sid: str, messages: list):
+        if not messages:
+            return
+        await conn.execute(
+            """
+            INSERT INTO call_turns (call_sid, seq, message)
+            SELECT $1, COALESCE((SELECT MAX(seq) FROM call_turns WHERE call_sid = $1), 0) + t.ord, t.message::jsonb
+            FROM unnest($2::text[]) WITH ORDINALITY AS t(message, ord)
+            """,
+            call_sid,
+            [json.dumps(message) for message in messages]
+        )
+
+
+# Mapping for store lookup
+STORE_MAP = {
+    'memory': InMemorySessionStore,
+    'postgres': PostgresSessionStore,
+}
+
+
+def create_session_store(store: str = SESSION_STORE) -> SessionStore:
+    if store not in STORE_MAP:
+        raise ValueError(f"Unknown SESSION_STORE '{store}', expected one of {sorted(STORE_MAP)}")
+    return STORE_MAP[store]()
@@ -1,6 +1,161 @@
+import asyncio
+import hashlib
+import json
+import os
 from abc import ABC, abstractmethod
+from typing import Optional
+import httpx
 from twilio.twiml.voice_response import VoiceResponse, Say, Play
 from assistants.front_desk_assistant import FrontDeskAssistant
+from utils.config import (
+    PUBLIC_BASE_URL, TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, TTS_SYNTH_CONCURRENCY, TTS_SYNTH_TIMEOUT_SECONDS,
+    ELEVENLABS_API_KEY, ELEVENLABS_BASE_URL, ELEVENLABS_MODEL_ID, ELEVENLABS_VOICE_ID
+)
+
+
+def audio_key(text: str, voice: str, provider: str) -> str:
+    """Content address of a rendered phrase: the same text, voice and provider always map to the same file."""
+    spec = json.dumps([provider, voice or "", " ".join(text.split())])
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+class AudioCache:
+    """
+    Content-addressed cache of synthesized speech on local disk, served from /tts/{key}.mp3.
+    Misses are synthesized concurrently (at most TTS_SYNTH_CONCURRENCY at a time, one synthesis per key
+    however many callers want it). The directory itself is the index, so every worker sharing it sees the
+    same cache: a hit refreshes the file's mtime, and once the directory exceeds max_bytes the files with
+    the oldest mtime (least recently used, by any worker) are removed.
+    """
+
+    def __init__(self, synthesizers: dict, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES,
+                 concurrency: int = TTS_SYNTH_CONCURRENCY, base_url: str = PUBLIC_BASE_URL):
+        # provider -> async (text, voice) -> mp3 bytes
+        self.synthesizers = synthesizers
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.base_url = base_url
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pending = {}  # key -> task synthesizing it
+        # What each key says, so a /tts request for a phrase we haven't rendered yet can render it
+        self.specs = {}
+
+    def load(self):
+        """Create the directory and trim what is already there (a restart keeps the cache)."""
+        os.makedirs(self.directory, exist_ok=True)
+        count, size = self._evict()
+        print(f"TTS cache: {count} phrases, {size} bytes")
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/tts/{key}.mp3"
+
+    def cached(self, text: str, voice: str, provider: str) -> Optional[str]:
+        """The key for this phrase if its audio is already on disk."""
+        key = audio_key(text, voice, provider)
+        return key if self._touch(key) else None
+
+    def prepare(self, text: str, voice: str, provider: str) -> str:
+        """Return the phrase's key, starting its synthesis in the background if it isn't cached."""
+        key = audio_key(text, voice, provider)
+        self.specs[key] = (text, voice, provider)
+        if key not in self.pending and not os.path.exists(self.path(key)):
+            self._start(key, text, voice, provider)
+        return key
+
+    async def render(self, text: str, voice: str, provider: str) -> str:
+        """Make sure the phrase is on disk and return its key."""
+        key = self.prepare(text, voice, provider)
+        await self.wait(key)
+        return key
+
+    async def wait(self, key: str) -> Optional[str]:
+        """Path of the audio for key, waiting for an in-flight synthesis; None if there is no audio for it."""
+        if self._touch(key):
+            return self.path(key)
+        if key not in self.pending and key in self.specs:
+            self._start(key, *self.specs[key])
+        if key not in self.pending:
+            return None
+        await asyncio.shield(self.pending[key])
+        return self.path(key) if self._touch(key) else None
+
+    def _touch(self, key: str) -> bool:
+        """Mark the key's file as just used; False if it isn't on disk (never rendered, or evicted)."""
+        try:
+            os.utime(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _start(self, key: str, text: str, voice: str, provider: str):
+        task = asyncio.create_task(self._synthesize(key, text, voice, provider))
+        self.pending[key] = task
+        task.add_done_callback(lambda _: self._finished(key, task))
+
+    def _finished(self, key: str, task: asyncio.Task):
+        self.pending.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"TTS synthesis failed for {key}: {task.exception()!r}")
+
+    async def _synthesize(self, key: str, text: str, voice: str, provider: str):
+        async with self.semaphore:
+            audio = await self.synthesizers[provider](text, voice)
+        await asyncio.to_thread(self._write, key, audio)
+        self.specs.pop(key, None)
+        await asyncio.to_thread(self._evict)
+
+    def _write(self, key: str, audio: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self.path(key)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(audio)
+        os.replace(tmp, self.path(key))
+
+    def _evict(self) -> tuple:
+        """Remove the least recently used files until the directory fits max_bytes; returns (files, bytes) kept."""
+        files = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(".mp3"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # removed by another worker meanwhile
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+        files.sort()
+        size = sum(file_size for _, _, file_size in files)
+        while size > self.max_bytes and len(files) > 1:
+            _, path, file_size = files.pop(0)
+            size -= file_size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(files), size
+
+
+def elevenlabs_synthesizer(http_client: httpx.AsyncClient):
+    """ElevenLabs text-to-speech over the shared HTTP client."""
+    async def synthesize(text: str, voice: str) -> bytes:
+        response = await http_client.post(
+            f"{ELEVENLABS_BASE_URL}/v1/text-to-speech/{voice or ELEVENLABS_VOICE_ID}",
+            params={"output_format": "mp3_44100_128"},
+            headers={"xi-api-key": ELEVENLABS_API_KEY},
+            json={"text": text, "model_id": ELEVENLABS_MODEL_ID},
+            timeout=TTS_SYNTH_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        return response.content
+    return synthesize
+
+
+def create_audio_cache(http_client: httpx.AsyncClient) -> AudioCache:
+    cache = AudioCache({"elevenlabs": elevenlabs_synthesizer(http_client)})
+    cache.load()
+    return cache
 
 
 class TTSStrategy(ABC):
@@ -21,21 +176,28 @@ class TwilioGoogleStrategy(TTSStrategy):
 
 
 class ElevenLabsStrategy(TTSStrategy):
-    # Simulated audio URL generation — replace with real ElevenLabs logic
+    """Plays ElevenLabs audio from the cache; Twilio's fetch of the URL waits for synthesis on a miss."""
+
+    def __init__(self, audio_cache: AudioCache, voice: str = ELEVENLABS_VOICE_ID):
+        self.audio_cache = audio_cache
+        self.voice = voice
+
     def speak(self, response: VoiceResponse, text: str):
-        audio_url = f"https://yourdomain.com/polly/{hash(text)}.mp3"
-        response.play(audio_url)
+        key = self.audio_cache.prepare(text, self.voice, "elevenlabs")
+        response.play(self.audio_cache.url(key))
 
 
 # Mapping for strategy lookup
 STRATEGY_MAP = {
-    'twilio': TwilioCheapStrategy(),
-    'twilio-google': TwilioGoogleStrategy(),
-    '11labs': ElevenLabsStrategy()
+    'twilio': lambda audio_cache: TwilioCheapStrategy(),
+    'twilio-google': lambda audio_cache: TwilioGoogleStrategy(),
+    '11labs': lambda audio_cache: ElevenLabsStrategy(audio_cache)
 }
 
 
-def handle_tts(response: VoiceResponse, text: str):
+def handle_tts(response: VoiceResponse, text: str, audio_cache: AudioCache = None):
     model_key = FrontDeskAssistant.config.get('tts_model', 'twilio')
-    strategy = STRATEGY_MAP.get(model_key, TwilioCheapStrategy())
+    if model_key == '11labs' and audio_cache is None:
+        model_key = 'twilio'
+    strategy = STRATEGY_MAP.get(model_key, STRATEGY_MAP['twilio'])(audio_cache)
     strategy.speak(response, text)
@@ -0,0 +1,189 @@
+import asyncio
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+from utils.config import PREFETCH_TTL_SECONDS, APPT_SLOTS_PAGE_SIZE
+from utils import metrics
+
+OFFICE_TZ = ZoneInfo("America/New_York")
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+MONTH_DAY = re.compile(rf"\b({'|'.join(MONTHS)})\s+(\d{{1,2}})(?:st|nd|rd|th)?\b")
+
+
+def _words(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def resolve_days(text: str, today: date) -> Optional[tuple]:
+    """
+    Find date phrases ("tomorrow", "next friday", "this week", "june 5th") and resolve them against the
+    call's start date. Returns the (first, last) day they cover, or None.
+    """
+    text = _words(text)
+    days = []
+    if re.search(r"\btoday\b", text):
+        days.append(today)
+    if "day after tomorrow" in text:
+        days.append(today + timedelta(days=2))
+    elif re.search(r"\btomorrow\b", text):
+        days.append(today + timedelta(days=1))
+    for i, name in enumerate(WEEKDAYS):
+        if re.search(rf"\b{name}s?\b", text):
+            ahead = (i - today.weekday()) % 7 or 7
+            days.append(today + timedelta(days=ahead))
+            if f"next {name}" in text:
+                days.append(today + timedelta(days=ahead + 7))
+    if "this week" in text:
+        days += [today, today + timedelta(days=5 - today.weekday() if today.weekday() < 6 else 6)]
+    if "next week" in text:
+        monday = today + timedelta(days=7 - today.weekday())
+        days += [monday, monday + timedelta(days=5)]
+    for month, day in MONTH_DAY.findall(text):
+        try:
+            mentioned = date(today.year, MONTHS.index(month) + 1, int(day))
+        except ValueError:
+            continue
+        days.append(mentioned if mentioned >= today else mentioned.replace(year=today.year + 1))
+    return (min(days), max(days)) if days else None
+
+
+def _local(value: str) -> datetime:
+    """
+    Parse an ISO timestamp as office wall-clock time. Naive timestamps are read as server-local time,
+    the same way the data service (asyncpg and the availability index) reads them on the live tool path.
+    """
+    return datetime.fromisoformat(value).astimezone(OFFICE_TZ).replace(tzinfo=None)
+
+
+class ToolPrefetcher:
+    """
+    Starts likely tool lookups while the caller is still talking, based on cheap signals in the transcript:
+    insurance provider names and date phrases. Results live in a short-lived per-call cache, so when the model
+    asks for the same data the tool call is answered from here.
+
+    Lookups go straight to the data backend rather than through the tool handlers, which turn backend errors
+    into ordinary answers ("not accepted", "nothing open"): a failed prefetch must raise, so it is evicted
+    instead of being served as a real answer for the rest of the TTL.
+    """
+
+    def __init__(self, data_backend, insurance_providers: list, call_start: datetime, ttl: float = PREFETCH_TTL_SECONDS):
+        self.data_backend = data_backend
+        self.call_start = call_start.astimezone(OFFICE_TZ)
+        self.ttl = ttl
+        # Spoken forms of each provider: full name, plus its first word when that is distinctive ("kaiser")
+        self.provider_keys = {}
+        for provider in insurance_providers:
+            words = _words(provider).split()
+            self.provider_keys[" ".join(words)] = provider
+            if len(words[0]) >= 4:
+                self.provider_keys[words[0]] = provider
+        self.insurance = {}  # provider -> (expires, task)
+        self.slots = []      # [(expires, window_start, window_end, task)]
+
+    def observe(self, text: str):
+        """Look at a partial or final utterance and start any lookups it suggests."""
+        self._expire()
+        spoken = f" {_words(text)} "
+        for key, provider in self.provider_keys.items():
+            if f" {key} " in spoken and provider not in self.insurance:
+                self.insurance[provider] = (
+                    time.monotonic() + self.ttl,
+                    self._start(self.data_backend.find_insurance(provider))
+                )
+
+        days = resolve_days(text, self.call_start.date())
+        if days is not None:
+            start = datetime.combine(days[0], datetime.min.time())
+            end = datetime.combine(days[1], datetime.max.time().replace(microsecond=0))
+            if not any(s <= start and end <= e for _, s, e, _ in self.slots):
+                # Whole days, as many slots as the service returns in one page; get() cuts pages from it
+                task = self._start(self.data_backend.get_available_slots(
+                    start.replace(tzinfo=OFFICE_TZ).isoformat(),
+                    end.replace(tzinfo=OFFICE_TZ).isoformat(),
+                    None
+                ))
+                self.slots.append((time.monotonic() + self.ttl, start, end, task))
+
+    async def get(self, func_name: str, func_args: dict):
+        """Return the prefetched result for this tool call, or None if nothing usable was prefetched."""
+        self._expire()
+        result = None
+        if func_name == "fetch_insurance_status" and func_args.get("name") in self.insurance:
+            task = self.insurance[func_args["name"]][1]
+            if await self._settled(task):
+                # Not in the catalog, answered the same way fetch_insurance_status answers it
+                result = task.result() or {"name": func_args["name"], "accepted": False}
+        elif func_name == "check_appt_slots" and not func_args.get("summary"):
+            try:
+                start, end = _local(func_args["start_time"]), _local(func_args["end_time"])
+            except (KeyError, ValueError):
+                start = end = None
+            for _, window_start, window_end, task in self.slots:
+                if start is not None and window_start <= start and end <= window_end:
+                    if await self._settled(task):
+                        result = self._page(task.result(), start, end, func_args.get("offset", 0))
+                    break
+        metrics.PREFETCH.labels(func_name, "hit" if result is not None else "miss").inc()
+        return result
+
+    async def _settled(self, task: asyncio.Task) -> bool:
+        """
+        Wait for a prefetch. The task is shared by every turn of the call, so it is shielded: a tool timeout or
+        barge-in cancels only this wait. A prefetch that was cancelled or failed is evicted so the next
+        observe() or tool call fetches afresh. Returns whether the task produced a result.
+        """
+        try:
+            await asyncio.shield(task)
+            return True
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+        except Exception:
+            pass
+        self._evict(task)
+        return False
+
+    def _start(self, lookup) -> asyncio.Task:
+        task = asyncio.create_task(lookup)
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task: asyncio.Task):
+        # Evict failures as soon as they happen, not only when a tool call asks for them
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Prefetch failed: {task.exception()}")
+            self._evict(task)
+
+    def _evict(self, task: asyncio.Task):
+        self.insurance = {provider: entry for provider, entry in self.insurance.items() if entry[1] is not task}
+        self.slots = [entry for entry in self.slots if entry[3] is not task]
+
+    @staticmethod
+    def _page(prefetched: dict, start: datetime, end: datetime, offset: int) -> Optional[dict]:
+        """Cut the requested page out of a prefetched window, or None if the window was truncated before it."""
+        slots = prefetched["slots"]
+        if prefetched["next_offset"] is not None and (not slots or _local(slots[-1]["start_time"]) < end):
+            return None
+        matching = [slot for slot in slots if start <= _local(slot["start_time"]) <= end]
+        more = len(matching) > offset + APPT_SLOTS_PAGE_SIZE
+        return {
+            "slots": matching[offset:offset + APPT_SLOTS_PAGE_SIZE],
+            "next_offset": offset + APPT_SLOTS_PAGE_SIZE if more else None
+        }
+
+    def close(self):
+        for _, task in self.insurance.values():
+            task.cancel()
+        for _, _, _, task in self.slots:
+            task.cancel()
+        self.insurance, self.slots = {}, []
+
+    def _expire(self):
+        now = time.monotonic()
+        self.insurance = {provider: entry for provider, entry in self.insurance.items() if entry[0] > now}
+        self.slots = [entry for entry in self.slots if entry[0] > now]
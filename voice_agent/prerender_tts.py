@@ -0,0 +1,58 @@
+"""
+Render the assistant's fixed phrases into the TTS audio cache at deploy time, so they play without
+per-call synthesis: the greeting, the FAQ answers, the holding and degraded replies, and the insurance
+replies for every provider in the catalog (accepted or not, since the answer can change). A turn plays
+any phrase it finds in the cache by URL; everything else is streamed as text to ConversationRelay's TTS.
+
+Run from voice_agent/ with the same environment as the app:
+
+    python prerender_tts.py
+"""
+import asyncio
+from assistants.front_desk_assistant import FrontDeskAssistant
+from models.data_backend import create_data_backend
+from models.tts import create_audio_cache
+from tools import TIMEOUT_MESSAGE, format_insurance_status
+from utils.config import ELEVENLABS_VOICE_ID
+from utils.http_client import create_http_client
+
+
+async def collect_phrases(data_backend) -> list:
+    phrases = [
+        FrontDeskAssistant.greeting,
+        FrontDeskAssistant.holding_phrase,
+        FrontDeskAssistant.degraded_reply,
+        TIMEOUT_MESSAGE
+    ]
+    phrases += [faq["answer"] for faq in FrontDeskAssistant.faqs]
+    for provider in await data_backend.list_insurance_providers():
+        for accepted in (True, False):
+            phrases.append(format_insurance_status({"name": provider}, {"name": provider, "accepted": accepted}))
+    return list(dict.fromkeys(phrases))
+
+
+async def main():
+    http_client = create_http_client()
+    data_backend = create_data_backend(http_client)
+    try:
+        await data_backend.start()
+        phrases = await collect_phrases(data_backend)
+        audio_cache = create_audio_cache(http_client)
+        results = await asyncio.gather(
+            *(audio_cache.render(phrase, ELEVENLABS_VOICE_ID, "elevenlabs") for phrase in phrases),
+            return_exceptions=True
+        )
+        for phrase, result in zip(phrases, results):
+            if isinstance(result, Exception):
+                print(f"FAILED  {phrase!r}: {result!r}")
+            else:
+                print(f"{result[:12]}  {phrase!r}")
+        failed = sum(isinstance(result, Exception) for result in results)
+        print(f"Rendered {len(phrases) - failed}/{len(phrases)} phrases into {audio_cache.directory}")
+    finally:
+        await data_backend.close()
+        await http_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
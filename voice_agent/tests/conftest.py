@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The voice agent runs from voice_agent/ and imports its modules top-level ("from utils.config import ...")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
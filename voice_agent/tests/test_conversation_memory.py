@@ -0,0 +1,99 @@
+import json
+import pytest
+from utils.conversation_memory import ConversationMemory, MESSAGE_OVERHEAD_TOKENS
+
+SYSTEM = [
+    {"role": "system", "content": "You are the front desk assistant. " * 20},
+    {"role": "system", "content": "The call started on Monday, March 4, 2030, 9:15AM."},
+]
+
+
+@pytest.fixture
+def memory():
+    memory = ConversationMemory("gpt-4o-mini", max_tokens=400, collapse_chars=60)
+    # Count by characters (len // 4) so budgets don't depend on the tokenizer
+    memory.encoding = None
+    return memory
+
+
+def exchange(i: int) -> list:
+    return [
+        {"role": "user", "content": f"Question number {i}: do you have anything open on day {i}?"},
+        {"role": "assistant", "content": f"Let me see what we have on day {i}. " * 3},
+    ]
+
+
+def tool_round(call_id: str, result: str) -> list:
+    call = {"id": call_id, "type": "function", "function": {"name": "check_appt_slots", "arguments": "{}"}}
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [call]},
+        {"role": "tool", "tool_call_id": call_id, "content": result},
+    ]
+
+
+def cost(memory: ConversationMemory, messages: list) -> int:
+    return sum(memory.count(message) for message in messages)
+
+
+def test_short_conversations_are_sent_whole(memory):
+    conversation = SYSTEM + exchange(1)
+    assert memory.build(conversation) == conversation
+
+
+def test_system_prefix_is_sent_unchanged(memory):
+    built = memory.build(SYSTEM + [message for i in range(30) for message in exchange(i)])
+    assert built[:len(SYSTEM)] == SYSTEM
+    assert built[len(SYSTEM)]["role"] != "system"
+
+
+def test_oldest_messages_are_dropped_to_fit_the_budget(memory):
+    history = [message for i in range(30) for message in exchange(i)]
+    built = memory.build(SYSTEM + history)
+    kept = built[len(SYSTEM):]
+    assert cost(memory, built) <= memory.max_tokens
+    # The most recent messages are kept, in order, and adding the next older one would overflow
+    assert kept == history[-len(kept):]
+    assert cost(memory, built) + memory.count(history[-len(kept) - 1]) > memory.max_tokens
+
+
+def test_the_latest_message_is_kept_even_over_budget(memory):
+    prompt = {"role": "user", "content": "word " * 2000}
+    assert memory.build(SYSTEM + exchange(1) + [prompt]) == SYSTEM + [prompt]
+
+
+def test_tool_calls_stay_with_their_results(memory):
+    history = []
+    for i in range(20):
+        history += exchange(i) + tool_round(f"call_{i}", "short result")
+    kept = memory.build(SYSTEM + history)[len(SYSTEM):]
+    assert kept[0]["role"] != "tool"
+    for i, message in enumerate(kept):
+        if message["role"] == "tool":
+            assert kept[i - 1]["tool_calls"][0]["id"] == message["tool_call_id"]
+
+
+def test_earlier_tool_output_is_collapsed(memory):
+    slots = json.dumps([{"start_time": f"2030-03-04T{hour:02d}:00:00"} for hour in range(9, 17)])
+    conversation = SYSTEM + tool_round("call_1", slots) + exchange(1) + tool_round("call_2", slots)
+    built = memory.build(conversation)
+    earlier, latest = built[len(SYSTEM) + 1], built[-1]
+    assert earlier["content"].endswith(" ... (truncated)")
+    assert len(earlier["content"]) <= memory.collapse_chars + len(" ... (truncated)")
+    # Cut at a comma, not mid-value
+    assert slots.startswith(earlier["content"][:-len(" ... (truncated)")] + ",")
+    # The latest result is what the model answers from, so it is sent whole; the conversation itself is untouched
+    assert latest["content"] == slots
+    assert conversation[len(SYSTEM) + 1]["content"] == slots
+
+
+def test_counts_include_tool_calls(memory):
+    message = tool_round("call_1", "")[0]
+    assert memory.count(message) == MESSAGE_OVERHEAD_TOKENS + len(json.dumps(message["tool_calls"])) // 4
+
+
+def test_count_cache_is_bounded():
+    memory = ConversationMemory("gpt-4o-mini", cache_size=5)
+    memory.encoding = None
+    for i in range(20):
+        memory.count({"role": "user", "content": f"message {i}"})
+    assert len(memory._token_counts) == 5
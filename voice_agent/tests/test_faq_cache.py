@@ -0,0 +1,69 @@
+import pytest
+from assistants.front_desk_assistant import FrontDeskAssistant
+from faq_cache import FaqCache, stands_alone
+
+SYSTEM = [{"role": "system", "content": FrontDeskAssistant.system_prompt}]
+ANSWERS = {faq["intent"]: faq["answer"] for faq in FrontDeskAssistant.faqs}
+
+
+@pytest.fixture
+def faq_cache():
+    return FaqCache(FrontDeskAssistant)
+
+
+@pytest.mark.parametrize("prompt, intent", [
+    ("Where are you located?", "address"),
+    ("Um, hi, what's your address?", "address"),
+    ("What are your office hours?", "hours"),
+    ("What time do you close?", "hours"),
+    ("Are you open on Sundays?", "sundays"),
+    ("Are you open Saturdays?", "saturdays"),
+])
+def test_answers_standalone_questions(faq_cache, prompt, intent):
+    assert faq_cache.answer(prompt, SYSTEM) == ANSWERS[intent]
+
+
+@pytest.mark.parametrize("prompt", [
+    "What is your email address?",
+    "What's your mailing address?",
+    "What's your phone number?",
+    "What is your fax number?",
+    "What is your website?",
+    "Are you open on Christmas?",
+    "How late are you open on Saturday?",
+    "What are your hours on Saturday?",
+    "Can I book an appointment for Saturday?",
+])
+def test_near_misses_go_to_the_model(faq_cache, prompt):
+    assert faq_cache.answer(prompt, SYSTEM) is None
+
+
+@pytest.mark.parametrize("prompt", ["And on Saturday?", "What about Sunday?", "Or Saturday then?"])
+def test_follow_ups_go_to_the_model(faq_cache, prompt):
+    history = SYSTEM + [
+        {"role": "user", "content": "What are your hours?"},
+        {"role": "assistant", "content": ANSWERS["hours"]},
+    ]
+    assert faq_cache.answer(prompt, history) is None
+
+
+def test_no_answer_while_a_tool_flow_is_in_progress(faq_cache):
+    history = SYSTEM + [
+        {"role": "user", "content": "Do you have anything on Tuesday?"},
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": "call_1", "type": "function", "function": {"name": "check_appt_slots", "arguments": "{}"}}
+        ]},
+        {"role": "tool", "tool_call_id": "call_1", "content": "{\"slots\": []}"},
+        {"role": "assistant", "content": "Tuesday is full. Would another day work?"},
+    ]
+    assert not stands_alone(history)
+    assert faq_cache.answer("Are you open Saturdays?", history) is None
+
+
+def test_answers_after_a_turn_without_tools(faq_cache):
+    history = SYSTEM + [
+        {"role": "user", "content": "Where are you located?"},
+        {"role": "assistant", "content": ANSWERS["address"]},
+    ]
+    assert stands_alone(history)
+    assert faq_cache.answer("What time do you close?", history) == ANSWERS["hours"]
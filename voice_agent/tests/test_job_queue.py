@@ -0,0 +1,194 @@
+import asyncio
+import pytest
+from models import job_queue
+from models.job_queue import JobQueue, JobSpill, NoJobSpill, create_job_queue
+
+
+class MemorySpill(JobSpill):
+    def __init__(self):
+        self.jobs = []
+        self.closed = False
+
+    async def save(self, jobs: list):
+        self.jobs += jobs
+
+    async def claim(self, limit: int) -> list:
+        claimed, self.jobs = self.jobs[:limit], self.jobs[limit:]
+        return claimed
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fast_timers(monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_BACKOFF_SECONDS", 0.01)
+    monkeypatch.setattr(job_queue, "JOB_BACKOFF_MAX_SECONDS", 0.02)
+    monkeypatch.setattr(job_queue, "JOB_SPILL_POLL_SECONDS", 0.01)
+
+
+async def wait_until(condition, timeout: float = 2.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_runs_submitted_jobs():
+    async def scenario():
+        queue = JobQueue(MemorySpill(), workers=2)
+        done = []
+
+        async def log_call(call_sid, duration):
+            done.append((call_sid, duration))
+
+        queue.register("log_call", log_call)
+        await queue.start()
+        queue.submit("log_call", call_sid="CA1", duration=42)
+        queue.submit("log_call", call_sid="CA2", duration=7)
+        await wait_until(lambda: len(done) == 2)
+        await queue.close()
+        return sorted(done)
+
+    assert asyncio.run(scenario()) == [("CA1", 42), ("CA2", 7)]
+
+
+def test_unregistered_job_is_rejected():
+    with pytest.raises(KeyError):
+        JobQueue(MemorySpill()).submit("nope")
+
+
+def test_failures_are_retried_until_they_succeed():
+    async def scenario():
+        queue = JobQueue(MemorySpill(), workers=1, max_attempts=5)
+        attempts = []
+
+        async def flaky(call_sid):
+            attempts.append(call_sid)
+            if len(attempts) < 3:
+                raise RuntimeError("Twilio returned 503")
+
+        queue.register("start_recording", flaky)
+        await queue.start()
+        queue.submit("start_recording", call_sid="CA1")
+        await wait_until(lambda: len(attempts) == 3)
+        await asyncio.sleep(0.05)
+        await queue.close()
+        return attempts
+
+    assert asyncio.run(scenario()) == ["CA1"] * 3
+
+
+def test_gives_up_after_max_attempts():
+    async def scenario():
+        spill = MemorySpill()
+        queue = JobQueue(spill, workers=1, max_attempts=3)
+        attempts = []
+
+        async def broken():
+            attempts.append(1)
+            raise RuntimeError("always fails")
+
+        queue.register("broken", broken)
+        await queue.start()
+        queue.submit("broken")
+        await wait_until(lambda: len(attempts) == 3)
+        await asyncio.sleep(0.05)
+        await queue.close()
+        return len(attempts), spill.jobs
+
+    assert asyncio.run(scenario()) == (3, [])
+
+
+def test_slow_job_times_out_and_is_retried():
+    async def scenario():
+        queue = JobQueue(MemorySpill(), workers=1, max_attempts=2, timeout=0.02)
+        attempts = []
+
+        async def slow():
+            attempts.append(1)
+            await asyncio.sleep(1)
+
+        queue.register("slow", slow)
+        await queue.start()
+        queue.submit("slow")
+        await wait_until(lambda: len(attempts) == 2)
+        await queue.close(drain_seconds=0.1)
+        return len(attempts)
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_overflow_spills_and_comes_back():
+    async def scenario():
+        spill = MemorySpill()
+        queue = JobQueue(spill, workers=1, max_size=2)
+        done = []
+        release = asyncio.Event()
+
+        async def log_call(n):
+            await release.wait()
+            done.append(n)
+
+        queue.register("log_call", log_call)
+        # Not started yet: the first two jobs fill the queue, the rest overflow to the spill
+        for n in range(5):
+            queue.submit("log_call", n=n)
+        await asyncio.sleep(0)
+        spilled = [job["payload"]["n"] for job in spill.jobs]
+        await queue.start()
+        release.set()
+        await wait_until(lambda: len(done) == 5)
+        await queue.close()
+        return spilled, sorted(done)
+
+    assert asyncio.run(scenario()) == ([2, 3, 4], [0, 1, 2, 3, 4])
+
+
+def test_close_spills_unfinished_jobs():
+    async def scenario():
+        spill = MemorySpill()
+        queue = JobQueue(spill, workers=1, max_attempts=5)
+        started = asyncio.Event()
+
+        async def hang(n):
+            started.set()
+            await asyncio.sleep(10)
+
+        async def broken():
+            raise RuntimeError("retry me later")
+
+        queue.register("hang", hang)
+        queue.register("broken", broken)
+        await queue.start()
+        queue.submit("broken")
+        await wait_until(lambda: queue._retries)
+        queue.submit("hang", n=1)
+        queue.submit("hang", n=2)
+        await started.wait()
+        await queue.close(drain_seconds=0.01)
+        return spill.closed, sorted((job["name"], job["payload"].get("n", 0), job["attempts"]) for job in spill.jobs)
+
+    closed, spilled = asyncio.run(scenario())
+    assert closed
+    # The running job (cut off mid-attempt), the queued one and the one waiting to be retried
+    assert spilled == [("broken", 0, 1), ("hang", 1, 1), ("hang", 2, 0)]
+
+
+def test_spilled_jobs_with_unknown_names_are_dropped():
+    async def scenario():
+        spill = MemorySpill()
+        spill.jobs = [{"name": "retired_job", "payload": {}, "attempts": 0}]
+        queue = JobQueue(spill, workers=1)
+        await queue.start()
+        await wait_until(lambda: not spill.jobs)
+        await queue.close()
+        return queue.queue.qsize(), spill.jobs
+
+    assert asyncio.run(scenario()) == (0, [])
+
+
+def test_create_job_queue():
+    assert isinstance(create_job_queue("none").spill, NoJobSpill)
+    with pytest.raises(ValueError):
+        create_job_queue("redis")
@@ -0,0 +1,75 @@
+import pytest
+from utils.data_processing import SpeechChunker
+
+
+def stream(chunker: SpeechChunker, tokens: list) -> list:
+    chunks = []
+    for token in tokens:
+        chunks += chunker.feed(token)
+    rest = chunker.flush()
+    return chunks + ([rest] if rest else [])
+
+
+@pytest.mark.parametrize("tokens", [
+    ["Hello there. ", "How can I help?"],
+    ["We", " are", " open", " Monday", " through", " Friday", ", eight", " to", " five", ". Anything", " else?"],
+    ["Good news, we do accept Aetna insurance, and", " your plan should be covered too."],
+    list("Sure! One, two; three: four. Done?"),
+    ["No punctuation at all"],
+    [],
+])
+def test_chunks_join_back_to_the_reply(tokens):
+    assert "".join(stream(SpeechChunker(), tokens)) == "".join(tokens)
+
+
+def test_releases_at_sentence_ends():
+    chunker = SpeechChunker()
+    assert chunker.feed("Hello there.") == []  # could still be "there.com"
+    assert chunker.feed(" How") == ["Hello there."]
+    assert chunker.feed(" can I help?") == []
+    assert chunker.flush() == " How can I help?"
+
+
+def test_whitespace_goes_with_the_following_chunk():
+    assert stream(SpeechChunker(), ["One. ", "Two. ", "Three."]) == ["One.", " Two.", " Three."]
+
+
+def test_releases_long_clauses_but_not_short_ones():
+    chunker = SpeechChunker(min_clause_chars=40)
+    assert chunker.feed("Yes, we do. ") == ["Yes, we do."]
+    chunks = chunker.feed("Our earliest opening with Doctor Smith is Tuesday at nine, then")
+    assert chunks == [" Our earliest opening with Doctor Smith is Tuesday at nine,"]
+    assert chunker.flush() == " then"
+
+
+def test_short_clause_waits_for_more_text():
+    chunker = SpeechChunker(min_clause_chars=40)
+    assert chunker.feed("Sure, let me check ") == []
+    assert chunker.flush() == "Sure, let me check "
+
+
+def test_say_speaks_buffered_text_first():
+    chunker = SpeechChunker()
+    chunker.feed("Let me check")
+    assert chunker.say("One moment, please.") == ["Let me check", " One moment, please."]
+
+
+def test_say_keeps_the_phrase_whole():
+    phrase = "Good news, we do accept Aetna insurance. Anything else I can help with today?"
+    assert SpeechChunker().say(phrase) == [phrase]
+
+
+def test_text_after_a_phrase_is_spaced_from_it():
+    chunker = SpeechChunker()
+    chunks = chunker.say("One moment, please.")
+    chunks += stream(chunker, ["Fast answer."])
+    assert chunks == ["One moment, please.", " Fast answer."]
+
+
+def test_phrases_in_a_row_are_spaced():
+    chunker = SpeechChunker()
+    chunks = chunker.say("Good news, we do accept Aetna insurance.")
+    chunks += chunker.say("Unfortunately, we do not carry or accept Cigna insurance.")
+    assert "".join(chunks) == (
+        "Good news, we do accept Aetna insurance. Unfortunately, we do not carry or accept Cigna insurance."
+    )
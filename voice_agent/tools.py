@@ -0,0 +1,86 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from utils.config import TOOL_TIMEOUT_SECONDS
+
+# Office time zone (TZ-4, e.g., New York) used when reading times back to the caller
+EASTERN = ZoneInfo("America/New_York")
+
+# Spoken when a tool doesn't answer in time (and prerendered, since direct-reply tools speak it as-is)
+TIMEOUT_MESSAGE = "I'm sorry, I couldn't look that up just now."
+
+
+class Tool:
+    """
+    One entry in the agent's tool registry: the schema shown to the model, the coroutine that runs it,
+    and how its result becomes text for the conversation.
+
+    direct_reply: the formatted result is already the final answer, so it is spoken as-is
+                  instead of asking the model to rephrase it.
+    """
+
+    def __init__(self, name: str, description: str, parameters: dict, handler, formatter,
+                 direct_reply: bool = False, timeout: float = TOOL_TIMEOUT_SECONDS,
+                 timeout_message: str = TIMEOUT_MESSAGE):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+        self.handler = handler
+        self.formatter = formatter
+        self.direct_reply = direct_reply
+        self.timeout = timeout
+        self.timeout_message = timeout_message
+
+    def schema(self) -> dict:
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters
+            }
+        }
+
+
+def format_insurance_status(func_args: dict, func_result: dict) -> str:
+    accepted = func_result["accepted"]
+    # Prefer the catalog's canonical name over what the caller (or ASR) said
+    provider = func_result.get("name") or func_args.get("name", "that provider")
+
+    if accepted:
+        return f"Good news, we do accept {provider} insurance."
+    return f"Unfortunately, we do not carry or accept {provider} insurance."
+
+
+def format_appt_slots(func_args: dict, func_result: dict) -> str:
+    if func_args.get("summary"):
+        return format_appt_summary(func_result)
+
+    slots = func_result["slots"]
+    if not slots:
+        return "I'm sorry, there are no available appointment slots during that time range."
+
+    times_list = ", ".join(_format_slot(slot) for slot in slots)
+    reply = f"Here are the corresponding available appointment times: [{times_list}]"
+    if func_result.get("next_offset") is not None:
+        reply += f" There are more openings in this range (call again with offset {func_result['next_offset']} for the next ones)."
+    return reply
+
+
+def format_appt_summary(summary: dict) -> str:
+    if not summary["total"]:
+        return "I'm sorry, there are no available appointment slots during that time range."
+
+    days = []
+    for day in summary["days"]:
+        name = datetime.fromisoformat(day["date"]).strftime("%A %m-%d").replace(" 0", " ")
+        days.append(f"{name}: {day['morning']} morning, {day['afternoon']} afternoon")
+    reply = f"{summary['total']} openings in that range. By day: [{'; '.join(days)}]."
+    if summary["openings"]:
+        reply += f" Earliest: [{', '.join(_format_slot(slot) for slot in summary['openings'])}]"
+    return reply
+
+
+def _format_slot(slot: dict) -> str:
+    # Parse ISO string, convert to local TZ (e.g., New York), and format
+    dt = datetime.fromisoformat(slot["start_time"]).astimezone(EASTERN)
+    return dt.strftime("%m-%d %I:%M%p").lstrip("0").replace(" 0", " ")
@@ -0,0 +1,113 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Server (python main.py); reload is for development only
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "5050"))
+SERVER_RELOAD = os.getenv("SERVER_RELOAD", "false").lower() == "true"
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+# Each warm-up step (OpenAI connection, insurance catalog, filler clips) gets this long before /ready passes without it
+STARTUP_WARMUP_TIMEOUT_SECONDS = float(os.getenv("STARTUP_WARMUP_TIMEOUT_SECONDS", "5.0"))
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+POSTGRESQL_BASE_URL = os.getenv("POSTGRESQL_BASE_URL")
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com")
+
+# Shared HTTP client (tool calls to the data service, Twilio REST calls)
+HTTP2 = os.getenv("HTTP2", "false").lower() == "true"
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "2.0"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "5.0"))
+
+# Data access for tool calls: "http" calls the postgresql service over HTTP,
+# "inprocess" imports its query functions and talks to Postgres directly.
+DATA_BACKEND = os.getenv("DATA_BACKEND", "http")
+POSTGRESQL_SERVICE_DIR = os.getenv(
+    "POSTGRESQL_SERVICE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "postgresql")
+)
+
+# How often the agent re-reads the insurance catalog to rebuild its function schema
+INSURANCE_PROVIDERS_REFRESH_SECONDS = float(os.getenv("INSURANCE_PROVIDERS_REFRESH_SECONDS", "300"))
+
+# Conversation memory: history sent to the model is kept under this many tokens,
+# and function results older than the latest turn are collapsed to this many characters
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "3000"))
+TOOL_OUTPUT_COLLAPSE_CHARS = int(os.getenv("TOOL_OUTPUT_COLLAPSE_CHARS", "160"))
+
+# Call session storage: "memory" (single process) or "postgres" (shared across workers and nodes)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_SWEEP_SECONDS = float(os.getenv("SESSION_SWEEP_SECONDS", "60"))
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Per-turn timing traces, one JSON object per line, linked by callSid
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "traces.jsonl")
+
+# Speculative tool prefetch from partial/final transcripts; results are reused for this many seconds
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_TTL_SECONDS = float(os.getenv("PREFETCH_TTL_SECONDS", "30"))
+
+# Tool calling: model/tool round trips allowed per turn, and the default per-tool time limit
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "3"))
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "4.0"))
+
+# Latency budgets per turn, measured as silence: time since the caller last heard a token or clip.
+# A completion with no first token after FIRST_TOKEN_BUDGET_SECONDS gets the holding phrase and, if
+# FALLBACK_MODEL is set (off by default), a race against that model. Once SILENCE_BUDGET_SECONDS pass
+# with nothing to say (slow tools, a stalled stream) the turn ends with the assistant's degraded reply.
+# A stream that keeps producing tokens is never cut off.
+FIRST_TOKEN_BUDGET_SECONDS = float(os.getenv("FIRST_TOKEN_BUDGET_SECONDS", "1.5"))
+SILENCE_BUDGET_SECONDS = float(os.getenv("SILENCE_BUDGET_SECONDS", "10.0"))
+FALLBACK_MODEL = os.getenv("FALLBACK_MODEL", "")
+
+# Appointment slots read back per check_appt_slots call; the model pages through longer lists
+APPT_SLOTS_PAGE_SIZE = int(os.getenv("APPT_SLOTS_PAGE_SIZE", "8"))
+
+# Answer common front-desk questions from precomputed replies (see faq_cache.py)
+FAQ_CACHE_ENABLED = os.getenv("FAQ_CACHE_ENABLED", "true").lower() == "true"
+FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", "0.7"))
+FAQ_MATCH_MARGIN = float(os.getenv("FAQ_MATCH_MARGIN", "0.1"))
+FAQ_MAX_WORDS = int(os.getenv("FAQ_MAX_WORDS", "12"))
+FAQ_CACHE_SIZE = int(os.getenv("FAQ_CACHE_SIZE", "1024"))
+
+# Background jobs (recordings, call logs, post-call summaries): bounded workers, retries with backoff,
+# and a spill for jobs that don't fit ("none" drops them, "postgres" keeps them for any worker to pick up)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "1000"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_SECONDS = float(os.getenv("JOB_BACKOFF_SECONDS", "0.5"))
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "30"))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "30"))
+JOB_SPILL = os.getenv("JOB_SPILL", "none")
+JOB_SPILL_POLL_SECONDS = float(os.getenv("JOB_SPILL_POLL_SECONDS", "5"))
+JOB_DRAIN_SECONDS = float(os.getenv("JOB_DRAIN_SECONDS", "5"))
+
+# One JSON line per finished call (metadata, messages and, if enabled, a model-written summary)
+CALL_LOG_PATH = os.getenv("CALL_LOG_PATH", "calls.jsonl")
+CALL_SUMMARY_ENABLED = os.getenv("CALL_SUMMARY_ENABLED", "true").lower() == "true"
+
+# Where Twilio can reach this service (for audio URLs); defaults to the ngrok tunnel
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", os.getenv("NGROK_URL", "")).rstrip("/")
+if PUBLIC_BASE_URL and not PUBLIC_BASE_URL.startswith("http"):
+    PUBLIC_BASE_URL = f"https://{PUBLIC_BASE_URL}"
+
+# Content-addressed cache of synthesized speech (see models/tts.py and prerender_tts.py)
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+TTS_SYNTH_CONCURRENCY = int(os.getenv("TTS_SYNTH_CONCURRENCY", "4"))
+TTS_SYNTH_TIMEOUT_SECONDS = float(os.getenv("TTS_SYNTH_TIMEOUT_SECONDS", "15"))
+ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+ELEVENLABS_MODEL_ID = os.getenv("ELEVENLABS_MODEL_ID", "eleven_flash_v2_5")
+ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
+
+# Filler audio (from the data service's /filler library) played while tools run, only when the expected
+# wait (tool latency + the follow-up's first token, from recent turns) is at least this long
+FILLER_FAMILY = os.getenv("FILLER_FAMILY", "keyboard-typing")
+FILLER_THRESHOLD_SECONDS = float(os.getenv("FILLER_THRESHOLD_SECONDS", "0.8"))
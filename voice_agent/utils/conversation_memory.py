@@ -0,0 +1,98 @@
+import json
+from collections import OrderedDict
+from utils.config import CONVERSATION_TOKEN_BUDGET, TOOL_OUTPUT_COLLAPSE_CHARS
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Rough per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Messages carrying a tool's output; they are kept with the assistant message that called the tool
+TOOL_RESULT_ROLES = ("function", "tool")
+
+
+class ConversationMemory:
+    """
+    Builds the message list sent to the model from a call's full conversation.
+
+    - The leading system messages are always sent unchanged, so the static prompt stays a byte-stable
+      prefix for provider-side prompt caching.
+    - The rest is grouped into units that are kept or dropped together; an assistant tool call
+      always stays with its results.
+    - Tool results from earlier units are collapsed, then the oldest units are dropped until the
+      history fits the token budget.
+    """
+
+    def __init__(self, model: str, max_tokens: int = CONVERSATION_TOKEN_BUDGET,
+                 collapse_chars: int = TOOL_OUTPUT_COLLAPSE_CHARS, cache_size: int = 10000):
+        self.max_tokens = max_tokens
+        self.collapse_chars = collapse_chars
+        self.encoding = self._get_encoding(model)
+        # Token counts by message content, so each message is only encoded once
+        self._token_counts = OrderedDict()
+        self._cache_size = cache_size
+
+    def build(self, conversation: list) -> list:
+        split = 0
+        while split < len(conversation) and conversation[split]["role"] == "system":
+            split += 1
+        prefix, units = conversation[:split], self._group(conversation[split:])
+
+        # Old tool output is rarely needed verbatim; keep it short
+        units = [[self._collapse(m) for m in unit] for unit in units[:-1]] + units[-1:]
+
+        budget = self.max_tokens - sum(self.count(m) for m in prefix)
+        kept = []
+        for unit in reversed(units):
+            cost = sum(self.count(m) for m in unit)
+            if kept and cost > budget:
+                break
+            kept.append(unit)
+            budget -= cost
+
+        return prefix + [m for unit in reversed(kept) for m in unit]
+
+    def count(self, message: dict) -> int:
+        text = message.get("content") or ""
+        if message.get("function_call"):
+            text += json.dumps(message["function_call"])
+        if message.get("tool_calls"):
+            text += json.dumps(message["tool_calls"])
+        if text in self._token_counts:
+            self._token_counts.move_to_end(text)
+            return self._token_counts[text]
+
+        tokens = MESSAGE_OVERHEAD_TOKENS + (len(self.encoding.encode(text)) if self.encoding else len(text) // 4)
+        self._token_counts[text] = tokens
+        if len(self._token_counts) > self._cache_size:
+            self._token_counts.popitem(last=False)
+        return tokens
+
+    def _group(self, messages: list) -> list:
+        units = []
+        for message in messages:
+            # Function/tool results belong to the call before them
+            if message["role"] in TOOL_RESULT_ROLES and units:
+                units[-1].append(message)
+            else:
+                units.append([message])
+        return units
+
+    def _collapse(self, message: dict) -> dict:
+        content = message.get("content") or ""
+        if message["role"] not in TOOL_RESULT_ROLES or len(content) <= self.collapse_chars:
+            return message
+        cut = content.rfind(",", 0, self.collapse_chars)
+        cut = cut if cut > 0 else self.collapse_chars
+        return {**message, "content": content[:cut] + " ... (truncated)"}
+
+    def _get_encoding(self, model: str):
+        if tiktoken is None:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
@@ -0,0 +1,68 @@
+import re
+
+# Sentence ends are always a safe place to hand text to TTS. Clause breaks are only
+# used once enough text has built up, so we don't send ConversationRelay tiny fragments.
+SENTENCE_END = re.compile(r"[.!?](?=\s)")
+CLAUSE_END = re.compile(r"[,;:](?=\s)")
+
+
+class SpeechChunker:
+    """
+    Buffers streamed LLM tokens and releases them at sentence or clause boundaries.
+    Whitespace is kept with the following chunk, so joining the chunks gives back the full reply.
+    """
+
+    def __init__(self, min_clause_chars: int = 40):
+        self.min_clause_chars = min_clause_chars
+        self.buffer = ""
+        # Last character handed out, so a phrase spoken next can be spaced from it
+        self.last = ""
+        # Text streamed after one of our own phrases starts a new sentence and needs spacing from it
+        self.space_next = False
+
+    def feed(self, token: str) -> list:
+        if self.space_next and token:
+            self.space_next = False
+            if not token[:1].isspace():
+                token = " " + token
+        self.buffer += token
+        chunks = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                return chunks
+            chunks.append(self._release(self.buffer[:cut]))
+            self.buffer = self.buffer[cut:]
+
+    def flush(self) -> str:
+        rest, self.buffer = self.buffer, ""
+        return self._release(rest)
+
+    def say(self, phrase: str) -> list:
+        """
+        Chunks for a complete phrase of our own (holding line, degraded reply, tool results) spoken after whatever
+        was streamed so far: the buffered text goes first, and the phrase is spaced from it like streamed text.
+        The phrase itself is one chunk, so a prerendered recording of it can be played instead.
+        """
+        rest = self.flush()
+        chunks = [rest] if rest else []
+        if self.last and not self.last.isspace() and not phrase[:1].isspace():
+            phrase = " " + phrase
+        chunks.append(self._release(phrase))
+        self.space_next = True
+        return chunks
+
+    def _release(self, text: str) -> str:
+        if text:
+            self.last = text[-1]
+        return text
+
+    def _find_cut(self):
+        match = SENTENCE_END.search(self.buffer)
+        if match:
+            return match.end()
+        if len(self.buffer) >= self.min_clause_chars:
+            match = CLAUSE_END.search(self.buffer, self.min_clause_chars // 2)
+            if match:
+                return match.end()
+        return None
@@ -0,0 +1,50 @@
+import importlib.util
+from urllib.parse import urlparse
+import httpx
+from utils.config import (
+    POSTGRESQL_BASE_URL,
+    TWILIO_API_BASE_URL,
+    ELEVENLABS_BASE_URL,
+    HTTP2,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Build the process-wide async HTTP client.
+    Connections are kept alive and pooled; the hosts we call on every turn get their own capped pool.
+    """
+    http2 = HTTP2
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("HTTP2 is enabled but the 'h2' package is not installed; falling back to HTTP/1.1")
+        http2 = False
+
+    timeout = httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+    per_host_limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+    mounts = {}
+    for base_url in (POSTGRESQL_BASE_URL, TWILIO_API_BASE_URL, ELEVENLABS_BASE_URL):
+        if base_url:
+            url = urlparse(base_url)
+            mounts[f"{url.scheme}://{url.netloc}"] = httpx.AsyncHTTPTransport(limits=per_host_limits, http2=http2)
+
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+        mounts=mounts,
+    )
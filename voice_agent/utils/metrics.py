@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from utils.config import TRACE_LOG_PATH, CALL_LOG_PATH
+
+# Voice latency lives between a few ms (socket sends) and several seconds (slow completions)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0)
+
+SPAN_SECONDS = Histogram(
+    "voice_agent_span_seconds",
+    "Duration of each stage of a turn (turn, first_audio, faq_lookup, llm_first_token, llm_completion, tool, socket_send, job)",
+    ["span", "name"],
+    buckets=LATENCY_BUCKETS,
+)
+TURNS = Counter("voice_agent_turns_total", "Turns handled, by outcome", ["outcome"])
+PREFETCH = Counter("voice_agent_prefetch_total", "Tool calls answered from the speculative prefetch cache", ["tool", "outcome"])
+JOBS = Counter("voice_agent_jobs_total", "Background jobs by outcome (done, retried, failed, spilled, dropped)", ["job", "outcome"])
+JOB_QUEUE_DEPTH = Gauge("voice_agent_job_queue_depth", "Background jobs waiting for a worker")
+BUDGETS = Counter("voice_agent_budget_total", "Latency budget checks by stage (first_token, tool, silence) and outcome (ok, exceeded, error)", ["stage", "outcome"])
+FALLBACKS = Counter("voice_agent_fallback_total", "Fallbacks run after a missed budget (holding_phrase, fallback_model, degraded)", ["fallback"])
+STARTUP_SECONDS = Gauge("voice_agent_startup_seconds", "Time this worker spent in each startup phase (import, lifespan, warm_up, total)", ["phase"])
+STARTUP_STEPS = Counter("voice_agent_startup_steps_total", "Warm-up steps by outcome (ok, failed)", ["step", "outcome"])
+FAQ = Counter("voice_agent_faq_total", "Prompts answered from the FAQ cache (hit) or sent to the model (miss)", ["outcome", "intent"])
+
+# The trace of the turn being handled, and the call it belongs to
+current_trace: ContextVar = ContextVar("current_trace", default=None)
+current_call_sid: ContextVar = ContextVar("current_call_sid", default=None)
+
+trace_logger = logging.getLogger("voice_agent.trace")
+trace_logger.propagate = False
+
+call_logger = logging.getLogger("voice_agent.calls")
+call_logger.propagate = False
+
+
+def configure_logs(trace_log_path: str = TRACE_LOG_PATH, call_log_path: str = CALL_LOG_PATH):
+    """Open the JSON-lines trace and call logs (called from the app lifespan, so importing this module writes nothing)."""
+    for logger, path in ((trace_logger, trace_log_path), (call_logger, call_log_path)):
+        if path and not logger.handlers:
+            handler = logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+
+
+def close_logs():
+    for logger in (trace_logger, call_logger):
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+
+
+class LatencyEstimates:
+    """Exponentially weighted moving average of recent span durations, used to predict how long a stage will take."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.values = {}
+
+    def observe(self, span: str, name: str, seconds: float):
+        key = (span, name)
+        previous = self.values.get(key)
+        self.values[key] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    def expected(self, span: str, name: str = "", default: float = None):
+        return self.values.get((span, name), default)
+
+
+latency_estimates = LatencyEstimates()
+
+
+class TurnTrace:
+    """Timing spans for one turn; written to the trace log as a single JSON line when the turn ends."""
+
+    def __init__(self, call_sid: str):
+        self.call_sid = call_sid
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.spans = []
+        self.outcome = "completed"
+
+    def record(self, span: str, seconds: float, name: str = ""):
+        SPAN_SECONDS.labels(span, name).observe(seconds)
+        latency_estimates.observe(span, name, seconds)
+        self.spans.append({
+            "span": span,
+            "name": name,
+            "start_ms": round((time.perf_counter() - seconds - self.started) * 1000, 1),
+            "duration_ms": round(seconds * 1000, 1),
+        })
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def write(self):
+        trace_logger.info(json.dumps({
+            "callSid": self.call_sid,
+            "started_at": self.started_at,
+            "outcome": self.outcome,
+            "total_ms": round(self.elapsed() * 1000, 1),
+            "spans": self.spans,
+        }))
+
+
+def record(span: str, seconds: float, name: str = ""):
+    """Record a span on the current turn's trace (or just the histogram outside a turn)."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.record(span, seconds, name)
+    else:
+        SPAN_SECONDS.labels(span, name).observe(seconds)
+        latency_estimates.observe(span, name, seconds)
+
+
+@contextmanager
+def span(span_name: str, name: str = ""):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(span_name, time.perf_counter() - start, name)
+
+
+@contextmanager
+def turn_trace(call_sid: str):
+    """Start a trace for one turn; spans recorded inside it (including in awaited code) attach to it."""
+    trace = TurnTrace(call_sid)
+    trace_token = current_trace.set(trace)
+    call_token = current_call_sid.set(call_sid)
+    try:
+        yield trace
+    except asyncio.CancelledError:
+        trace.outcome = "cancelled"
+        raise
+    except Exception:
+        trace.outcome = "error"
+        raise
+    finally:
+        trace.record("turn", trace.elapsed())
+        TURNS.labels(trace.outcome).inc()
+        trace.write()
+        current_trace.reset(trace_token)
+        current_call_sid.reset(call_token)
+
+
+def render_metrics():
+    """Prometheus text exposition of every metric in this process."""
+    return generate_latest(), CONTENT_TYPE_LATEST